@@ -1,8 +1,10 @@
 from logging import Logger
+from typing import List, Tuple
 
 from habitat.core.simulator import Observations
 
 from src.envs.habitat_rlenv import HabitatRLEnv
+from src.utils import utils_scheduler
 
 
 class HabitatEvalRLEnv(HabitatRLEnv):
@@ -59,3 +61,56 @@ class HabitatEvalRLEnv(HabitatRLEnv):
         self._env._episode_iterator = self._env._dataset.get_episode_iterator(
             **iter_option_dict
         )
+
+    def set_episode_iterator_to_subset(
+        self, episode_identifiers: List[Tuple[str, str]]
+    ) -> None:
+        r"""
+        Make the environment iterate over only the given episodes, in the
+        given order.
+        :param episode_identifiers: list of (episode ID, scene ID) pairs
+        """
+        episodes = {
+            (str(episode.episode_id), episode.scene_id): episode
+            for episode in self._env.episodes
+        }
+        self._env._episode_iterator = iter(
+            [
+                episodes[(str(episode_id), scene_id)]
+                for episode_id, scene_id in episode_identifiers
+            ]
+        )
+
+    def set_episode_shard(self, shard_id: int, num_shards: int) -> None:
+        r"""
+        Restrict the environment to one shard of its dataset's episodes, so
+        several environments can split a dataset between them. Episodes of
+        the same scene are kept in the same shard, and scenes are balanced
+        across shards by episode count. The shard persists across
+        reset_episode_iterator().
+        :param shard_id: index of the shard to keep
+        :param num_shards: number of shards
+        """
+        assert 0 <= shard_id < num_shards
+        episodes = self._env._dataset.episodes
+        # balance scenes across shards as the evaluation scheduler does
+        # across workers
+        units = utils_scheduler.make_work_units(
+            {"": [(str(e.episode_id), e.scene_id) for e in episodes]}, [0]
+        )
+        shard_identifiers = {
+            tuple(episode)
+            for unit in utils_scheduler.assign_work_units(units, num_shards)[
+                shard_id
+            ]
+            for episode in unit["episodes"]
+        }
+        shard_episodes = [
+            e for e in episodes if (str(e.episode_id), e.scene_id) in shard_identifiers
+        ]
+        assert (
+            len(shard_episodes) > 0
+        ), f"Shard {shard_id} of {num_shards} is empty; the dataset has too few scenes"
+        self._env._dataset.episodes = shard_episodes
+        self._env.episodes = shard_episodes
+        self.reset_episode_iterator()
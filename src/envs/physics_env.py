@@ -11,6 +11,11 @@ from habitat.core.embodied_task import EmbodiedTask
 from habitat.core.env import Env
 from habitat.core.simulator import Observations, Simulator
 
+# physics time step and action duration used when SIMULATOR.TIME_STEP and
+# SIMULATOR.CONTROL_PERIOD are not configured
+DEFAULT_TIME_STEP = 1.0 / 60.0
+DEFAULT_CONTROL_PERIOD = 1.0
+
 
 class PhysicsEnv(Env):
     r"""Fundamental environment class for :ref:`habitat`.
@@ -69,8 +74,9 @@ class PhysicsEnv(Env):
     def step_physics(
         self,
         action: Union[int, str, Dict[str, Any]] = None,
-        time_step=1.0 / 60.0,
-        control_period=1.0,
+        time_step=None,
+        control_period=None,
+        num_substeps=1,
         **kwargs
     ) -> Observations:
         r"""Perform an action in the environment, with physics enabled, and
@@ -81,8 +87,12 @@ class PhysicsEnv(Env):
             allowed task's action and action arguments (belonging to action's
             :ref:`action_space`) to support parametrized and continuous
             actions. If Action is none, then iterate by one time step only.
-        :param time_step: time step for physics simulation
-        :param control_period:
+        :param time_step: time step for physics simulation. If None, use
+            SIMULATOR.TIME_STEP from config
+        :param control_period: duration of a discrete action, in seconds.
+            If None, use SIMULATOR.CONTROL_PERIOD from config
+        :param num_substeps: if action is None, number of physics time steps
+            to simulate before rendering observations
         :return: observations after taking action in environment.
         """
         assert (
@@ -100,6 +110,13 @@ class PhysicsEnv(Env):
         ):
             action = {"action": action}
 
+        if time_step is None:
+            time_step = self._config.SIMULATOR.get("TIME_STEP", DEFAULT_TIME_STEP)
+        if control_period is None:
+            control_period = self._config.SIMULATOR.get(
+                "CONTROL_PERIOD", DEFAULT_CONTROL_PERIOD
+            )
+
         # Step with physics
         # double-check to make sure the agent object is already define by this point
         assert self.agent_object is not None
@@ -109,6 +126,7 @@ class PhysicsEnv(Env):
             time_step=time_step,
             control_period=control_period,
             agent_object=self.agent_object,
+            num_substeps=num_substeps,
         )
 
         self._task.measurements.update_measures(
@@ -11,8 +11,9 @@ from habitat_baselines.agents.ppo_agents import PPOAgent
 from src.envs.habitat_eval_rlenv import HabitatEvalRLEnv
 from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
 from src.constants.constants import NumericalMetrics
-from src.utils import utils_logging
+from src.utils import utils_logging, utils_trajectory, utils_journal
 from src.utils.utils_visualization import (
+    AsyncVideoGenerator,
     TensorboardWriter,
     generate_video,
     colorize_and_fit_to_height,
@@ -69,6 +70,67 @@ class HabitatEvaluator(HabitatSimEvaluator):
             config=self.config, enable_physics=self.enable_physics
         )
 
+    def get_agent_pose(self) -> np.ndarray:
+        r"""
+        Get the current pose of the agent in the simulator.
+        :returns: pose packed by utils_trajectory.make_pose()
+        """
+        agent_state = self.env._env._sim.get_agent_state()
+        return utils_trajectory.make_pose(agent_state.position, agent_state.rotation)
+
+    def make_agent_or_replayer(
+        self, agent_config: Config, trajectory_dir: str, episode_id: str, scene_id: str
+    ):
+        r"""
+        Instantiate a PPO agent, or a replayer of a recorded trajectory if
+        `trajectory_dir` is given. Both are reset before being returned.
+        :param agent_config: config of the PPO agent
+        :param trajectory_dir: directory of recorded trajectories; empty
+            to run the agent
+        :param episode_id: episode ID of the episode to play
+        :param scene_id: scene ID of the episode to play
+        :returns: an object with `act()`
+        """
+        if trajectory_dir != "":
+            agent = utils_trajectory.TrajectoryReplayer(
+                utils_trajectory.get_trajectory_path(
+                    trajectory_dir, episode_id, scene_id
+                )
+            )
+        else:
+            agent = PPOAgent(agent_config)
+        agent.reset()
+        return agent
+
+    def check_replayed_pose(self) -> None:
+        r"""
+        If replaying a trajectory, compare the agent's pose against the
+        recorded one.
+        """
+        if isinstance(self.agent, utils_trajectory.TrajectoryReplayer):
+            self.agent.check_pose(self.get_agent_pose())
+
+    def log_replay_result(self, logger, episode_id: str, scene_id: str) -> None:
+        r"""
+        If replaying a trajectory, warn if the replay diverged from the
+        recording.
+        """
+        if isinstance(
+            self.agent, utils_trajectory.TrajectoryReplayer
+        ) and not self.agent.is_exact():
+            diverged_step = self.agent.first_mismatch_step
+            if diverged_step is None:
+                diverged_step = self.agent.count_steps
+            logger.warning(
+                f"Replay of episode={episode_id}, scene={scene_id} diverged "
+                f"from the recording at step {diverged_step}"
+            )
+            if self.agent.num_extra_steps > 0:
+                logger.warning(
+                    f"Recorded actions ran out; sent STOP after "
+                    f"{self.agent.count_steps} replayed steps"
+                )
+
     def evaluate_and_get_maps(
         self,
         episode_id_last: str = "-1",
@@ -76,9 +138,33 @@ class HabitatEvaluator(HabitatSimEvaluator):
         log_dir: str = "logs/",
         agent_seed: int = 7,
         map_height: int = 200,
+        trajectory_dir: str = "",
+        episode_identifiers: List[Tuple[str, str]] = None,
+        resume: bool = False,
         *args,
         **kwargs,
     ) -> Dict[str, Dict[str, float]]:
+        r"""
+        Evaluate the episodes and get top-down maps of each episode.
+        :param episode_id_last: ID of the last episode evaluated; "-1" to
+            evaluate from the first episode
+        :param scene_id_last: scene ID of the last episode evaluated
+        :param log_dir: directory to save per-episode logs
+        :param agent_seed: seed of the agent
+        :param map_height: height of the top-down maps
+        :param trajectory_dir: if not empty, record each episode's actions
+            and agent poses to this directory for replay
+        :param episode_identifiers: if given, evaluate only these (episode
+            ID, scene ID) pairs, in the given order. Overrides
+            `episode_id_last` and `scene_id_last`
+        :param resume: if True, skip episodes already committed to the
+            journal in `log_dir` and evaluate the rest. Overrides
+            `episode_id_last` and `scene_id_last`. Episodes restored from the
+            journal come with numerical metrics only, no top-down map. The
+            journal is only cleared by evaluations of all episodes from the
+            first one
+        :returns: dictionary of per-episode metrics and maps
+        """
         # make sure we have episodes to evaluate
         num_episodes = len(self.env._env.episodes)
         assert num_episodes > 0, "environment should contain at least one episode"
@@ -87,11 +173,43 @@ class HabitatEvaluator(HabitatSimEvaluator):
         logger = utils_logging.setup_logger(__name__)
         logger.info(f"Total number of episodes in the environment: {num_episodes}")
 
+        # every finished episode is committed to a journal, so an
+        # interrupted evaluation can be resumed
+        journal = utils_journal.EvalJournal(utils_journal.get_journal_path(log_dir))
+        dict_of_metrics = {}
+        if resume:
+            finished_episodes = journal.load()
+            for (episode_id, scene_id), metrics in finished_episodes.items():
+                dict_of_metrics[f"{episode_id},{scene_id}"] = metrics
+            if episode_identifiers is None:
+                episode_identifiers = [
+                    (str(episode.episode_id), episode.scene_id)
+                    for episode in self.env._env.episodes
+                ]
+            episode_identifiers = [
+                (str(episode_id), scene_id)
+                for episode_id, scene_id in episode_identifiers
+                if (str(episode_id), scene_id) not in finished_episodes
+            ]
+            logger.info(
+                f"Resuming evaluation: {len(finished_episodes)} episodes already finished"
+            )
+        elif episode_id_last == "-1" and episode_identifiers is None:
+            # a fresh evaluation from the first episode; a manual restart
+            # from a given episode, or a subset, appends to the journal
+            journal.clear()
+
         # reset episode iterator
-        self.env.reset_episode_iterator()
+        if episode_identifiers is not None:
+            self.env.set_episode_iterator_to_subset(episode_identifiers)
+            num_episodes = len(episode_identifiers)
+        else:
+            self.env.reset_episode_iterator()
 
         # locate the last episode evaluated
-        if episode_id_last != "-1":
+        if episode_identifiers is not None:
+            logger.info(f"Evaluating {num_episodes} given episodes")
+        elif episode_id_last != "-1":
             self.env.iter_to_episode(episode_id_last, scene_id_last, logger)
         else:
             logger.info(
@@ -102,7 +220,6 @@ class HabitatEvaluator(HabitatSimEvaluator):
         count_episodes = 0
         episode_id = ""
         scene_id = ""
-        dict_of_metrics = {}
         while count_episodes < num_episodes:
             try:
                 count_steps = 0
@@ -141,6 +258,12 @@ class HabitatEvaluator(HabitatSimEvaluator):
                 logger_per_episode.info(f"episode id: {episode_id}")
                 logger_per_episode.info(f"scene id: {scene_id}")
 
+                # record the trajectory if requested
+                actions_per_episode = []
+                poses_per_episode = []
+                if trajectory_dir != "":
+                    poses_per_episode.append(self.get_agent_pose())
+
                 # act until one episode is over
                 info_per_action = None
                 while not self.env._env.episode_over:
@@ -171,9 +294,22 @@ class HabitatEvaluator(HabitatSimEvaluator):
                     t_sim_elapsed += t_sim_end - t_sim_start
                     # --------------------------------------------
 
+                    if trajectory_dir != "":
+                        actions_per_episode.append(action["action"])
+                        poses_per_episode.append(self.get_agent_pose())
+
                     count_steps += 1
 
                 # episode ended
+                if trajectory_dir != "":
+                    utils_trajectory.save_trajectory(
+                        utils_trajectory.get_trajectory_path(
+                            trajectory_dir, episode_id, scene_id
+                        ),
+                        actions_per_episode,
+                        poses_per_episode,
+                    )
+
                 # collect metrics
                 per_episode_metrics = self.env._env.get_metrics()
                 per_episode_metrics[NumericalMetrics.NUM_STEPS] = count_steps
@@ -201,6 +337,16 @@ class HabitatEvaluator(HabitatSimEvaluator):
                 # add to the metrics list
                 dict_of_metrics[f"{episode_id},{scene_id}"] = per_episode_metrics
 
+                # commit the episode to the journal
+                journal.commit(
+                    episode_id,
+                    scene_id,
+                    {
+                        metric_name.value: per_episode_metrics[metric_name]
+                        for metric_name in NumericalMetrics
+                    },
+                )
+
                 # increment episode counter
                 count_episodes += 1
 
@@ -245,9 +391,19 @@ class HabitatEvaluator(HabitatSimEvaluator):
         episode_ids: List[str],
         scene_ids: List[str],
         agent_seed: int = 7,
+        trajectory_dir: str = "",
         *args,
         **kwargs,
     ) -> None:
+        r"""
+        Generate videos of the given episodes.
+        :param episode_ids: episode ID's of the episodes to visualize
+        :param scene_ids: scene ID's of the episodes to visualize
+        :param agent_seed: seed of the agent
+        :param trajectory_dir: if not empty, replay the trajectories recorded
+            by evaluate_and_get_maps() in this directory instead of running
+            the agent
+        """
         # create a logger
         logger = utils_logging.setup_logger(__name__)
 
@@ -273,70 +429,79 @@ class HabitatEvaluator(HabitatSimEvaluator):
                 self.config.TENSORBOARD_DIR, flush_secs=30
             )  # flush_specs from base_trainer.py
 
-        # visualize episodes in the given lists
-        while count_episodes_visualized < num_episodes:
-            try:
-                observations_per_action = self.env.reset()
-                info_per_action = None
-
-                # get episode and scene id
-                current_episode = self.env._env.current_episode
-                episode_id = str(current_episode.episode_id)
-                scene_id = current_episode.scene_id
-                if (episode_id, scene_id) in zip(episode_ids, scene_ids):
-                    # if the current episode is in the visualization list,
-                    # we evaluate it
-                    count_episodes_visualized += 1
-
-                    # store observations over frames
-                    # NOTE: we are not storing the initial observations returned
-                    # from env.reset() because we cannot get the initial info for
-                    # observations_to_image()
-                    observations_per_episode = []
-
-                    # instantiate an agent
-                    self.agent = PPOAgent(agent_config)
-                    self.agent.reset()
-
-                    # act until the episode is over
-                    while not self.env._env.episode_over:
-                        action = self.agent.act(observations_per_action)
-                        (
-                            observations_per_action,
-                            _,
-                            _,
-                            info_per_action,
-                        ) = self.env.step(action)
-                        out_im_per_action = observations_to_image(
-                            observations_per_action, info_per_action
+        # videos are encoded by worker processes while the next episodes
+        # are evaluated; leaving the block waits for all videos to be written
+        with AsyncVideoGenerator() as video_generator:
+            # visualize episodes in the given lists
+            while count_episodes_visualized < num_episodes:
+                try:
+                    observations_per_action = self.env.reset()
+                    info_per_action = None
+
+                    # get episode and scene id
+                    current_episode = self.env._env.current_episode
+                    episode_id = str(current_episode.episode_id)
+                    scene_id = current_episode.scene_id
+                    if (episode_id, scene_id) in zip(episode_ids, scene_ids):
+                        # if the current episode is in the visualization list,
+                        # we evaluate it
+                        count_episodes_visualized += 1
+
+                        # store observations over frames
+                        # NOTE: we are not storing the initial observations returned
+                        # from env.reset() because we cannot get the initial info for
+                        # observations_to_image()
+                        observations_per_episode = []
+
+                        # instantiate an agent, or a replayer of the recorded
+                        # trajectory
+                        self.agent = self.make_agent_or_replayer(
+                            agent_config, trajectory_dir, episode_id, scene_id
                         )
-                        observations_per_episode.append(out_im_per_action)
-
-                    # get metrics for video generation
-                    metrics = self.env._env.get_metrics()
-                    per_ep_metrics = {
-                        k: metrics[k]
-                        for k in [
-                            NumericalMetrics.DISTANCE_TO_GOAL,
-                            NumericalMetrics.SUCCESS,
-                            NumericalMetrics.SPL,
-                        ]
-                    }
-
-                    # generate video and tensorboard visualization
-                    generate_video(
-                        video_option=self.config.VIDEO_OPTION,
-                        video_dir=self.config.VIDEO_DIR,
-                        images=observations_per_episode,
-                        episode_id=episode_id,
-                        scene_id=scene_id,
-                        agent_seed=agent_seed,
-                        checkpoint_idx=0,
-                        metrics=per_ep_metrics,
-                        tb_writer=writer,
-                    )
-            except StopIteration:
-                break
+                        self.check_replayed_pose()
+
+                        # act until the episode is over
+                        while not self.env._env.episode_over:
+                            action = self.agent.act(observations_per_action)
+                            (
+                                observations_per_action,
+                                _,
+                                _,
+                                info_per_action,
+                            ) = self.env.step(action)
+                            self.check_replayed_pose()
+                            out_im_per_action = observations_to_image(
+                                observations_per_action, info_per_action
+                            )
+                            observations_per_episode.append(out_im_per_action)
+                        self.log_replay_result(logger, episode_id, scene_id)
+
+                        # get metrics for video generation
+                        metrics = self.env._env.get_metrics()
+                        per_ep_metrics = {
+                            k: metrics[k]
+                            for k in [
+                                NumericalMetrics.DISTANCE_TO_GOAL,
+                                NumericalMetrics.SUCCESS,
+                                NumericalMetrics.SPL,
+                            ]
+                        }
+
+                        # generate video and tensorboard visualization
+                        generate_video(
+                            video_option=self.config.VIDEO_OPTION,
+                            video_dir=self.config.VIDEO_DIR,
+                            images=observations_per_episode,
+                            episode_id=episode_id,
+                            scene_id=scene_id,
+                            agent_seed=agent_seed,
+                            checkpoint_idx=0,
+                            metrics=per_ep_metrics,
+                            tb_writer=writer,
+                            video_generator=video_generator,
+                        )
+                except StopIteration:
+                    break
 
         logger.info(f"Given {num_episodes} episodes to generate videos")
         logger.info(f"Generated videos of {count_episodes_visualized} episodes")
@@ -350,9 +515,21 @@ class HabitatEvaluator(HabitatSimEvaluator):
         scene_ids: List[str],
         agent_seed: int,
         map_height: int,
+        trajectory_dir: str = "",
         *args,
         **kwargs,
     ) -> Dict[str, np.ndarray]:
+        r"""
+        Generate top-down maps of the given episodes.
+        :param episode_ids: episode ID's of the episodes to visualize
+        :param scene_ids: scene ID's of the episodes to visualize
+        :param agent_seed: seed of the agent
+        :param map_height: height of the top-down maps
+        :param trajectory_dir: if not empty, replay the trajectories recorded
+            by evaluate_and_get_maps() in this directory instead of running
+            the agent
+        :returns: dictionary of maps, keyed by "<episode id>,<scene id>"
+        """
         # create a logger
         logger = utils_logging.setup_logger(__name__)
 
@@ -387,9 +564,12 @@ class HabitatEvaluator(HabitatSimEvaluator):
                     # we evaluate it
                     count_episodes_visualized += 1
 
-                    # instantiate an agent
-                    self.agent = PPOAgent(agent_config)
-                    self.agent.reset()
+                    # instantiate an agent, or a replayer of the recorded
+                    # trajectory
+                    self.agent = self.make_agent_or_replayer(
+                        agent_config, trajectory_dir, episode_id, scene_id
+                    )
+                    self.check_replayed_pose()
 
                     # act until the episode is over
                     while not self.env._env.episode_over:
@@ -400,6 +580,8 @@ class HabitatEvaluator(HabitatSimEvaluator):
                             _,
                             info_per_action,
                         ) = self.env.step(action)
+                        self.check_replayed_pose()
+                    self.log_replay_result(logger, episode_id, scene_id)
 
                     # draw and append the map
                     top_down_map = maps.colorize_draw_agent_and_fit_to_height(
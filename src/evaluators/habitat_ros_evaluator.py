@@ -1,12 +1,14 @@
 import os
 import shlex
 from subprocess import Popen
+from threading import Thread
 from typing import List, Tuple, Dict
 import numpy as np
 import rospy
 from ros_x_habitat.srv import EvalEpisode, ResetAgent, GetAgentTime
 from src.constants.constants import NumericalMetrics
 from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
+from src.evaluators.habitat_ros_node_pool import HabitatROSNodePool
 from src.constants.constants import (
     AgentResetCommands,
     EvalEpisodeSpecialIDs,
@@ -15,6 +17,10 @@ from src.constants.constants import (
 )
 from src.utils import utils_logging
 
+# seconds to wait for a service of an env or agent node to come up. Covers
+# loading the scene and the model when the nodes are started
+SERVICE_TIMEOUT = 300.0
+
 
 class HabitatROSEvaluator(HabitatSimEvaluator):
     r"""Class to evaluate Habitat agents in Habitat environments with ROS
@@ -32,6 +38,9 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
         agent_node_name: str = "agent_node",
         sensor_pub_rate: float = 5.0,
         do_not_start_nodes: bool = False,
+        node_pool: HabitatROSNodePool = None,
+        num_envs: int = 1,
+        service_timeout: float = SERVICE_TIMEOUT,
     ) -> None:
         r"""..
 
@@ -47,6 +56,16 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
             readings
         :param do_not_start_nodes: if True then the evaluator would not start
             the env node and the agent node.
+        :param node_pool: if given, lease an env node and an agent node from
+            the pool instead of starting them. The nodes must be returned by
+            calling release() after evaluation
+        :param num_envs: number of environments evaluating episodes
+            concurrently. If greater than 1, the environments are hosted by
+            one multi-env node named `env_node_name`, each with its own
+            shard of the episodes and its own agent node
+        :param service_timeout: seconds to wait for a service of the env or
+            agent nodes to be available before raising `rospy.ROSException`,
+            eg. if a node failed
         """
         super().__init__(
             config_paths=config_paths,
@@ -57,39 +76,69 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
 
         # check if agent input type is valid
         assert input_type in ["rgb", "rgbd", "depth", "blind"]
+        # the node pool only holds single-env nodes
+        assert num_envs >= 1
+        assert num_envs == 1 or node_pool is None
 
         self.node_name = node_name
         self.env_node_name = env_node_name
         self.agent_node_name = agent_node_name
+        self.num_envs = num_envs
+        self.service_timeout = service_timeout
 
-        # parse args for agent node
-        agent_node_args = shlex.split(
-            f"python src/nodes/habitat_agent_node.py --node-name {self.agent_node_name} --input-type {input_type} --model-path {model_path} --sensor-pub-rate {sensor_pub_rate}"
-        )
-
-        # parse args for env node
-        if enable_physics:
-            # physics sim + discrete agent
-            env_node_args = shlex.split(
-                f"python src/nodes/habitat_env_node.py --node-name {self.env_node_name} --task-config {config_paths} --enable-physics-sim --sensor-pub-rate {sensor_pub_rate}"
+        # start an agent node and an env node
+        self.do_not_start_nodes = do_not_start_nodes
+        self.node_pool = node_pool
+        self.node_slot = None
+        if do_not_start_nodes is False and node_pool is None and num_envs > 1:
+            self.start_multi_env_nodes(
+                config_paths, input_type, model_path, enable_physics, sensor_pub_rate
             )
-        else:
-            # discrete sim + discrete agent
-            env_node_args = shlex.split(
-                f"python src/nodes/habitat_env_node.py --node-name {self.env_node_name} --task-config {config_paths} --sensor-pub-rate {sensor_pub_rate}"
+        elif do_not_start_nodes is False and node_pool is None:
+            # parse args for agent node
+            agent_node_args = shlex.split(
+                f"python src/nodes/habitat_agent_node.py --node-name {self.agent_node_name} --input-type {input_type} --model-path {model_path} --sensor-pub-rate {sensor_pub_rate}"
             )
 
-        # start an agent node and an env node
-        self.do_not_start_nodes = do_not_start_nodes
-        if do_not_start_nodes is False:
+            # parse args for env node
+            if enable_physics:
+                # physics sim + discrete agent
+                env_node_args = shlex.split(
+                    f"python src/nodes/habitat_env_node.py --node-name {self.env_node_name} --task-config {config_paths} --enable-physics-sim --sensor-pub-rate {sensor_pub_rate}"
+                )
+            else:
+                # discrete sim + discrete agent
+                env_node_args = shlex.split(
+                    f"python src/nodes/habitat_env_node.py --node-name {self.env_node_name} --task-config {config_paths} --sensor-pub-rate {sensor_pub_rate}"
+                )
+
             self.agent_process = Popen(agent_node_args)
             self.env_process = Popen(env_node_args)
 
         # start the evaluator node
         rospy.init_node(self.node_name)
 
+        # lease nodes from the pool
+        if self.do_not_start_nodes is False and self.node_pool is not None:
+            self.node_slot = self.node_pool.lease(
+                config_paths=config_paths,
+                input_type=input_type,
+                model_path=model_path,
+                enable_physics=enable_physics,
+                sensor_pub_rate=sensor_pub_rate,
+            )
+
         # resolve service names
-        if self.do_not_start_nodes:
+        if self.num_envs > 1:
+            (
+                self.eval_episode_service_names,
+                self.reset_agent_service_names,
+                self.get_agent_time_service_names,
+            ) = self.get_multi_env_service_names()
+            self.eval_episode_service_name = self.eval_episode_service_names[0]
+            self.reset_agent_service_name = self.reset_agent_service_names[0]
+            self.get_agent_time_service_name = self.get_agent_time_service_names[0]
+        elif self.do_not_start_nodes:
             self.eval_episode_service_name = (
                 f"{PACKAGE_NAME}/mock_env_node/{ServiceNames.EVAL_EPISODE}"
             )
@@ -99,6 +148,16 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
             self.get_agent_time_service_name = (
                 f"{PACKAGE_NAME}/mock_agent_node/{ServiceNames.GET_AGENT_TIME}"
             )
+        elif self.node_slot is not None:
+            self.eval_episode_service_name = self.node_slot.get_env_service_name(
+                ServiceNames.EVAL_EPISODE
+            )
+            self.reset_agent_service_name = self.node_slot.get_agent_service_name(
+                ServiceNames.RESET_AGENT
+            )
+            self.get_agent_time_service_name = self.node_slot.get_agent_service_name(
+                ServiceNames.GET_AGENT_TIME
+            )
         else:
             self.eval_episode_service_name = (
                 f"{PACKAGE_NAME}/{self.env_node_name}/{ServiceNames.EVAL_EPISODE}"
@@ -110,6 +169,11 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
                 f"{PACKAGE_NAME}/{self.agent_node_name}/{ServiceNames.GET_AGENT_TIME}"
             )
 
+        if self.num_envs == 1:
+            self.eval_episode_service_names = [self.eval_episode_service_name]
+            self.reset_agent_service_names = [self.reset_agent_service_name]
+            self.get_agent_time_service_names = [self.get_agent_time_service_name]
+
         # set up eval episode service client
         self.eval_episode = rospy.ServiceProxy(
             self.eval_episode_service_name, EvalEpisode
@@ -121,6 +185,86 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
             self.get_agent_time_service_name, GetAgentTime
         )
 
+    def start_multi_env_nodes(
+        self,
+        config_paths: str,
+        input_type: str,
+        model_path: str,
+        enable_physics: bool,
+        sensor_pub_rate: float,
+    ) -> None:
+        r"""
+        Start a multi-env node hosting `self.num_envs` environments, and one
+        agent node in the namespace of each environment.
+        :param config_paths: file to be used for creating the environments
+        :param input_type: agent's input type
+        :param model_path: path to agent's model
+        :param enable_physics: use dynamic simulation or not
+        :param sensor_pub_rate: rate at which each environment publishes
+            sensor readings
+        """
+        from src.nodes.habitat_multi_env_node import HabitatMultiEnvNode
+
+        # reject more environments than scenes before starting any node,
+        # since environments are given shards of whole scenes
+        num_scenes = HabitatMultiEnvNode.get_num_scenes(config_paths)
+        assert (
+            self.num_envs <= num_scenes
+        ), f"{self.num_envs} environments requested, but the dataset has only {num_scenes} scenes"
+
+        env_node_command = f"python src/nodes/habitat_multi_env_node.py --node-name {self.env_node_name} --num-envs {self.num_envs} --task-config {config_paths} --sensor-pub-rate {sensor_pub_rate}"
+        if enable_physics:
+            # physics sim + discrete agent
+            env_node_command += " --enable-physics-sim"
+        self.env_process = Popen(shlex.split(env_node_command))
+
+        self.agent_processes = []
+        for env_id in range(self.num_envs):
+            agent_node_args = shlex.split(
+                f"python src/nodes/habitat_agent_node.py --node-name {self.agent_node_name} --input-type {input_type} --model-path {model_path} --sensor-pub-rate {sensor_pub_rate}"
+            )
+            # run the agent node in the namespace of its environment's
+            # topics
+            process_env = dict(os.environ)
+            process_env["ROS_NAMESPACE"] = HabitatMultiEnvNode.get_env_topic_namespace(
+                env_id
+            )
+            self.agent_processes.append(Popen(agent_node_args, env=process_env))
+
+    def get_multi_env_service_names(
+        self,
+    ) -> Tuple[List[str], List[str], List[str]]:
+        r"""
+        Get the service names of the environments of a multi-env node and
+        of their agent nodes.
+        :returns: lists of 1) eval episode services, 2) reset agent services
+            and 3) get agent time services, one entry per environment
+        """
+        from src.nodes.habitat_multi_env_node import HabitatMultiEnvNode
+
+        eval_episode_service_names = []
+        reset_agent_service_names = []
+        get_agent_time_service_names = []
+        for env_id in range(self.num_envs):
+            env_node_name = HabitatMultiEnvNode.get_env_node_name(
+                self.env_node_name, env_id
+            )
+            namespace = HabitatMultiEnvNode.get_env_topic_namespace(env_id)
+            eval_episode_service_names.append(
+                f"{PACKAGE_NAME}/{env_node_name}/{ServiceNames.EVAL_EPISODE}"
+            )
+            reset_agent_service_names.append(
+                f"{namespace}/{PACKAGE_NAME}/{self.agent_node_name}/{ServiceNames.RESET_AGENT}"
+            )
+            get_agent_time_service_names.append(
+                f"{namespace}/{PACKAGE_NAME}/{self.agent_node_name}/{ServiceNames.GET_AGENT_TIME}"
+            )
+        return (
+            eval_episode_service_names,
+            reset_agent_service_names,
+            get_agent_time_service_names,
+        )
+
     def evaluate(
         self,
         episode_id_last: str = "-1",
@@ -130,7 +274,63 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
         *args,
         **kwargs,
     ) -> Dict[str, Dict[str, float]]:
-        logger = utils_logging.setup_logger(__name__)
+        if self.num_envs == 1:
+            return self.evaluate_env(
+                0, episode_id_last, scene_id_last, log_dir, agent_seed
+            )
+
+        # each environment evaluates its own shard from the beginning
+        assert episode_id_last == EvalEpisodeSpecialIDs.REQUEST_NEXT
+        dicts_of_metrics = [None] * self.num_envs
+
+        def evaluate_shard(env_id):
+            dicts_of_metrics[env_id] = self.evaluate_env(
+                env_id, episode_id_last, scene_id_last, log_dir, agent_seed
+            )
+
+        threads = [
+            Thread(target=evaluate_shard, args=(env_id,))
+            for env_id in range(self.num_envs)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        dict_of_metrics = {}
+        for dict_of_metrics_per_env in dicts_of_metrics:
+            assert dict_of_metrics_per_env is not None, "An environment failed"
+            dict_of_metrics.update(dict_of_metrics_per_env)
+        return dict_of_metrics
+
+    def evaluate_env(
+        self,
+        env_id: int,
+        episode_id_last: str,
+        scene_id_last: str,
+        log_dir: str,
+        agent_seed: int,
+    ) -> Dict[str, Dict[str, float]]:
+        r"""
+        Evaluate the episodes of one environment.
+        :param env_id: index of the environment
+        :param episode_id_last: ID of the last episode evaluated; if
+            REQUEST_NEXT, start from the environment's next episode
+        :param scene_id_last: scene ID of the last episode evaluated
+        :param log_dir: directory to save per-episode logs
+        :param agent_seed: seed of the agent
+        :returns: metrics of each episode evaluated
+        """
+        # service clients of this environment. Each thread uses its own
+        eval_episode_service_name = self.eval_episode_service_names[env_id]
+        reset_agent_service_name = self.reset_agent_service_names[env_id]
+        get_agent_time_service_name = self.get_agent_time_service_names[env_id]
+        eval_episode = rospy.ServiceProxy(eval_episode_service_name, EvalEpisode)
+        reset_agent = rospy.ServiceProxy(reset_agent_service_name, ResetAgent)
+        get_agent_time = rospy.ServiceProxy(get_agent_time_service_name, GetAgentTime)
+
+        # one logger per environment, since environments log concurrently
+        logger = utils_logging.setup_logger(f"{__name__}-env={env_id}")
 
         count_episodes = 0
         dict_of_metrics = {}
@@ -139,24 +339,26 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
         # evaluated
         while not rospy.is_shutdown():
             # reset agent
-            rospy.wait_for_service(self.reset_agent_service_name)
+            rospy.wait_for_service(reset_agent_service_name, timeout=self.service_timeout)
             try:
-                resp = self.reset_agent(int(AgentResetCommands.RESET), agent_seed)
+                resp = reset_agent(
+                    int(AgentResetCommands.RESET), agent_seed, self.model_path
+                )
                 assert resp.done
             except rospy.ServiceException:
                 logger.info("Failed to reset agent!")
 
             # evaluate one episode and get metrics from the env node
-            rospy.wait_for_service(self.eval_episode_service_name)
+            rospy.wait_for_service(eval_episode_service_name, timeout=self.service_timeout)
             resp = None
             try:
                 # request env node to evaluate an episode
                 if count_episodes == 0:
                     # jump to the first episode we want to evaluate
-                    resp = self.eval_episode(episode_id_last, scene_id_last)
+                    resp = eval_episode(episode_id_last, scene_id_last)
                 else:
                     # evaluate the next episode
-                    resp = self.eval_episode(EvalEpisodeSpecialIDs.REQUEST_NEXT, "")
+                    resp = eval_episode(EvalEpisodeSpecialIDs.REQUEST_NEXT, "")
             except rospy.ServiceException:
                 logger.info(f"Evaluation call failed at {count_episodes}-th episode")
                 raise rospy.ServiceException
@@ -177,9 +379,9 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
                 }
 
                 # get the agent time of this episode
-                rospy.wait_for_service(self.get_agent_time_service_name)
+                rospy.wait_for_service(get_agent_time_service_name, timeout=self.service_timeout)
                 try:
-                    agent_time_resp = self.get_agent_time()
+                    agent_time_resp = get_agent_time()
                     per_episode_metrics[
                         NumericalMetrics.AGENT_TIME
                     ] = agent_time_resp.agent_time
@@ -218,28 +420,46 @@ class HabitatROSEvaluator(HabitatSimEvaluator):
 
         return dict_of_metrics
 
+    def release(self):
+        r"""
+        Return the nodes leased from the node pool. Use instead of
+        shutdown_env_node() and shutdown_agent_node() if the evaluator
+        was given a node pool.
+        """
+        assert self.node_slot is not None
+        self.node_pool.release(self.node_slot)
+        self.node_slot = None
+
     def shutdown_env_node(self):
         r"""
-        Signal the env node to shutdown.
+        Signal the env node to shutdown. A multi-env node shuts down once
+        each of its environments is signalled.
         """
-        rospy.wait_for_service(self.eval_episode_service_name)
-        try:
-            resp = self.eval_episode(EvalEpisodeSpecialIDs.REQUEST_SHUTDOWN, "")
-        except rospy.ServiceException:
-            print("Shutting down env node failed")
-            raise rospy.ServiceException
+        for eval_episode_service_name in self.eval_episode_service_names:
+            rospy.wait_for_service(eval_episode_service_name, timeout=self.service_timeout)
+            try:
+                eval_episode = rospy.ServiceProxy(
+                    eval_episode_service_name, EvalEpisode
+                )
+                resp = eval_episode(EvalEpisodeSpecialIDs.REQUEST_SHUTDOWN, "")
+            except rospy.ServiceException:
+                print("Shutting down env node failed")
+                raise rospy.ServiceException
 
     def shutdown_agent_node(self):
         r"""
-        Signal the agent node to shutdown.
+        Signal the agent node, or the agent node of each environment, to
+        shutdown.
         """
-        rospy.wait_for_service(self.reset_agent_service_name)
-        try:
-            resp = self.reset_agent(int(AgentResetCommands.SHUTDOWN), 0)
-            assert resp.done
-        except rospy.ServiceException:
-            print("Failed to shut down agent!")
-            raise rospy.ServiceException
+        for reset_agent_service_name in self.reset_agent_service_names:
+            rospy.wait_for_service(reset_agent_service_name, timeout=self.service_timeout)
+            try:
+                reset_agent = rospy.ServiceProxy(reset_agent_service_name, ResetAgent)
+                resp = reset_agent(int(AgentResetCommands.SHUTDOWN), 0, "")
+                assert resp.done
+            except rospy.ServiceException:
+                print("Failed to shut down agent!")
+                raise rospy.ServiceException
 
     def evaluate_and_get_maps(
         self,
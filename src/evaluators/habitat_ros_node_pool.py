@@ -0,0 +1,262 @@
+import os
+import shlex
+from subprocess import Popen
+from threading import Lock
+from typing import List
+
+import rospy
+from ros_x_habitat.srv import EvalEpisode, ResetAgent
+from src.constants.constants import (
+    AgentResetCommands,
+    EvalEpisodeSpecialIDs,
+    PACKAGE_NAME,
+    ServiceNames,
+)
+
+
+class HabitatROSNodeSlot:
+    r"""
+    An env node and an agent node running in their own ROS namespace.
+    """
+
+    def __init__(
+        self, namespace: str, env_node_name: str, agent_node_name: str
+    ) -> None:
+        r"""
+        :param namespace: ROS namespace of the node pair
+        :param env_node_name: name of the env node
+        :param agent_node_name: name of the agent node
+        """
+        self.namespace = namespace
+        self.env_node_name = env_node_name
+        self.agent_node_name = agent_node_name
+
+        # processes and the settings they were started with
+        self.env_process = None
+        self.agent_process = None
+        self.config_paths = None
+        self.enable_physics = None
+        self.input_type = None
+        self.model_path = None
+        self.sensor_pub_rate = None
+
+        # True if leased by an evaluator
+        self.leased = False
+
+    def get_env_service_name(self, service_name: ServiceNames) -> str:
+        return f"{self.namespace}/{PACKAGE_NAME}/{self.env_node_name}/{service_name}"
+
+    def get_agent_service_name(self, service_name: ServiceNames) -> str:
+        return (
+            f"{self.namespace}/{PACKAGE_NAME}/{self.agent_node_name}/{service_name}"
+        )
+
+
+class HabitatROSNodePool:
+    r"""
+    Pool of long-lived env/agent node pairs which HabitatROSEvaluator's
+    lease and return, so back-to-back experiments do not pay the nodes'
+    startup costs again. Each pair runs in its own ROS namespace.
+
+    An idle pair is reused as-is if its settings match the lease request.
+    If only the agent's settings match, the agent node is kept and the env
+    node is restarted with the new config. Otherwise a new pair is started.
+    Nodes are started and stopped outside the pool's lock, so a slow node
+    does not hold up other callers.
+    """
+
+    def __init__(
+        self,
+        env_node_name: str = "env_node",
+        agent_node_name: str = "agent_node",
+        namespace_prefix: str = "habitat_ros_node_pool",
+    ) -> None:
+        r"""
+        :param env_node_name: name of the env nodes
+        :param agent_node_name: name of the agent nodes
+        :param namespace_prefix: prefix of the namespaces of node pairs
+        """
+        self.env_node_name = env_node_name
+        self.agent_node_name = agent_node_name
+        self.namespace_prefix = namespace_prefix
+
+        # lock guarding self.slots, the leased flags of slots and
+        # self.num_slots_created
+        self.lock = Lock()
+        with self.lock:
+            self.slots: List[HabitatROSNodeSlot] = []
+            self.num_slots_created = 0
+
+    def lease(
+        self,
+        config_paths: str,
+        input_type: str,
+        model_path: str,
+        enable_physics: bool = False,
+        sensor_pub_rate: float = 5.0,
+    ) -> HabitatROSNodeSlot:
+        r"""
+        Lease a node pair running the given settings. Requires the caller to
+        have initialized a ROS node.
+        :param config_paths: file to be used for creating the environment
+        :param input_type: agent's input type, options: "rgb", "rgbd",
+            "depth", "blind"
+        :param model_path: path to agent's model
+        :param enable_physics: use dynamic simulation or not in the Habitat
+            environment
+        :param sensor_pub_rate: rate at which the env node publishes sensor
+            readings
+        :returns: the leased node pair
+        """
+        # pick and mark a slot under the lock; start nodes after releasing
+        # it
+        with self.lock:
+            idle_slots = [slot for slot in self.slots if not slot.leased]
+            reused_slot = None
+            restart_env_node = False
+
+            # reuse a node pair with matching settings
+            for slot in idle_slots:
+                if (
+                    slot.input_type == input_type
+                    and slot.model_path == model_path
+                    and slot.sensor_pub_rate == sensor_pub_rate
+                    and slot.config_paths == config_paths
+                    and slot.enable_physics == enable_physics
+                ):
+                    reused_slot = slot
+                    break
+
+            # reuse the agent node of a pair, but restart its env node
+            if reused_slot is None:
+                for slot in idle_slots:
+                    if (
+                        slot.input_type == input_type
+                        and slot.model_path == model_path
+                        and slot.sensor_pub_rate == sensor_pub_rate
+                    ):
+                        reused_slot = slot
+                        restart_env_node = True
+                        break
+
+            if reused_slot is not None:
+                slot = reused_slot
+            else:
+                # reserve a new node pair
+                slot = HabitatROSNodeSlot(
+                    namespace=f"{self.namespace_prefix}_{self.num_slots_created}",
+                    env_node_name=self.env_node_name,
+                    agent_node_name=self.agent_node_name,
+                )
+                self.num_slots_created += 1
+                self.slots.append(slot)
+            slot.leased = True
+
+        try:
+            if reused_slot is None:
+                self._start_agent_node(slot, input_type, model_path, sensor_pub_rate)
+                self._start_env_node(
+                    slot, config_paths, enable_physics, sensor_pub_rate
+                )
+            elif restart_env_node:
+                self._shutdown_env_node(slot)
+                self._start_env_node(
+                    slot, config_paths, enable_physics, sensor_pub_rate
+                )
+        except Exception:
+            # drop the node pair, whose nodes are in an unknown state
+            with self.lock:
+                if slot in self.slots:
+                    self.slots.remove(slot)
+            raise
+        return slot
+
+    def release(self, slot: HabitatROSNodeSlot) -> None:
+        r"""
+        Return a leased node pair to the pool.
+        :param slot: the node pair
+        """
+        with self.lock:
+            assert slot.leased
+            slot.leased = False
+
+    def shutdown(self) -> None:
+        r"""
+        Shut down all node pairs in the pool.
+        """
+        with self.lock:
+            slots = self.slots
+            self.slots = []
+        for slot in slots:
+            self._shutdown_env_node(slot)
+            self._shutdown_agent_node(slot)
+
+    def _make_process_env(self, slot: HabitatROSNodeSlot):
+        process_env = dict(os.environ)
+        process_env["ROS_NAMESPACE"] = slot.namespace
+        return process_env
+
+    def _start_agent_node(
+        self,
+        slot: HabitatROSNodeSlot,
+        input_type: str,
+        model_path: str,
+        sensor_pub_rate: float,
+    ) -> None:
+        agent_node_args = shlex.split(
+            f"python src/nodes/habitat_agent_node.py --node-name {slot.agent_node_name} --input-type {input_type} --model-path {model_path} --sensor-pub-rate {sensor_pub_rate}"
+        )
+        slot.agent_process = Popen(agent_node_args, env=self._make_process_env(slot))
+        slot.input_type = input_type
+        slot.model_path = model_path
+        slot.sensor_pub_rate = sensor_pub_rate
+
+    def _start_env_node(
+        self,
+        slot: HabitatROSNodeSlot,
+        config_paths: str,
+        enable_physics: bool,
+        sensor_pub_rate: float,
+    ) -> None:
+        if enable_physics:
+            # physics sim + discrete agent
+            env_node_args = shlex.split(
+                f"python src/nodes/habitat_env_node.py --node-name {slot.env_node_name} --task-config {config_paths} --enable-physics-sim --sensor-pub-rate {sensor_pub_rate}"
+            )
+        else:
+            # discrete sim + discrete agent
+            env_node_args = shlex.split(
+                f"python src/nodes/habitat_env_node.py --node-name {slot.env_node_name} --task-config {config_paths} --sensor-pub-rate {sensor_pub_rate}"
+            )
+        slot.env_process = Popen(env_node_args, env=self._make_process_env(slot))
+        slot.config_paths = config_paths
+        slot.enable_physics = enable_physics
+
+    def _shutdown_env_node(self, slot: HabitatROSNodeSlot) -> None:
+        eval_episode_service_name = slot.get_env_service_name(
+            ServiceNames.EVAL_EPISODE
+        )
+        rospy.wait_for_service(eval_episode_service_name)
+        try:
+            eval_episode = rospy.ServiceProxy(eval_episode_service_name, EvalEpisode)
+            eval_episode(EvalEpisodeSpecialIDs.REQUEST_SHUTDOWN, "")
+        except rospy.ServiceException:
+            print(f"Shutting down env node in {slot.namespace} failed")
+            raise rospy.ServiceException
+        slot.env_process.wait()
+        slot.env_process = None
+
+    def _shutdown_agent_node(self, slot: HabitatROSNodeSlot) -> None:
+        reset_agent_service_name = slot.get_agent_service_name(
+            ServiceNames.RESET_AGENT
+        )
+        rospy.wait_for_service(reset_agent_service_name)
+        try:
+            reset_agent = rospy.ServiceProxy(reset_agent_service_name, ResetAgent)
+            resp = reset_agent(int(AgentResetCommands.SHUTDOWN), 0, "")
+            assert resp.done
+        except rospy.ServiceException:
+            print(f"Failed to shut down agent in {slot.namespace}!")
+            raise rospy.ServiceException
+        slot.agent_process.wait()
+        slot.agent_process = None
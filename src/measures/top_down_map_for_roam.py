@@ -13,8 +13,9 @@ from habitat.tasks.utils import cartesian_to_polar
 from habitat.utils.geometry_utils import (
     quaternion_rotate_vector,
 )
-from habitat.utils.visualizations import fog_of_war, maps
+from habitat.utils.visualizations import maps
 from habitat.tasks.nav.nav import NavigationEpisode, MAP_THICKNESS_SCALAR
+from src.utils.utils_fog_of_war import get_ray_table
 
 try:
     from habitat.sims.habitat_simulator.habitat_simulator import HabitatSim
@@ -54,6 +55,9 @@ class TopDownMapForRoam(Measure):
         self._previous_xy_location: Optional[Tuple[int, int]] = None
         self._top_down_map: Optional[np.ndarray] = None
         self._shortest_path_points: Optional[List[Tuple[int, int]]] = None
+        # (row_min, row_max, col_min, col_max) of the map and fog-of-war
+        # mask changed since the last update
+        self._dirty_region: Optional[Tuple[int, int, int, int]] = None
         self.line_thickness = int(
             np.round(self._map_resolution * 2 / MAP_THICKNESS_SCALAR)
         )
@@ -74,8 +78,14 @@ class TopDownMapForRoam(Measure):
 
         if self._config.FOG_OF_WAR.DRAW:
             self._fog_of_war_mask = np.zeros_like(top_down_map)
+            # the map scale depends on the scene
+            self._fog_of_war_ray_table = get_ray_table(
+                self._config.FOG_OF_WAR.VISIBILITY_DIST
+                / maps.calculate_meters_per_pixel(self._map_resolution, sim=self._sim)
+            )
         else:
             self._fog_of_war_mask = None
+            self._fog_of_war_ray_table = None
 
         return top_down_map
 
@@ -182,10 +192,33 @@ class TopDownMapForRoam(Measure):
             ref_floor_height = self._sim.get_agent(0).state.position[1]
         return ref_floor_height < height < ref_floor_height + ceiling_height
 
+    def _add_dirty_region(self, region):
+        if region is None:
+            return
+        height, width = self._top_down_map.shape[0:2]
+        row_min = max(region[0], 0)
+        row_max = min(region[1], height)
+        col_min = max(region[2], 0)
+        col_max = min(region[3], width)
+        if row_min >= row_max or col_min >= col_max:
+            return
+        if self._dirty_region is not None:
+            row_min = min(row_min, self._dirty_region[0])
+            row_max = max(row_max, self._dirty_region[1])
+            col_min = min(col_min, self._dirty_region[2])
+            col_max = max(col_max, self._dirty_region[3])
+        self._dirty_region = (row_min, row_max, col_min, col_max)
+
     def reset_metric(self, episode, *args: Any, **kwargs: Any):
         self._step_count = 0
         self._metric = None
         self._top_down_map = self.get_original_map()
+        self._dirty_region = (
+            0,
+            self._top_down_map.shape[0],
+            0,
+            self._top_down_map.shape[1],
+        )
         agent_position = self._sim.get_agent_state().position
         a_x, a_y = maps.to_grid(
             agent_position[2],
@@ -195,7 +228,7 @@ class TopDownMapForRoam(Measure):
         )
         self._previous_xy_location = (a_y, a_x)
 
-        self.update_fog_of_war_mask(np.array([a_x, a_y]))
+        self.update_fog_of_war_mask(np.array([a_x, a_y]), self.get_polar_angle())
 
         # draw source and target parts last to avoid overlap
         self._draw_goals_view_points(episode)
@@ -209,19 +242,25 @@ class TopDownMapForRoam(Measure):
 
     def update_metric(self, episode, action, *args: Any, **kwargs: Any):
         self._step_count += 1
+        # read the agent state and compute the heading once per step
+        agent_state = self._sim.get_agent_state()
+        agent_angle = self.get_polar_angle(agent_state)
         house_map, map_agent_x, map_agent_y = self.update_map(
-            self._sim.get_agent_state().position
+            agent_state.position, agent_angle
         )
 
         self._metric = {
             "map": house_map,
             "fog_of_war_mask": self._fog_of_war_mask,
             "agent_map_coord": (map_agent_x, map_agent_y),
-            "agent_angle": self.get_polar_angle(),
+            "agent_angle": agent_angle,
+            "dirty_region": self._dirty_region,
         }
+        self._dirty_region = None
 
-    def get_polar_angle(self):
-        agent_state = self._sim.get_agent_state()
+    def get_polar_angle(self, agent_state: Optional[AgentState] = None):
+        if agent_state is None:
+            agent_state = self._sim.get_agent_state()
         # quaternion is in x, y, z, w format
         ref_rotation = agent_state.rotation
 
@@ -233,7 +272,7 @@ class TopDownMapForRoam(Measure):
         z_neg_z_flip = np.pi
         return np.array(phi) + z_neg_z_flip
 
-    def update_map(self, agent_position):
+    def update_map(self, agent_position, agent_angle=None):
         a_x, a_y = maps.to_grid(
             agent_position[2],
             agent_position[0],
@@ -263,20 +302,33 @@ class TopDownMapForRoam(Measure):
                 color,
                 thickness=thickness,
             )
+            prev_y, prev_x = self._previous_xy_location
+            self._add_dirty_region(
+                (
+                    min(prev_x, a_x) - thickness,
+                    max(prev_x, a_x) + thickness + 1,
+                    min(prev_y, a_y) - thickness,
+                    max(prev_y, a_y) + thickness + 1,
+                )
+            )
 
-        self.update_fog_of_war_mask(np.array([a_x, a_y]))
+        if agent_angle is None:
+            agent_angle = self.get_polar_angle()
+        self.update_fog_of_war_mask(np.array([a_x, a_y]), agent_angle)
 
         self._previous_xy_location = (a_y, a_x)
         return self._top_down_map, a_x, a_y
 
-    def update_fog_of_war_mask(self, agent_position):
+    def update_fog_of_war_mask(self, agent_position, agent_angle):
         if self._config.FOG_OF_WAR.DRAW:
-            self._fog_of_war_mask = fog_of_war.reveal_fog_of_war(
+            # only the field-of-view wedge around the agent is raycast, and
+            # the mask is updated in place
+            revealed_region = self._fog_of_war_ray_table.reveal(
                 self._top_down_map,
                 self._fog_of_war_mask,
                 agent_position,
-                self.get_polar_angle(),
+                agent_angle,
                 fov=self._config.FOG_OF_WAR.FOV,
-                max_line_len=self._config.FOG_OF_WAR.VISIBILITY_DIST
-                / maps.calculate_meters_per_pixel(self._map_resolution, sim=self._sim),
+                invalid_value=maps.MAP_INVALID_POINT,
             )
+            self._add_dirty_region(revealed_region)
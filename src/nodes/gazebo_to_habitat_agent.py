@@ -3,7 +3,6 @@ import argparse
 import numpy as np
 import rospy
 import message_filters
-from message_filters import TimeSynchronizer
 from ros_x_habitat.msg import PointGoalWithGPSCompass, DepthImage
 from sensor_msgs.msg import Image
 from cv_bridge import CvBridge
@@ -12,14 +11,11 @@ from PIL import Image as PILImage
 from nav_msgs.msg import Odometry
 from std_msgs.msg import Header, Int16
 from geometry_msgs.msg import PoseStamped, Pose, Point
-import quaternion
-from habitat.tasks.utils import cartesian_to_polar
-from tf.transformations import euler_from_quaternion, rotation_matrix
 from visualization_msgs.msg import Marker, MarkerArray
 from threading import Lock
 from ros_x_habitat.srv import GetAgentPose
 from src.constants.constants import PACKAGE_NAME, ServiceNames
-from src.utils import utils_logging
+from src.utils import utils_logging, utils_geometry, utils_sync
 
 class GazeboToHabitatAgent:
     r"""
@@ -36,6 +32,10 @@ class GazeboToHabitatAgent:
         move_base_goal_topic_name: str,
         fetch_goal_from_move_base: bool=False,
         final_pointgoal_pos: np.ndarray = np.array([0.0, 0.0, 0.0]),
+        max_obs_staleness: float = 0.5,
+        use_approx_sync: bool = False,
+        sync_slop: float = 0.1,
+        sync_queue_size: int = None,
     ):
         r"""
         Instantiates the Gazebo->Habitat agent bridge.
@@ -53,6 +53,18 @@ class GazeboToHabitatAgent:
         :param final_pointgoal_pos: goal location of navigation, measured
             in the world frame. If `fetch_goal_from_move_base` is True, this
             position is ignored
+        :param max_obs_staleness: max age, in seconds since their header
+            stamp, of the latest synchronized observations for them to be
+            published as soon as
+            the last action is done. Older observations are skipped in
+            favour of the next set from Gazebo
+        :param use_approx_sync: if true, match RGB, depth and odometry
+            messages whose stamps are up to `sync_slop` seconds apart;
+            otherwise require identical stamps
+        :param sync_slop: max stamp difference of approximately synchronized
+            messages, in seconds
+        :param sync_queue_size: number of messages queued per Gazebo topic
+            for synchronization. Defaults to the subscriber queue size
         """
         # initialize the node
         self.node_name = node_name
@@ -62,6 +74,8 @@ class GazeboToHabitatAgent:
         # TODO: make them configurable by constructor argument
         self.sub_queue_size = 1
         self.pub_queue_size = 1
+        if sync_queue_size is None:
+            sync_queue_size = self.sub_queue_size
 
         # set up logger
         self.logger = utils_logging.setup_logger(self.node_name)
@@ -77,6 +91,14 @@ class GazeboToHabitatAgent:
             self.count_steps = 0
             self.last_action_done = True
 
+        # latest synchronized (RGB, depth, odometry) messages and the time
+        # they were captured. The sensor callback only swaps the slot; the
+        # messages are converted once they are about to be published
+        self.max_obs_staleness = max_obs_staleness
+        self.latest_obs_lock = Lock()
+        with self.latest_obs_lock:
+            self.latest_obs = None
+
         # current pose of the agent
         self.curr_pose_lock = Lock()
         with self.curr_pose_lock:
@@ -114,11 +136,14 @@ class GazeboToHabitatAgent:
         self.sub_rgb = message_filters.Subscriber(gazebo_rgb_topic_name, Image)
         self.sub_depth = message_filters.Subscriber(gazebo_depth_topic_name, Image)
         self.sub_odom = message_filters.Subscriber(gazebo_odom_topic_name, Odometry)
-        self.ts = TimeSynchronizer(
+        self.ts, self.sync_stats = utils_sync.make_synchronizer(
             [self.sub_rgb, self.sub_depth, self.sub_odom],
-            queue_size=self.sub_queue_size,
+            self.callback_obs_from_gazebo,
+            queue_size=sync_queue_size,
+            use_approx_sync=use_approx_sync,
+            slop=sync_slop,
         )
-        self.ts.registerCallback(self.callback_obs_from_gazebo)
+        rospy.on_shutdown(self.on_exit_log_sync_stats)
 
         # subscribe from `last_action_done/`
         self.sub_last_action_done = rospy.Subscriber(
@@ -254,22 +279,9 @@ class GazeboToHabitatAgent:
         already acquired in the calling thread
         :return tuple 1) distance-to-goal, 2) angle-to-goal
         """
-        # get the yaw angle
-        _, _, yaw = euler_from_quaternion(self.curr_rotation)
-        # build local->world matrix
-        local_to_world = rotation_matrix(yaw, (0, 0, 1))
-        # build world->local matrix
-        world_to_local = np.linalg.inv(local_to_world)
-        # compute direction vector in world frame
-        direction_vector_world = np.zeros((4, ))
-        direction_vector_world[0:3] = self.final_pointgoal_pos - self.curr_pos
-        direction_vector_world[-1] = 0
-        # compute direction vector in local frame
-        direction_vector_local = np.matmul(world_to_local, direction_vector_world)[0:3]
-        rho, phi = cartesian_to_polar(
-            direction_vector_local[0], direction_vector_local[1]
+        return utils_geometry.compute_pointgoal(
+            self.curr_pos, self.curr_rotation, self.final_pointgoal_pos
         )
-        return rho, phi
     
     def rgb_msg_to_img(self, rgb_msg, dim):
         r"""
@@ -344,97 +356,118 @@ class GazeboToHabitatAgent:
     def callback_obs_from_gazebo(self, rgb_msg, depth_msg, odom_msg):
         r"""
         Upon receiving a set of RGBD observations and odometry data from
-        Gazebo, publishes
+        Gazebo, keep them as the latest set and try to publish them.
+        Older sets not yet published are dropped.
+        :param rgb_msg: RGB sensor reading from Gazebo
+        :param depth_msg: Depth sensor reading from Gazebo
+        :param odom_msg: Odometry data from Gazebo
+        """
+        # the age of a set counts from its capture, so time spent in
+        # transport queues counts too; unstamped sets count from receipt
+        if rgb_msg.header.stamp.is_zero():
+            t_captured = rospy.get_time()
+        else:
+            t_captured = rgb_msg.header.stamp.to_sec()
+        with self.latest_obs_lock:
+            self.latest_obs = (rgb_msg, depth_msg, odom_msg, t_captured)
+        self.publish_latest_obs()
+
+    def publish_latest_obs(self):
+        r"""
+        Publish the latest set of observations from Gazebo:
             1) the observations to `rgb/` and `depth/` topic for a Habitat
             agent to read;
             2) current GPS+Compass data.
         Only publishes iff all following conditions are satisfied:
             1) on reset or after the last action has been completed,
             2) pointogoal is set,
-            3) pointgoal not reached yet.
-        :param rgb_msg: RGB sensor reading from Gazebo
-        :param depth_msg: Depth sensor reading from Gazebo
-        :param odom_msg: Odometry data from Gazebo
+            3) pointgoal not reached yet,
+            4) the latest set is not older than `self.max_obs_staleness`
+            and has not been published before.
+        Requires none of the bridge's locks to be held by the calling
+        thread. Message conversion happens after all locks are released.
         """
         with self.last_action_lock:
+            if not self.last_action_done:
+                return
             with self.pointgoal_reached_lock:
-                with self.final_pointgoal_lock:
-                    if (
-                        self.last_action_done
-                        and self.pointgoal_set
-                        and not self.pointgoal_reached
-                        and not (self.count_steps >= self.max_steps)
-                    ):
-                        # publish a new set of observations if last action's done,
-                        # pointgoal's set and navigation not completed yet
-                        # get a header object and assign time
-                        h = Header()
-                        h.stamp = rospy.Time.now()
-                        # create RGB message for Habitat
-                        rgb_img = self.rgb_msg_to_img(rgb_msg, 256)
-                        rgb_msg_for_hab = CvBridge().cv2_to_imgmsg(rgb_img, encoding="rgb8")
-                        rgb_msg_for_hab.header = h
-                        # create depth message for Habitat
-                        depth_img = self.depth_msg_to_img(depth_msg, 256)
-                        depth_msg_for_hab = DepthImage()
-                        depth_msg_for_hab.height, depth_msg_for_hab.width = depth_img.shape
-                        depth_msg_for_hab.step = depth_msg_for_hab.width
-                        depth_msg_for_hab.data = np.ravel(depth_img)
-                        depth_msg_for_hab.header = h
-                        with self.curr_pose_lock:
-                            # update pose and compute current GPS+Compass info
-                            self.update_pose(odom_msg)
-                            distance_to_goal, angle_to_goal = self.compute_pointgoal()
-                        ptgoal_gps_msg = PointGoalWithGPSCompass()
-                        ptgoal_gps_msg.distance_to_goal = distance_to_goal
-                        ptgoal_gps_msg.angle_to_goal = angle_to_goal
-                        ptgoal_gps_msg.header = h
-                        # publish observations
-                        self.pub_rgb.publish(rgb_msg_for_hab)
-                        self.pub_depth.publish(depth_msg_for_hab)
-                        self.pub_pointgoal_with_gps_compass.publish(ptgoal_gps_msg)
-                        # block further sensor callbacks
-                        self.last_action_done = False
+                pointgoal_reached = self.pointgoal_reached
+            with self.final_pointgoal_lock:
+                if not self.pointgoal_set:
+                    return
+                final_pointgoal_pos = self.final_pointgoal_pos
+
+            if pointgoal_reached or self.count_steps >= self.max_steps:
+                # if the navigation is completed, publish data
+                # for visualization
+                self.logger.info(f"navigation completed after {self.count_steps} steps")
+                with self.curr_pose_lock:
+                    self.logger.info(f"final agent position: {self.curr_pos}")
+                    self.add_pos_to_marker_array(
+                        "goal",
+                        final_pointgoal_pos
+                    )
+                    self.publish_marker_array()
+                self.last_action_done = False
+                return
+
+            # take the latest observations out of the slot, so they are
+            # published at most once
+            with self.latest_obs_lock:
+                if self.latest_obs is None:
+                    return
+                rgb_msg, depth_msg, odom_msg, t_captured = self.latest_obs
+                self.latest_obs = None
+            if rospy.get_time() - t_captured > self.max_obs_staleness:
+                # too old; wait for the next set from Gazebo
+                return
+
+            # block further publishing until the agent's next action is done
+            self.last_action_done = False
+
+            # update pose, compute current GPS+Compass info and add the
+            # current position to the marker array for visualization
+            with self.curr_pose_lock:
+                self.update_pose(odom_msg)
+                distance_to_goal, angle_to_goal = utils_geometry.compute_pointgoal(
+                    self.curr_pos, self.curr_rotation, final_pointgoal_pos
+                )
+                if self.count_steps == 0:
+                    self.logger.info(f"initial agent position: {self.curr_pos}")
+                    self.add_pos_to_marker_array(
+                        "init",
+                        self.curr_pos
+                    )
+                else:
+                    self.add_pos_to_marker_array(
+                        "curr",
+                        self.prev_pos,
+                        self.curr_pos,
+                        self.curr_rotation
+                    )
 
-                        # add the current position to the marker array for
-                        # visualization
-                        with self.curr_pose_lock:
-                            if self.count_steps == 0:
-                                self.logger.info(f"initial agent position: {self.curr_pos}")
-                                self.add_pos_to_marker_array(
-                                    "init",
-                                    self.curr_pos
-                                )
-                            else:
-                                self.add_pos_to_marker_array(
-                                    "curr",
-                                    self.prev_pos,
-                                    self.curr_pos,
-                                    self.curr_rotation
-                                )
-                    
-                    elif(
-                        self.last_action_done
-                        and self.pointgoal_set
-                        and (
-                            self.pointgoal_reached
-                            or self.count_steps >= self.max_steps
-                        )
-                    ):
-                        # if the navigation is completed, publish data
-                        # for visualization
-                        self.logger.info(f"navigation completed after {self.count_steps} steps")
-                        with self.curr_pose_lock:
-                            self.logger.info(f"final agent position: {self.curr_pos}")
-                            self.add_pos_to_marker_array(
-                                "goal",
-                                self.final_pointgoal_pos
-                            )
-                            self.publish_marker_array()
-                        self.last_action_done = False
-                    else:
-                        # otherwise, drop the observations
-                        return
+        # get a header object and assign time
+        h = Header()
+        h.stamp = rospy.Time.now()
+        # create RGB message for Habitat
+        rgb_img = self.rgb_msg_to_img(rgb_msg, 256)
+        rgb_msg_for_hab = CvBridge().cv2_to_imgmsg(rgb_img, encoding="rgb8")
+        rgb_msg_for_hab.header = h
+        # create depth message for Habitat
+        depth_img = self.depth_msg_to_img(depth_msg, 256)
+        depth_msg_for_hab = DepthImage()
+        depth_msg_for_hab.height, depth_msg_for_hab.width = depth_img.shape
+        depth_msg_for_hab.step = depth_msg_for_hab.width
+        depth_msg_for_hab.data = np.ravel(depth_img)
+        depth_msg_for_hab.header = h
+        ptgoal_gps_msg = PointGoalWithGPSCompass()
+        ptgoal_gps_msg.distance_to_goal = distance_to_goal
+        ptgoal_gps_msg.angle_to_goal = angle_to_goal
+        ptgoal_gps_msg.header = h
+        # publish observations
+        self.pub_rgb.publish(rgb_msg_for_hab)
+        self.pub_depth.publish(depth_msg_for_hab)
+        self.pub_pointgoal_with_gps_compass.publish(ptgoal_gps_msg)
 
     def callback_register_goal(self, goal_msg):
         r"""
@@ -464,6 +497,10 @@ class GazeboToHabitatAgent:
             # increment step counter and signal last action being done
             self.count_steps += 1
             self.last_action_done = True
+
+        # publish the latest observations right away instead of waiting
+        # for the next set from Gazebo
+        self.publish_latest_obs()
     
     def get_agent_pose(self, request):
         r"""
@@ -482,6 +519,13 @@ class GazeboToHabitatAgent:
             pose.orientation.w = self.curr_rotation[3]
         return pose
     
+    def on_exit_log_sync_stats(self):
+        r"""
+        Log sensor synchronization statistics upon shutdown.
+        """
+        for stat_name, stat_value in self.sync_stats.get_stats().items():
+            self.logger.info(f"{stat_name},{stat_value}")
+
     def spin_until_shutdown(self):
         r"""
         Let the node spin until shutdown.
@@ -527,6 +571,26 @@ def main():
         nargs="+",
         type=float
     )
+    parser.add_argument(
+        "--max-obs-staleness",
+        default=0.5,
+        type=float
+    )
+    parser.add_argument(
+        "--use-approx-sync",
+        default=False,
+        action="store_true"
+    )
+    parser.add_argument(
+        "--sync-slop",
+        default=0.1,
+        type=float
+    )
+    parser.add_argument(
+        "--sync-queue-size",
+        default=None,
+        type=int
+    )
     args = parser.parse_args()
 
     # if the user is not providing pointgoal location, use the origin
@@ -544,6 +608,10 @@ def main():
         move_base_goal_topic_name=args.move_base_goal_topic_name,
         fetch_goal_from_move_base=args.fetch_goal_from_move_base,
         final_pointgoal_pos=np.array(pointgoal_list),
+        max_obs_staleness=args.max_obs_staleness,
+        use_approx_sync=args.use_approx_sync,
+        sync_slop=args.sync_slop,
+        sync_queue_size=args.sync_queue_size,
     )
 
     # spins until receiving the shutdown signal
@@ -16,7 +16,6 @@ from geometry_msgs.msg import Twist
 from habitat.config import Config
 from habitat.sims.habitat_simulator.actions import _DefaultHabitatSimActions
 from habitat_baselines.agents.ppo_agents import PPOAgent
-from message_filters import TimeSynchronizer
 from ros_x_habitat.msg import PointGoalWithGPSCompass, DepthImage
 from ros_x_habitat.srv import ResetAgent, GetAgentTime
 from rospy.numpy_msg import numpy_msg
@@ -24,7 +23,7 @@ from sensor_msgs.msg import Image
 from std_msgs.msg import Int16
 from src.constants.constants import AgentResetCommands, PACKAGE_NAME, ServiceNames
 import time
-from src.utils import utils_logging
+from src.utils import utils_logging, utils_sync
 
 
 def get_default_config():
@@ -51,6 +50,9 @@ class HabitatAgentNode:
         node_name: str,
         agent_config: Config,
         sensor_pub_rate: float = 5.0,
+        use_approx_sync: bool = False,
+        sync_slop: float = 0.1,
+        sync_queue_size: int = None,
     ):
         r"""
         Instantiates a node incapsulating a Habitat agent.
@@ -58,6 +60,13 @@ class HabitatAgentNode:
         :param agent_config: agent configuration
         :sensor_pub_rate: the rate at which Gazebo (or some other ROS-based
             sim) publishes sensor observations
+        :param use_approx_sync: if true, match sensor messages whose stamps
+            are up to `sync_slop` seconds apart; otherwise require identical
+            stamps
+        :param sync_slop: max stamp difference of approximately synchronized
+            messages, in seconds
+        :param sync_queue_size: number of messages queued per sensor topic
+            for synchronization. Defaults to the subscriber queue size
         """
         # initialize the node
         self.node_name = node_name
@@ -70,6 +79,8 @@ class HabitatAgentNode:
         # TODO: make them configurable by constructor argument
         self.sub_queue_size = 10
         self.pub_queue_size = 10
+        if sync_queue_size is None:
+            sync_queue_size = self.sub_queue_size
 
         # lock guarding access to self.action, self.count_steps,
         # self.agent and self.t_agent_elapsed
@@ -127,23 +138,26 @@ class HabitatAgentNode:
 
         # filter sensor topics with time synchronizer
         if self.agent_config.INPUT_TYPE == "rgb":
-            self.ts = TimeSynchronizer(
-                [self.sub_rgb, self.sub_pointgoal_with_gps_compass],
-                queue_size=self.sub_queue_size,
-            )
-            self.ts.registerCallback(self.callback_rgb)
+            subscribers = [self.sub_rgb, self.sub_pointgoal_with_gps_compass]
+            callback = self.callback_rgb
         elif self.agent_config.INPUT_TYPE == "rgbd":
-            self.ts = TimeSynchronizer(
-                [self.sub_rgb, self.sub_depth, self.sub_pointgoal_with_gps_compass],
-                queue_size=self.sub_queue_size,
-            )
-            self.ts.registerCallback(self.callback_rgbd)
+            subscribers = [
+                self.sub_rgb,
+                self.sub_depth,
+                self.sub_pointgoal_with_gps_compass,
+            ]
+            callback = self.callback_rgbd
         else:
-            self.ts = TimeSynchronizer(
-                [self.sub_depth, self.sub_pointgoal_with_gps_compass],
-                queue_size=self.sub_queue_size,
-            )
-            self.ts.registerCallback(self.callback_depth)
+            subscribers = [self.sub_depth, self.sub_pointgoal_with_gps_compass]
+            callback = self.callback_depth
+        self.ts, self.sync_stats = utils_sync.make_synchronizer(
+            subscribers,
+            callback,
+            queue_size=sync_queue_size,
+            use_approx_sync=use_approx_sync,
+            slop=sync_slop,
+        )
+        rospy.on_shutdown(self.on_exit_log_sync_stats)
 
         self.logger.info("agent making sure env subscribed to command topic...")
         while self.pub.get_num_connections() == 0:
@@ -168,6 +182,10 @@ class HabitatAgentNode:
                 self.t_agent_elapsed = 0.0
                 self.action = None
                 self.agent_config.RANDOM_SEED = request.seed
+                # swap in a new model if requested, so a running node can
+                # be reused across experiments
+                if request.model_path != "":
+                    self.agent_config.MODEL_PATH = request.model_path
                 self.agent = PPOAgent(self.agent_config)
                 self.agent.reset()
             return True
@@ -189,7 +207,8 @@ class HabitatAgentNode:
             avg_agent_time = self.t_agent_elapsed / self.count_steps
         return avg_agent_time
 
-    def depthmsg_to_cv2(self, depth_msg):
+    @classmethod
+    def depthmsg_to_cv2(cls, depth_msg):
         r"""
         Converts a ROS DepthImage message to a Habitat depth observation.
         :param depth_msg: ROS depth message
@@ -200,8 +219,9 @@ class HabitatAgentNode:
         depth_img = np.reshape(depth_msg.data.astype(np.float32), (h, w))
         return depth_img
 
+    @classmethod
     def msgs_to_obs(
-        self,
+        cls,
         rgb_msg: Image = None,
         depth_msg: DepthImage = None,
         pointgoal_with_gps_compass_msg: PointGoalWithGPSCompass = None,
@@ -224,7 +244,7 @@ class HabitatAgentNode:
 
         # Convert depth message
         if depth_msg is not None:
-            observations["depth"] = self.depthmsg_to_cv2(depth_msg)
+            observations["depth"] = cls.depthmsg_to_cv2(depth_msg)
             # have to manually add channel info
             observations["depth"] = np.expand_dims(observations["depth"], 2).astype(
                 np.float32
@@ -241,7 +261,8 @@ class HabitatAgentNode:
 
         return observations
 
-    def action_to_msg(self, action: Dict[str, int]):
+    @classmethod
+    def action_to_msg(cls, action: Dict[str, int]):
         r"""
         Converts action produced by Habitat agent to a ROS message.
         :param action: Discrete action produced by Habitat agent.
@@ -330,6 +351,13 @@ class HabitatAgentNode:
             action_msg = self.action_to_msg(self.action)
             self.pub.publish(action_msg)
 
+    def on_exit_log_sync_stats(self):
+        r"""
+        Log sensor synchronization statistics upon shutdown.
+        """
+        for stat_name, stat_value in self.sync_stats.get_stats().items():
+            self.logger.info(f"{stat_name},{stat_value}")
+
     def spin_until_shutdown(self):
         r"""
         Put the current thread to sleep. Wake up and exit upon shutdown.
@@ -356,6 +384,9 @@ def main():
         type=float,
         default=10,
     )
+    parser.add_argument("--use-approx-sync", default=False, action="store_true")
+    parser.add_argument("--sync-slop", type=float, default=0.1)
+    parser.add_argument("--sync-queue-size", type=int, default=None)
     args = parser.parse_args()
     agent_config = get_default_config()
     agent_config.INPUT_TYPE = args.input_type
@@ -366,6 +397,9 @@ def main():
         node_name=args.node_name,
         agent_config=agent_config,
         sensor_pub_rate=args.sensor_pub_rate,
+        use_approx_sync=args.use_approx_sync,
+        sync_slop=args.sync_slop,
+        sync_queue_size=args.sync_queue_size,
     )
 
     # spins until receiving the shutdown signal
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 import argparse
+from functools import partial
 import numpy as np
 import rospy
 from geometry_msgs.msg import Twist
 from std_msgs.msg import Int16
 from geometry_msgs.msg import PoseStamped
+from nav_msgs.msg import Odometry
 import quaternion
 from habitat.utils.geometry_utils import quaternion_rotate_vector
 from threading import Lock
@@ -23,13 +25,23 @@ class HabitatAgentToGazebo:
     def __init__(
         self,
         node_name: str,
-        control_period: float=1.0
+        control_period: float=1.0,
+        gazebo_odom_topic_name: str="odom",
+        forward_step_size: float=0.25,
+        turn_angle: float=10.0,
     ):
         r"""
         Instantiates the Habitat agent->Gazebo bridge.
         :param node_name: name of the bridge node
         :param control_period: time it takes for a discrete action to complete,
             measured in seconds
+        :param gazebo_odom_topic_name: name of the topic on which Gazebo
+            publishes odometry data. The bridge caches the latest pose from
+            it, so forward actions need no `get_agent_pose` round trip
+        :param forward_step_size: distance covered by a forward action, in
+            meters; should match SIMULATOR.FORWARD_STEP_SIZE
+        :param turn_angle: angle covered by a turn action, in degrees;
+            should match SIMULATOR.TURN_ANGLE
         """
         # initialize the node
         self.node_name = node_name
@@ -43,14 +55,41 @@ class HabitatAgentToGazebo:
         # set up logger
         self.logger = utils_logging.setup_logger(self.node_name)
 
-        # register control period
+        # register control period and action magnitudes
         self.control_period = control_period
+        self.forward_step_size = forward_step_size
+        self.turn_angle = turn_angle
 
         # set up step counter
         self.step_lock = Lock()
         with self.step_lock:
             self.count_steps = 0
 
+        # set up actuation scheduler. Each action is ended by a one-shot
+        # timer; a new action arriving before the timer fires pre-empts it
+        self.actuation_lock = Lock()
+        with self.actuation_lock:
+            self.actuation_timer = None
+            self.action_seq = 0
+            self.count_actuations = 0
+            self.count_preemptions = 0
+            self.sum_jitter = 0.0
+            self.max_jitter = 0.0
+        rospy.on_shutdown(self.on_exit_log_jitter_stats)
+
+        # latest orientation of the agent, cached from odometry
+        self.curr_pose_lock = Lock()
+        with self.curr_pose_lock:
+            self.curr_rotation = None
+
+        # subscribe from Gazebo-facing odometry topic
+        self.sub_odom = rospy.Subscriber(
+            gazebo_odom_topic_name,
+            Odometry,
+            self.callback_odom,
+            queue_size=self.sub_queue_size
+        )
+
         # subscribe from Habitat-agent-facing action topic
         self.sub_action = rospy.Subscriber(
             "action", Int16, self.callback_action_from_agent, queue_size=self.sub_queue_size
@@ -66,7 +105,8 @@ class HabitatAgentToGazebo:
             queue_size=self.pub_queue_size
         )
 
-        # establish get_agent_pose service client
+        # establish get_agent_pose service client; only used as a fallback
+        # before the first odometry message arrives
         self.get_agent_pose_service_name = (
                 f"{PACKAGE_NAME}/gazebo_to_habitat_agent/{ServiceNames.GET_AGENT_POSE}"
             )        
@@ -104,6 +144,42 @@ class HabitatAgentToGazebo:
         vel_msg.angular.y = angular_y
         vel_msg.angular.z = angular_z
         return vel_msg
+
+    def callback_odom(self, odom_msg):
+        r"""
+        Cache the latest orientation of the agent from odometry data.
+        :param odom_msg: Odometry data from Gazebo
+        """
+        with self.curr_pose_lock:
+            self.curr_rotation = [
+                odom_msg.pose.pose.orientation.x,
+                odom_msg.pose.pose.orientation.y,
+                odom_msg.pose.pose.orientation.z,
+                odom_msg.pose.pose.orientation.w
+            ]
+
+    def get_curr_rotation(self):
+        r"""
+        Return the current orientation of the agent. Read from the local
+        pose cache; falls back to the `get_agent_pose` service if no
+        odometry has been received yet.
+        :return: current orientation as a (x, y, z, w) list
+        """
+        with self.curr_pose_lock:
+            if self.curr_rotation is not None:
+                return list(self.curr_rotation)
+
+        rospy.wait_for_service(self.get_agent_pose_service_name)
+        try:
+            agent_pose = self.get_agent_pose()
+        except rospy.ServiceException:
+            raise rospy.ServiceException
+        return [
+            agent_pose.pose.orientation.x,
+            agent_pose.pose.orientation.y,
+            agent_pose.pose.orientation.z,
+            agent_pose.pose.orientation.w
+        ]
     
     def callback_action_from_agent(self, action_msg):
         r"""
@@ -122,19 +198,11 @@ class HabitatAgentToGazebo:
         if action_id == _DefaultHabitatSimActions.STOP.value:
             navigation_done = 1
         elif action_id == _DefaultHabitatSimActions.MOVE_FORWARD.value:
-            linear_vel_local = np.array([-0.25 / self.control_period, 0, 0])
+            linear_vel_local = np.array(
+                [-self.forward_step_size / self.control_period, 0, 0]
+            )
             # get the current pose of the agent
-            rospy.wait_for_service(self.get_agent_pose_service_name)
-            try:
-                agent_pose = self.get_agent_pose()
-                curr_rotation = [
-                    agent_pose.pose.orientation.x,
-                    agent_pose.pose.orientation.y,
-                    agent_pose.pose.orientation.z,
-                    agent_pose.pose.orientation.w
-                ]
-            except rospy.ServiceException:
-                raise rospy.ServiceException
+            curr_rotation = self.get_curr_rotation()
             # compute linear velocity in world frame
             linear_vel_world = quaternion_rotate_vector(
                 np.quaternion(
@@ -147,26 +215,91 @@ class HabitatAgentToGazebo:
             vel_msg.linear.y = linear_vel_world[1]
             vel_msg.linear.z = linear_vel_world[2]
         elif action_id == _DefaultHabitatSimActions.TURN_LEFT.value:
-            vel_msg.angular.z = np.deg2rad(10.0)
+            vel_msg.angular.z = np.deg2rad(self.turn_angle) / self.control_period
         elif action_id == _DefaultHabitatSimActions.TURN_RIGHT.value:
-            vel_msg.angular.z = np.deg2rad(-10.0)
+            vel_msg.angular.z = np.deg2rad(-self.turn_angle) / self.control_period
         with self.step_lock:
             # increment by one step
             self.count_steps += 1
         self.pub_vel.publish(vel_msg)
-        
-        # actuate
-        action_start_time = rospy.get_rostime().secs
-        while rospy.get_rostime().secs < action_start_time + self.control_period:
-            rospy.sleep(self.control_period/10.0)
-        # issue a pseudo-stop to mitigate the delay from observation to actuation
-        vel_msg = self.create_vel_msg(0, 0, 0, 0, 0, 0)
-        self.pub_vel.publish(vel_msg)
-        
-        # signal the action being done
-        navigation_done_msg = Int16()
-        navigation_done_msg.data = navigation_done
-        self.pub_last_action_done.publish(navigation_done_msg)
+
+        # schedule the end of the action without blocking this thread
+        control_duration = rospy.Duration.from_sec(self.control_period)
+        with self.actuation_lock:
+            if self.actuation_timer is not None:
+                # pre-empt the pending action; its stop and done messages
+                # are never published
+                self.actuation_timer.shutdown()
+                self.count_preemptions += 1
+            self.action_seq += 1
+            expected_end_time = rospy.get_rostime() + control_duration
+            self.actuation_timer = rospy.Timer(
+                control_duration,
+                partial(
+                    self.callback_action_timeout,
+                    self.action_seq,
+                    navigation_done,
+                    expected_end_time,
+                ),
+                oneshot=True,
+            )
+
+    def callback_action_timeout(
+        self, action_seq, navigation_done, expected_end_time, timer_event
+    ):
+        r"""
+        Called by the one-shot actuation timer when an action's control
+        period has elapsed. Publishes a stop to `cmd_vel/` and signals the
+        action being done on `last_action_done/`.
+        :param action_seq: sequence number of the action the timer belongs to
+        :param navigation_done: 1 if the action was STOP, 0 otherwise
+        :param expected_end_time: ROS time at which the action should end
+        :param timer_event: `rospy.TimerEvent` passed by the timer
+        """
+        with self.actuation_lock:
+            if action_seq != self.action_seq:
+                # the action was pre-empted after the timer had fired
+                return
+            self.actuation_timer = None
+            jitter = abs((rospy.get_rostime() - expected_end_time).to_sec())
+            self.count_actuations += 1
+            self.sum_jitter += jitter
+            self.max_jitter = max(self.max_jitter, jitter)
+
+            # issue a pseudo-stop to mitigate the delay from observation to actuation
+            vel_msg = self.create_vel_msg(0, 0, 0, 0, 0, 0)
+            self.pub_vel.publish(vel_msg)
+
+            # signal the action being done
+            navigation_done_msg = Int16()
+            navigation_done_msg.data = navigation_done
+            self.pub_last_action_done.publish(navigation_done_msg)
+
+    def get_jitter_stats(self):
+        r"""
+        Return statistics on how far actual action end times deviated from
+        the scheduled ones.
+        :return: dictionary of number of completed actions, number of
+            pre-empted actions, mean and max absolute jitter in seconds
+        """
+        with self.actuation_lock:
+            mean_jitter = 0.0
+            if self.count_actuations > 0:
+                mean_jitter = self.sum_jitter / self.count_actuations
+            return {
+                "count_actuations": self.count_actuations,
+                "count_preemptions": self.count_preemptions,
+                "mean_jitter": mean_jitter,
+                "max_jitter": self.max_jitter,
+            }
+
+    def on_exit_log_jitter_stats(self):
+        r"""
+        Log actuation jitter statistics upon shutdown.
+        """
+        jitter_stats = self.get_jitter_stats()
+        for stat_name, stat_value in jitter_stats.items():
+            self.logger.info(f"{stat_name},{stat_value}")
 
     def spin_until_shutdown(self):
         r"""
@@ -183,12 +316,30 @@ def main():
         default="habitat_agent_to_gazebo",
         type=str
     )
+    parser.add_argument(
+        "--gazebo-odom-topic-name",
+        default="odom",
+        type=str
+    )
+    parser.add_argument(
+        "--forward-step-size",
+        default=0.25,
+        type=float
+    )
+    parser.add_argument(
+        "--turn-angle",
+        default=10.0,
+        type=float
+    )
     args = parser.parse_args()
 
     # instantiate the bridge
     bridge = HabitatAgentToGazebo(
         node_name=args.node_name,
-        control_period=2.0
+        control_period=2.0,
+        gazebo_odom_topic_name=args.gazebo_odom_topic_name,
+        forward_step_size=args.forward_step_size,
+        turn_angle=args.turn_angle,
     )
 
     # spins until receiving the shutdown signal
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 import argparse
-from threading import Condition, Lock
+from queue import Queue
+from threading import Condition, Lock, Thread
+from traceback import print_exc
 
 import numpy as np
 import rospy
@@ -22,7 +24,11 @@ from src.envs.habitat_eval_rlenv import HabitatEvalRLEnv
 from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
 import time
 from src.utils import utils_logging
-from src.utils.utils_visualization import generate_video, observations_to_image_for_roam
+from src.utils.utils_visualization import (
+    TopDownMapRenderer,
+    generate_video,
+    observations_to_image_for_roam,
+)
 from src.measures.top_down_map_for_roam import (
     TopDownMapForRoam,
     add_top_down_map_for_roam_to_config,
@@ -43,6 +49,12 @@ class HabitatEnvNode:
         enable_physics_sim: bool = False,
         use_continuous_agent: bool = False,
         pub_rate: float = 5.0,
+        num_physics_substeps: int = 1,
+        topic_namespace: str = "",
+        shard_id: int = 0,
+        num_shards: int = 1,
+        init_node: bool = True,
+        video_queue_size: int = 16,
     ):
         r"""
         Instantiates a node incapsulating a Habitat sim environment.
@@ -54,14 +66,33 @@ class HabitatEnvNode:
             that produces continuous velocities. Must be false if using
             discrete simulator
         :pub_rate: the rate at which the node publishes sensor readings
+        :param num_physics_substeps: number of physics time steps simulated
+            per published frame, for a continuous agent
+        :param topic_namespace: if not empty, sensor and command topics are
+            created under this namespace, e.g. `<topic_namespace>/rgb`
+        :param shard_id: index of the shard of the dataset's episodes this
+            node evaluates
+        :param num_shards: number of shards the dataset's episodes are split
+            into
+        :param init_node: if true, initialize a ROS node named `node_name`;
+            otherwise the caller must have initialized one, which this node
+            then shares with others in the same process
+        :param video_queue_size: max number of video frames waiting to be
+            composed; frames arriving when that many are waiting are
+            dropped. Top-down map updates are never dropped
         """
         # precondition check
         if use_continuous_agent:
             assert enable_physics_sim
+        assert num_physics_substeps >= 1
+        assert video_queue_size >= 1
 
         # initialize node
         self.node_name = node_name
-        rospy.init_node(self.node_name)
+        self.init_node = init_node
+        if self.init_node:
+            rospy.init_node(self.node_name)
+        self.topic_namespace = topic_namespace
 
         rospy.on_shutdown(self.on_exit_generate_video)
 
@@ -76,13 +107,20 @@ class HabitatEnvNode:
         # instantiate environment
         self.enable_physics_sim = enable_physics_sim
         self.use_continuous_agent = use_continuous_agent
+        self.num_physics_substeps = num_physics_substeps
         # overwrite env config if physics enabled
         if self.enable_physics_sim:
             HabitatSimEvaluator.overwrite_simulator_config(self.config)
+        if self.use_continuous_agent:
+            # depth reading should be denormalized, so we publish
+            # readings in meters
+            assert self.config.SIMULATOR.DEPTH_SENSOR.NORMALIZE_DEPTH is False
         # define environment
         self.env = HabitatEvalRLEnv(
             config=self.config, enable_physics=self.enable_physics_sim
         )
+        if num_shards > 1:
+            self.env.set_episode_shard(shard_id, num_shards)
 
         # shutdown is set to true by eval_episode() to indicate the
         # evaluator wants the node to shutdown
@@ -120,6 +158,10 @@ class HabitatEnvNode:
             if self.use_continuous_agent:
                 self.linear_vel = None
                 self.angular_vel = None
+                # set when a new velocity command differs from the one
+                # enacted last, so the agent's velocity control is only
+                # updated when the command changes
+                self.velocities_changed = False
             else:
                 self.action = None
             self.count_steps = None
@@ -135,9 +177,26 @@ class HabitatEnvNode:
 
         # video production variables
         self.make_video = False
-        self.observations_per_episode = []
         self.video_frame_counter = 0
         self.video_frame_period = 1  # NOTE: frame rate defined as x steps/frame
+        self.top_down_map_renderer = TopDownMapRenderer()
+        # step() hands copies of the top-down map changes and of the
+        # observations over to a worker thread, which applies the changes
+        # and composes the frames in step order. Frames arriving when
+        # `video_queue_size` frames are waiting are dropped, so recording
+        # never blocks stepping; map changes are always queued, so every
+        # frame shows the map as of its own step
+        self.video_frame_queue = Queue()
+        self.video_queue_size = video_queue_size
+        self.video_frames_lock = Lock()
+        with self.video_frames_lock:
+            self.observations_per_episode = []
+            self.num_dropped_video_frames = 0
+            self.num_pending_video_frames = 0
+        self.video_frame_thread = Thread(
+            target=self.compose_video_frames, daemon=True
+        )
+        self.video_frame_thread.start()
 
         # set up logger
         self.logger = utils_logging.setup_logger(self.node_name)
@@ -166,27 +225,28 @@ class HabitatEnvNode:
         # we create one topic for each of RGB, Depth and GPS+Compass
         # sensor
         if "RGB_SENSOR" in self.config.SIMULATOR.AGENT_0.SENSORS:
-            self.pub_rgb = rospy.Publisher("rgb", Image, queue_size=self.pub_queue_size)
+            self.pub_rgb = rospy.Publisher(
+                self.get_topic_name("rgb"), Image, queue_size=self.pub_queue_size)
         if "DEPTH_SENSOR" in self.config.SIMULATOR.AGENT_0.SENSORS:
             if self.use_continuous_agent:
                 # if we are using a ROS-based agent, we publish depth images
                 # in type Image
                 self.pub_depth = rospy.Publisher(
-                    "depth", Image, queue_size=self.pub_queue_size
+                    self.get_topic_name("depth"), Image, queue_size=self.pub_queue_size
                 )
                 # also publish depth camera info
                 self.pub_camera_info = rospy.Publisher(
-                    "camera_info", CameraInfo, queue_size=self.pub_queue_size
+                    self.get_topic_name("camera_info"), CameraInfo, queue_size=self.pub_queue_size
                 )
             else:
                 # otherwise, we publish in type DepthImage to preserve as much
                 # accuracy as possible
                 self.pub_depth = rospy.Publisher(
-                    "depth", DepthImage, queue_size=self.pub_queue_size
+                    self.get_topic_name("depth"), DepthImage, queue_size=self.pub_queue_size
                 )
         if "POINTGOAL_WITH_GPS_COMPASS_SENSOR" in self.config.TASK.SENSORS:
             self.pub_pointgoal_with_gps_compass = rospy.Publisher(
-                "pointgoal_with_gps_compass",
+                self.get_topic_name("pointgoal_with_gps_compass"),
                 PointGoalWithGPSCompass,
                 queue_size=self.pub_queue_size
             )
@@ -194,11 +254,11 @@ class HabitatEnvNode:
         # subscribe from command topics
         if self.use_continuous_agent:
             self.sub = rospy.Subscriber(
-                "cmd_vel", Twist, self.callback, queue_size=self.sub_queue_size
+                self.get_topic_name("cmd_vel"), Twist, self.callback, queue_size=self.sub_queue_size
             )
         else:
             self.sub = rospy.Subscriber(
-                "action", Int16, self.callback, queue_size=self.sub_queue_size
+                self.get_topic_name("action"), Int16, self.callback, queue_size=self.sub_queue_size
             )
 
         # wait until connections with the agent is established
@@ -212,6 +272,16 @@ class HabitatEnvNode:
 
         self.logger.info("env initialized")
 
+    def get_topic_name(self, topic_name: str) -> str:
+        r"""
+        Get the name of a sensor or command topic of this node.
+        :param topic_name: name of the topic without namespace
+        :returns: name of the topic under the node's topic namespace
+        """
+        if self.topic_namespace == "":
+            return topic_name
+        return f"{self.topic_namespace}/{topic_name}"
+
     def reset(self):
         r"""
         Resets the agent and the simulator. Requires being called only from
@@ -264,6 +334,10 @@ class HabitatEnvNode:
 
             # initialize observations
             self.observations = self.env.reset()
+            # let frames of the last episode be composed before dropping
+            # its map
+            self.video_frame_queue.join()
+            self.top_down_map_renderer.reset()
 
             # ------------  log reset time end  ------------
             t_reset_end = time.clock()
@@ -274,6 +348,10 @@ class HabitatEnvNode:
             # initialize step counter
             with self.command_cv:
                 self.count_steps = 0
+                # the agent object is re-created on reset, so the last
+                # velocities must be enacted again
+                if self.use_continuous_agent:
+                    self.velocities_changed = True
 
     def _enable_reset(self, request, enable_roam):
         r"""
@@ -395,17 +473,17 @@ class HabitatEnvNode:
 
         return True
 
-    def cv2_to_depthmsg(self, depth_img: np.ndarray):
+    @classmethod
+    def cv2_to_depthmsg(cls, depth_img: np.ndarray, use_continuous_agent: bool):
         r"""
         Converts a Habitat depth image to a ROS DepthImage message.
         :param depth_img: depth image as a numpy array
+        :param use_continuous_agent: if true, depth readings are assumed
+            to be denormalized (in meters)
         :returns: a ROS Image message if using continuous agent; or
             a ROS DepthImage message if using discrete agent
         """
-        if self.use_continuous_agent:
-            # depth reading should be denormalized, so we get
-            # readings in meters
-            assert self.config.SIMULATOR.DEPTH_SENSOR.NORMALIZE_DEPTH is False
+        if use_continuous_agent:
             depth_img_in_m = np.squeeze(depth_img, axis=2)
             depth_msg = CvBridge().cv2_to_imgmsg(
                 depth_img_in_m.astype(np.float32), encoding="passthrough"
@@ -417,11 +495,21 @@ class HabitatEnvNode:
             depth_msg.data = np.ravel(depth_img)
         return depth_msg
 
-    def obs_to_msgs(self, observations_hab: Observations):
+    @classmethod
+    def obs_to_msgs(
+        cls,
+        observations_hab: Observations,
+        use_continuous_agent: bool,
+        stamp: rospy.Time = None,
+    ):
         r"""
         Converts Habitat observations to ROS messages.
 
         :param observations_hab: Habitat observations.
+        :param use_continuous_agent: if true, publish depth as a ROS Image;
+            otherwise as a DepthImage
+        :param stamp: timestamp for all messages. Defaults to the current
+            ROS time
         :return: a dictionary containing RGB/depth/Pos+Orientation readings
         in ROS Image/Pose format.
         """
@@ -429,7 +517,10 @@ class HabitatEnvNode:
 
         # take the current sim time to later use as timestamp
         # for all simulator readings
-        t_curr = rospy.Time.now()
+        if stamp is None:
+            t_curr = rospy.Time.now()
+        else:
+            t_curr = stamp
 
         for sensor_uuid, _ in observations_hab.items():
             sensor_data = observations_hab[sensor_uuid]
@@ -439,7 +530,7 @@ class HabitatEnvNode:
                     sensor_data.astype(np.uint8), encoding="rgb8"
                 )
             elif sensor_uuid == "depth":
-                sensor_msg = self.cv2_to_depthmsg(sensor_data)
+                sensor_msg = cls.cv2_to_depthmsg(sensor_data, use_continuous_agent)
             elif sensor_uuid == "pointgoal_with_gps_compass":
                 sensor_msg = PointGoalWithGPSCompass()
                 sensor_msg.distance_to_goal = sensor_data[0]
@@ -460,7 +551,9 @@ class HabitatEnvNode:
         2) when evaluation has been enabled.
         """
         # pack observations in ROS message
-        observations_ros = self.obs_to_msgs(self.observations)
+        observations_ros = self.obs_to_msgs(
+            self.observations, self.use_continuous_agent
+        )
         for sensor_uuid, _ in self.observations.items():
             # we publish to each of RGB, Depth and Ptgoal/GPS+Compass sensor
             if sensor_uuid == "rgb":
@@ -480,7 +573,8 @@ class HabitatEnvNode:
                     observations_ros["pointgoal_with_gps_compass"]
                 )
 
-    def make_depth_camera_info_msg(self, header, height, width):
+    @classmethod
+    def make_depth_camera_info_msg(cls, header, height, width):
         r"""
         Create camera info message for depth camera.
         :param header: header to create the message
@@ -521,9 +615,12 @@ class HabitatEnvNode:
             # --------------------------------------------
 
             if self.use_continuous_agent:
-                self.env.set_agent_velocities(self.linear_vel, self.angular_vel)
-                print(self.linear_vel)
-                (self.observations, _, _, info) = self.env.step()
+                if self.velocities_changed:
+                    self.env.set_agent_velocities(self.linear_vel, self.angular_vel)
+                    self.velocities_changed = False
+                (self.observations, _, _, info) = self.env.step(
+                    num_substeps=self.num_physics_substeps
+                )
             else:
                 # NOTE: Here we call HabitatEvalRLEnv.step() which dispatches
                 # to Env.step() or PhysicsEnv.step_physics() depending on
@@ -538,21 +635,85 @@ class HabitatEnvNode:
 
         # if making video, generate frames from actions
         if self.make_video:
+            # keep the rendered map up to date, including between frames
+            if "top_down_map_for_roam" in info:
+                map_update = TopDownMapRenderer.get_map_update(
+                    info["top_down_map_for_roam"]
+                )
+                if map_update is not None:
+                    self.video_frame_queue.put(("map", map_update))
             self.video_frame_counter += 1
             if self.video_frame_counter == self.video_frame_period - 1:
                 # NOTE: for now we only consider the case where we make videos
                 # in the roam mode, for a continuous agent
-                out_im_per_action = observations_to_image_for_roam(
-                    self.observations,
-                    info,
-                    self.config.SIMULATOR.DEPTH_SENSOR.MAX_DEPTH,
-                )
-                self.observations_per_episode.append(out_im_per_action)
+                self.enqueue_video_frame(info)
                 self.video_frame_counter = 0
 
         with self.command_cv:
             self.count_steps += 1
 
+    def enqueue_video_frame(self, info):
+        r"""
+        Hand the current observations over to the video frame worker, or
+        drop the frame if `video_queue_size` frames are already waiting.
+        :param info: info returned from the environment step
+        """
+        # the simulator and the top-down map measure may reuse their
+        # buffers, so hand over copies of what the frame is composed of
+        observations = {
+            sensor: np.copy(self.observations[sensor])
+            for sensor in ["rgb", "depth", "imagegoal"]
+            if sensor in self.observations
+        }
+        frame_info = {}
+        if "collisions" in info:
+            frame_info["collisions"] = {
+                "is_collision": info["collisions"]["is_collision"]
+            }
+        if "top_down_map_for_roam" in info:
+            frame_info["top_down_map_for_roam"] = {
+                "agent_map_coord": info["top_down_map_for_roam"]["agent_map_coord"],
+                "agent_angle": info["top_down_map_for_roam"]["agent_angle"],
+            }
+        with self.video_frames_lock:
+            if self.num_pending_video_frames >= self.video_queue_size:
+                self.num_dropped_video_frames += 1
+                return
+            self.num_pending_video_frames += 1
+        self.video_frame_queue.put(("frame", (observations, frame_info)))
+
+    def compose_video_frames(self):
+        r"""
+        Apply top-down map updates and compose video frames from the
+        observations in the video frame queue, in order, until receiving
+        None.
+        """
+        while True:
+            item = self.video_frame_queue.get()
+            try:
+                if item is None:
+                    return
+                item_type, item_data = item
+                if item_type == "map":
+                    self.top_down_map_renderer.apply_map_update(item_data)
+                    continue
+                with self.video_frames_lock:
+                    self.num_pending_video_frames -= 1
+                observations, info = item_data
+                out_im_per_action = observations_to_image_for_roam(
+                    observations,
+                    info,
+                    self.config.SIMULATOR.DEPTH_SENSOR.MAX_DEPTH,
+                    self.top_down_map_renderer,
+                )
+                with self.video_frames_lock:
+                    self.observations_per_episode.append(out_im_per_action)
+            except Exception:
+                self.logger.info("Failed to compose video frame")
+                print_exc()
+            finally:
+                self.video_frame_queue.task_done()
+
     def publish_and_step_for_eval(self):
         r"""
         Complete an episode and alert eval_episode() upon completion. Requires
@@ -611,10 +772,18 @@ class HabitatEnvNode:
         with self.command_cv:
             if self.use_continuous_agent:
                 # set linear + angular velocity
-                self.linear_vel = np.array(
+                linear_vel = np.array(
                     [(1.0 * cmd_msg.linear.y), 0.0, (-1.0 * cmd_msg.linear.x)]
                 )
-                self.angular_vel = np.array([0.0, cmd_msg.angular.z, 0.0])
+                angular_vel = np.array([0.0, cmd_msg.angular.z, 0.0])
+                if (
+                    self.linear_vel is None
+                    or not np.array_equal(linear_vel, self.linear_vel)
+                    or not np.array_equal(angular_vel, self.angular_vel)
+                ):
+                    self.linear_vel = linear_vel
+                    self.angular_vel = angular_vel
+                    self.velocities_changed = True
             else:
                 # get the action
                 self.action = cmd_msg.data
@@ -638,7 +807,10 @@ class HabitatEnvNode:
                 with self.shutdown_lock:
                     # if shutdown service called, exit
                     if self.shutdown:
-                        rospy.signal_shutdown("received request to shut down")
+                        # a node shared with other environments is shut
+                        # down by its owner
+                        if self.init_node:
+                            rospy.signal_shutdown("received request to shut down")
                         break
                 with self.enable_reset_cv:
                     if self.enable_roam:
@@ -662,7 +834,14 @@ class HabitatEnvNode:
         Make video of the current episode, if video production is turned
         on.
         """
+        # let the frame worker compose the frames left in the queue
+        self.video_frame_queue.put(None)
+        self.video_frame_thread.join()
         if self.make_video:
+            with self.video_frames_lock:
+                self.logger.info(
+                    f"number of dropped video frames: {self.num_dropped_video_frames}"
+                )
             generate_video(
                 video_option=self.config.VIDEO_OPTION,
                 video_dir=self.config.VIDEO_DIR,
@@ -690,6 +869,16 @@ def main():
         type=float,
         default=20.0,
     )
+    # number of physics time steps simulated per published frame, if
+    # using a continuous agent
+    parser.add_argument("--num-physics-substeps", type=int, default=1)
+    # evaluate one shard of the dataset's episodes under namespaced topics,
+    # e.g. to split a dataset between several env nodes
+    parser.add_argument("--topic-namespace", type=str, default="")
+    parser.add_argument("--shard-id", type=int, default=0)
+    parser.add_argument("--num-shards", type=int, default=1)
+    # max number of video frames waiting to be composed while roaming
+    parser.add_argument("--video-queue-size", type=int, default=16)
     args = parser.parse_args()
 
     # initialize the env node
@@ -699,6 +888,11 @@ def main():
         enable_physics_sim=args.enable_physics_sim,
         use_continuous_agent=args.use_continuous_agent,
         pub_rate=args.sensor_pub_rate,
+        num_physics_substeps=args.num_physics_substeps,
+        topic_namespace=args.topic_namespace,
+        shard_id=args.shard_id,
+        num_shards=args.num_shards,
+        video_queue_size=args.video_queue_size,
     )
 
     # run simulations
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+import argparse
+import sys
+from threading import Thread
+from traceback import print_exc
+
+import rospy
+from src.nodes.habitat_env_node import HabitatEnvNode
+from src.utils import utils_logging
+
+
+class HabitatMultiEnvNode:
+    r"""
+    A class to represent a ROS node hosting several Habitat simulators.
+    Each simulator is wrapped in a HabitatEnvNode which evaluates its own
+    shard of the dataset's episodes, under its own topic namespace and
+    service names, and runs in its own thread. All of them share one ROS
+    node and its connection to the ROS master.
+    """
+
+    def __init__(
+        self,
+        node_name: str,
+        num_envs: int,
+        config_paths: str = None,
+        enable_physics_sim: bool = False,
+        use_continuous_agent: bool = False,
+        pub_rate: float = 5.0,
+        num_physics_substeps: int = 1,
+    ):
+        r"""
+        Instantiates a node hosting `num_envs` Habitat sim environments.
+        :param node_name: name of the node
+        :param num_envs: number of environments
+        :param config_paths: path to Habitat env config file
+        :param enable_physics_sim: if true, turn on dynamic simulation
+            with Bullet
+        :param use_continuous_agent: if true, the agents would be ones
+            that produce continuous velocities. Must be false if using
+            discrete simulator
+        :param pub_rate: the rate at which each environment publishes sensor
+            readings
+        :param num_physics_substeps: number of physics time steps simulated
+            per published frame, for continuous agents
+        """
+        assert num_envs >= 1
+        # every environment needs a shard of at least one scene; check
+        # before any environment is started
+        num_scenes = self.get_num_scenes(config_paths)
+        assert (
+            num_envs <= num_scenes
+        ), f"{num_envs} environments requested, but the dataset has only {num_scenes} scenes"
+        self.node_name = node_name
+        self.num_envs = num_envs
+        self.failed_env_ids = []
+        self.env_node_kwargs = {
+            "config_paths": config_paths,
+            "enable_physics_sim": enable_physics_sim,
+            "use_continuous_agent": use_continuous_agent,
+            "pub_rate": pub_rate,
+            "num_physics_substeps": num_physics_substeps,
+        }
+
+        # initialize the node shared by all environments
+        rospy.init_node(self.node_name)
+
+        # set up logger
+        self.logger = utils_logging.setup_logger(self.node_name)
+
+    @classmethod
+    def get_num_scenes(cls, config_paths: str) -> int:
+        r"""
+        Count the scenes of the dataset of a task config. Environments are
+        given shards of whole scenes, so this is the maximum number of
+        environments.
+        :param config_paths: path to Habitat env config file
+        :returns: number of scenes
+        """
+        from habitat.config.default import get_config
+        from habitat.datasets import make_dataset
+
+        config = get_config(config_paths)
+        dataset = make_dataset(id_dataset=config.DATASET.TYPE, config=config.DATASET)
+        return len({episode.scene_id for episode in dataset.episodes})
+
+    @classmethod
+    def get_env_node_name(cls, node_name: str, env_id: int) -> str:
+        r"""
+        Get the name under which an environment of a multi-env node
+        provides its services.
+        :param node_name: name of the multi-env node
+        :param env_id: index of the environment
+        :returns: name of the environment
+        """
+        return f"{node_name}/env_{env_id}"
+
+    @classmethod
+    def get_env_topic_namespace(cls, env_id: int) -> str:
+        r"""
+        Get the namespace of an environment's sensor and command topics.
+        Its agent node should run in this ROS namespace.
+        :param env_id: index of the environment
+        :returns: topic namespace of the environment
+        """
+        return f"env_{env_id}"
+
+    def run_env(self, env_id: int):
+        r"""
+        Create an environment and run its simulation loop until it is shut
+        down. The environment is created in the calling thread, which then
+        does all its resets and steps. If the environment fails, the whole
+        node is shut down, so evaluators waiting on its services do not
+        hang.
+        :param env_id: index of the environment
+        """
+        try:
+            env_node = HabitatEnvNode(
+                node_name=self.get_env_node_name(self.node_name, env_id),
+                topic_namespace=self.get_env_topic_namespace(env_id),
+                shard_id=env_id,
+                num_shards=self.num_envs,
+                init_node=False,
+                **self.env_node_kwargs,
+            )
+            env_node.simulate()
+        except Exception:
+            self.logger.info(f"Environment {env_id} failed")
+            print_exc()
+            self.failed_env_ids.append(env_id)
+            rospy.signal_shutdown(f"environment {env_id} failed")
+
+    def simulate(self):
+        r"""
+        Run all environments in parallel. Returns once every environment has
+        received a shutdown request, or once the node is shut down because
+        an environment failed, then shuts the node down.
+        """
+        threads = [
+            Thread(target=self.run_env, args=(env_id,), daemon=True)
+            for env_id in range(self.num_envs)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            # environments still running when the node is shut down are
+            # left to exit with the process
+            while thread.is_alive() and not rospy.is_shutdown():
+                thread.join(1.0)
+        self.logger.info("all environments shut down")
+        rospy.signal_shutdown("received request to shut down")
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--node-name", type=str, default="multi_env_node")
+    parser.add_argument("--num-envs", type=int, default=2)
+    parser.add_argument(
+        "--task-config", type=str, default="configs/pointnav_d_orignal.yaml"
+    )
+    parser.add_argument("--enable-physics-sim", default=False, action="store_true")
+    parser.add_argument("--use-continuous-agent", default=False, action="store_true")
+    parser.add_argument(
+        "--sensor-pub-rate",
+        type=float,
+        default=20.0,
+    )
+    parser.add_argument("--num-physics-substeps", type=int, default=1)
+    args = parser.parse_args()
+
+    # initialize the multi-env node
+    multi_env_node = HabitatMultiEnvNode(
+        node_name=args.node_name,
+        num_envs=args.num_envs,
+        config_paths=args.task_config,
+        enable_physics_sim=args.enable_physics_sim,
+        use_continuous_agent=args.use_continuous_agent,
+        pub_rate=args.sensor_pub_rate,
+        num_physics_substeps=args.num_physics_substeps,
+    )
+
+    # run simulations
+    multi_env_node.simulate()
+    if len(multi_env_node.failed_env_ids) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# measure the import time of each node and script entry point with
+# `python -X importtime`, so regressions in startup cost can be tracked.
+# Each entry point is imported in a fresh interpreter; results are printed
+# and optionally written to a .csv file, and compared against a baseline
+# .csv produced by an earlier run.
+
+import argparse
+import csv
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = [
+    "src.nodes.habitat_env_node",
+    "src.nodes.habitat_agent_node",
+    "src.nodes.gazebo_to_habitat_agent",
+    "src.nodes.habitat_agent_to_gazebo",
+    "src.nodes.joy_controller",
+    "src.scripts.eval_habitat_ros",
+    "src.scripts.eval_and_vis_habitat",
+    "src.scripts.visualize_episodes",
+    "src.scripts.visualize_metrics_from_configs",
+    "src.scripts.visualize_variability_from_seeds",
+    "src.scripts.compare_metrics",
+]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    r"""
+    Parse the output of `python -X importtime`.
+    :param stderr: stderr of the interpreter
+    :returns: list of (package, self time in us, cumulative time in us).
+        Package names keep their indentation, which encodes nesting
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # skip the header line
+            continue
+        records.append(
+            (fields[2].rstrip()[1:], int(fields[0].strip()), int(fields[1].strip()))
+        )
+    return records
+
+
+def measure_entry_point(entry_point: str, num_top: int) -> Dict[str, object]:
+    r"""
+    Import an entry point in a fresh interpreter and collect import times.
+    :param entry_point: dotted module name of the entry point
+    :param num_top: number of most expensive third-party/stdlib packages
+        to report
+    :returns: dictionary of total import time in ms and the most expensive
+        packages
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry_point}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    records = parse_importtime(result.stderr)
+
+    # imports without indentation are the roots of the import tree
+    total_us = sum(
+        cumulative for package, _, cumulative in records if package == package.lstrip()
+    )
+
+    # root packages, wherever they were first imported, excluding our own
+    packages = [
+        (package.strip(), cumulative)
+        for package, _, cumulative in records
+        if "." not in package and package.strip() != "src"
+    ]
+    packages.sort(key=lambda record: record[1], reverse=True)
+    return {
+        "entry_point": entry_point,
+        "succeeded": result.returncode == 0,
+        "total_ms": total_us / 1000.0,
+        "top_packages": [
+            (package, cumulative / 1000.0) for package, cumulative in packages[:num_top]
+        ],
+    }
+
+
+def load_baseline(baseline_path: str) -> Dict[str, float]:
+    baseline = {}
+    with open(baseline_path, newline="") as csv_file:
+        for row in csv.DictReader(csv_file):
+            baseline[row["entry_point"]] = float(row["total_ms"])
+    return baseline
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entry-points", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--num-top-packages", type=int, default=5)
+    parser.add_argument("--output-path", type=str, default="")
+    parser.add_argument("--baseline-path", type=str, default="")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline_path != "":
+        baseline = load_baseline(args.baseline_path)
+
+    results = []
+    for entry_point in args.entry_points:
+        result = measure_entry_point(entry_point, args.num_top_packages)
+        results.append(result)
+
+        status = "" if result["succeeded"] else " (import failed)"
+        line = f"{entry_point}: {result['total_ms']:.1f} ms{status}"
+        if entry_point in baseline:
+            line += f", baseline {baseline[entry_point]:.1f} ms"
+        print(line)
+        for package, cumulative_ms in result["top_packages"]:
+            print(f"    {package}: {cumulative_ms:.1f} ms")
+
+    if args.output_path != "":
+        with open(args.output_path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["entry_point", "succeeded", "total_ms", "top_packages"])
+            for result in results:
+                writer.writerow(
+                    [
+                        result["entry_point"],
+                        result["succeeded"],
+                        f"{result['total_ms']:.1f}",
+                        ";".join(
+                            f"{package}={cumulative_ms:.1f}"
+                            for package, cumulative_ms in result["top_packages"]
+                        ),
+                    ]
+                )
+
+
+if __name__ == "__main__":
+    main()
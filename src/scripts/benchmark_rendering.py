@@ -0,0 +1,245 @@
+# benchmark the throughput of HabitatPhysicsSim for the sensor configurations
+# of task configs. Builds the simulator from each config (optionally with
+# overridden sensor resolution and GPU_GPU setting) and separately times
+# reset, discrete steps and physics sub-steps without rendering, and
+# rendering alone. Results are written to a JSON or CSV file (by default
+# benchmark_rendering.json), together with the habitat-sim version, so runs
+# can be compared across versions.
+
+import argparse
+import csv
+import glob
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+import habitat_sim
+from habitat.config.default import get_config
+from habitat.sims.habitat_simulator.actions import HabitatSimActions
+
+from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
+from src.sims.habitat_physics_simulator import HabitatPhysicsSim
+
+STAGES = ["reset", "step", "physics_substep", "render"]
+ACTIONS = [
+    HabitatSimActions.MOVE_FORWARD,
+    HabitatSimActions.TURN_LEFT,
+    HabitatSimActions.TURN_RIGHT,
+]
+
+
+def make_sim_config(task_config: str, resolution: int, gpu_gpu: bool):
+    r"""
+    Load the simulator section of a task config, with physics enabled.
+    :param task_config: path to the task config
+    :param resolution: if positive, override the width and height of the
+        RGB and depth sensors
+    :param gpu_gpu: value of HABITAT_SIM_V0.GPU_GPU
+    :returns: simulator config
+    """
+    config = get_config(task_config)
+    config.defrost()
+    if "PHYSICS_SIMULATOR" in config:
+        HabitatSimEvaluator.overwrite_simulator_config(config)
+    config.SIMULATOR.HABITAT_SIM_V0.ENABLE_PHYSICS = True
+    config.SIMULATOR.HABITAT_SIM_V0.GPU_GPU = gpu_gpu
+    if resolution > 0:
+        for sensor_name in ["RGB_SENSOR", "DEPTH_SENSOR"]:
+            config.SIMULATOR[sensor_name].WIDTH = resolution
+            config.SIMULATOR[sensor_name].HEIGHT = resolution
+    config.freeze()
+    return config.SIMULATOR
+
+
+def benchmark_sim(
+    sim_config,
+    num_resets: int,
+    num_steps: int,
+    time_step: float,
+    seed: int,
+) -> Dict[str, Dict[str, float]]:
+    r"""
+    Time the stages of one simulator configuration.
+    :param sim_config: simulator config
+    :param num_resets: number of timed resets
+    :param num_steps: number of timed steps, physics sub-steps and renders
+    :param time_step: physics time step of a sub-step, in seconds
+    :param seed: seed of the action sequence
+    :returns: mean and 95th percentile time of each stage, in ms
+    """
+    stage_times = {stage: [] for stage in STAGES}
+    sim = HabitatPhysicsSim(sim_config)
+    try:
+        # warm up, so lazy initialization is not timed
+        sim.reset()
+        sim.get_sensor_observations()
+
+        for _ in range(num_resets):
+            t_start = time.perf_counter()
+            sim.reset()
+            stage_times["reset"].append(time.perf_counter() - t_start)
+
+        # sim.step() also renders the observations; apply the action to
+        # the agent directly so "step" does not overlap with "render"
+        agent = sim.get_agent(0)
+        rng = np.random.RandomState(seed)
+        for action in rng.choice(ACTIONS, size=num_steps):
+            t_start = time.perf_counter()
+            agent.act(int(action))
+            stage_times["step"].append(time.perf_counter() - t_start)
+
+        for _ in range(num_steps):
+            t_start = time.perf_counter()
+            sim.step_world(time_step)
+            stage_times["physics_substep"].append(time.perf_counter() - t_start)
+
+        for _ in range(num_steps):
+            t_start = time.perf_counter()
+            sim.get_sensor_observations()
+            stage_times["render"].append(time.perf_counter() - t_start)
+    finally:
+        sim.close()
+
+    return {
+        stage: {
+            "mean": 1000.0 * float(np.mean(times)),
+            "p95": 1000.0 * float(np.percentile(times, 95)),
+        }
+        for stage, times in stage_times.items()
+    }
+
+
+def flatten_result(result: Dict) -> Dict:
+    r"""
+    Flatten the per-stage latencies of a result for CSV output.
+    :param result: one benchmark result
+    :returns: result with one `<stage>_<statistic>_ms` column per latency
+    """
+    flat_result = {k: v for k, v in result.items() if k != "latency_ms"}
+    for stage, latency in result.get("latency_ms", {}).items():
+        for stat_name, stat_value in latency.items():
+            flat_result[f"{stage}_{stat_name}_ms"] = stat_value
+    return flat_result
+
+
+def save_results(results: List[Dict], output_path: str) -> None:
+    r"""
+    Write benchmark results to a CSV file if the path ends with .csv, else
+    to a JSON file. Columns of the CSV file are the union of the fields of
+    all results; fields a result does not have, such as the latencies of a
+    failed configuration, are left empty.
+    :param results: benchmark results
+    :param output_path: path to the output file
+    """
+    if output_path.endswith(".csv"):
+        flat_results = [flatten_result(result) for result in results]
+        fieldnames = list(
+            dict.fromkeys(
+                fieldname
+                for flat_result in flat_results
+                for fieldname in flat_result
+            )
+        )
+        with open(output_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(flat_results)
+    else:
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    # task configs to benchmark; by default every config under configs/
+    parser.add_argument("--task-configs", nargs="+", type=str, default=[])
+    parser.add_argument("--config-dir", type=str, default="configs/")
+    # sensor resolutions to benchmark; 0 keeps the config's own
+    parser.add_argument("--resolutions", nargs="+", type=int, default=[0])
+    parser.add_argument(
+        "--gpu-gpu", nargs="+", type=int, choices=[0, 1], default=[0]
+    )
+    parser.add_argument("--num-resets", type=int, default=5)
+    parser.add_argument("--num-steps", type=int, default=100)
+    parser.add_argument("--time-step", type=float, default=1.0 / 60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    # results are written as CSV if the path ends with .csv, else as JSON
+    parser.add_argument(
+        "--output-path", type=str, default="benchmark_rendering.json"
+    )
+    args = parser.parse_args()
+
+    task_configs = args.task_configs
+    if len(task_configs) == 0:
+        task_configs = sorted(
+            glob.glob(f"{args.config_dir}/**/*.yaml", recursive=True)
+        )
+
+    results = []
+    for task_config in task_configs:
+        for resolution in args.resolutions:
+            for gpu_gpu in args.gpu_gpu:
+                # a config that fails to load or run is recorded and skipped,
+                # so it does not lose the results of the rest of the sweep
+                try:
+                    sim_config = make_sim_config(
+                        task_config, resolution, bool(gpu_gpu)
+                    )
+                    sensors = list(sim_config.AGENT_0.SENSORS)
+                    latency_ms = benchmark_sim(
+                        sim_config,
+                        args.num_resets,
+                        args.num_steps,
+                        args.time_step,
+                        args.seed,
+                    )
+                except Exception as e:
+                    results.append(
+                        {
+                            "task_config": task_config,
+                            "habitat_sim_version": habitat_sim.__version__,
+                            "resolution": resolution,
+                            "gpu_gpu": int(gpu_gpu),
+                            "error": repr(e),
+                        }
+                    )
+                    print(
+                        f"{task_config}: resolution={resolution}, "
+                        f"gpu_gpu={gpu_gpu} failed: {e!r}"
+                    )
+                    continue
+                result = {
+                    "task_config": task_config,
+                    "habitat_sim_version": habitat_sim.__version__,
+                    "sensors": "+".join(sensors),
+                    "num_sensors": len(sensors),
+                    "width": sim_config.RGB_SENSOR.WIDTH
+                    if "RGB_SENSOR" in sensors
+                    else sim_config.DEPTH_SENSOR.WIDTH,
+                    "height": sim_config.RGB_SENSOR.HEIGHT
+                    if "RGB_SENSOR" in sensors
+                    else sim_config.DEPTH_SENSOR.HEIGHT,
+                    "gpu_gpu": int(gpu_gpu),
+                    "latency_ms": latency_ms,
+                }
+                results.append(result)
+
+                print(
+                    f"{task_config}: sensors={result['sensors']}, "
+                    f"size={result['height']}x{result['width']}, gpu_gpu={gpu_gpu}"
+                )
+                for stage in STAGES:
+                    latency = latency_ms[stage]
+                    print(
+                        f"  {stage}: mean {latency['mean']:.3f} ms, "
+                        f"p95 {latency['p95']:.3f} ms"
+                    )
+
+    if args.output_path != "" and len(results) > 0:
+        save_results(results, args.output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+# benchmark the env->agent->env message path of HabitatEnvNode and
+# HabitatAgentNode with a synthetic simulator and a dummy policy. Reports
+# steps/sec, per-stage latency and bytes per step for each transport and
+# depth encoding. Does not require a GPU, a Habitat dataset or a trained
+# model; the "ros" transport additionally requires a running roscore.
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from io import BytesIO
+from threading import Event
+
+import message_filters
+import numpy as np
+import rospy
+from cv_bridge import CvBridge
+from message_filters import TimeSynchronizer
+from ros_x_habitat.msg import PointGoalWithGPSCompass, DepthImage
+from rospy.numpy_msg import numpy_msg
+from sensor_msgs.msg import Image
+
+from src.nodes.habitat_agent_node import HabitatAgentNode
+from src.nodes.habitat_env_node import HabitatEnvNode
+
+TRANSPORTS = ["shim", "ros"]
+# depth_image: custom DepthImage message, used with discrete agents;
+# image_32fc1: sensor_msgs/Image in meters, used with continuous agents
+ENCODINGS = ["depth_image", "image_32fc1"]
+STAGES = [
+    "sim",
+    "env_encode",
+    "transport",
+    "sync",
+    "agent_decode",
+    "policy",
+    "action_encode",
+]
+
+
+class SyntheticSim:
+    r"""
+    Stand-in for a Habitat simulator producing random RGB, depth and
+    pointgoal readings of configurable size.
+    """
+
+    def __init__(self, height: int, width: int, max_depth: float, seed: int):
+        r"""
+        :param height: height of the sensor images
+        :param width: width of the sensor images
+        :param max_depth: depth readings are drawn from [0, max_depth)
+        :param seed: seed of the random number generator
+        """
+        self.height = height
+        self.width = width
+        self.max_depth = max_depth
+        self.rng = np.random.RandomState(seed)
+
+    def get_observations(self):
+        r"""
+        Produce one set of sensor readings.
+        :return: observations in Habitat format
+        """
+        return {
+            "rgb": self.rng.randint(
+                0, 256, size=(self.height, self.width, 3), dtype=np.uint8
+            ),
+            "depth": (
+                self.rng.random_sample((self.height, self.width, 1)) * self.max_depth
+            ).astype(np.float32),
+            "pointgoal_with_gps_compass": self.rng.random_sample((2,)).astype(
+                np.float32
+            ),
+        }
+
+
+class DummyPolicy:
+    r"""
+    Stand-in for a Habitat agent producing random discrete actions.
+    """
+
+    def __init__(self, seed: int):
+        self.rng = np.random.RandomState(seed)
+
+    def act(self, observations):
+        return {"action": int(self.rng.randint(0, 4))}
+
+
+class ShimFilter(message_filters.SimpleFilter):
+    r"""
+    In-process replacement for a message_filters.Subscriber. Messages
+    passed to `deliver()` are fed straight into connected filters.
+    """
+
+    def deliver(self, msg):
+        self.signalMessage(msg)
+
+
+class TransportBenchmark:
+    r"""
+    Drives one env->agent->env round trip per step over a given transport
+    and depth encoding, recording per-stage latencies.
+    """
+
+    def __init__(
+        self,
+        transport: str,
+        encoding: str,
+        height: int,
+        width: int,
+        seed: int,
+        queue_size: int = 10,
+        timeout: float = 5.0,
+    ):
+        r"""
+        :param transport: "shim" to serialize/deserialize messages in
+            process, or "ros" to publish through a local roscore
+        :param encoding: one of ENCODINGS
+        :param height: height of the sensor images
+        :param width: width of the sensor images
+        :param seed: seed of the synthetic simulator and dummy policy
+        :param queue_size: queue size of the time synchronizer
+        :param timeout: seconds to wait for the agent callback when using
+            the ROS transport
+        """
+        assert transport in TRANSPORTS
+        assert encoding in ENCODINGS
+        self.transport = transport
+        self.encoding = encoding
+        self.use_continuous_agent = encoding == "image_32fc1"
+        self.timeout = timeout
+
+        self.sim = SyntheticSim(
+            height, width, 10.0 if self.use_continuous_agent else 1.0, seed
+        )
+        self.policy = DummyPolicy(seed)
+
+        # message types on the agent side
+        self.msg_classes = {
+            "rgb": Image,
+            "depth": Image if self.use_continuous_agent else numpy_msg(DepthImage),
+            "pointgoal_with_gps_compass": PointGoalWithGPSCompass,
+        }
+        self.sensor_uuids = ["rgb", "depth", "pointgoal_with_gps_compass"]
+
+        # set up the agent-facing end of the transport
+        if self.transport == "shim":
+            self.filters = {uuid: ShimFilter() for uuid in self.sensor_uuids}
+        else:
+            self.pubs = {}
+            self.filters = {}
+            env_msg_classes = {
+                "rgb": Image,
+                "depth": Image if self.use_continuous_agent else DepthImage,
+                "pointgoal_with_gps_compass": PointGoalWithGPSCompass,
+            }
+            for uuid in self.sensor_uuids:
+                topic_name = f"benchmark/{encoding}/{uuid}"
+                self.pubs[uuid] = rospy.Publisher(
+                    topic_name, env_msg_classes[uuid], queue_size=queue_size
+                )
+                self.filters[uuid] = message_filters.Subscriber(
+                    topic_name, self.msg_classes[uuid]
+                )
+        self.ts = TimeSynchronizer(
+            [self.filters[uuid] for uuid in self.sensor_uuids],
+            queue_size=queue_size,
+        )
+        self.ts.registerCallback(self.callback_agent)
+
+        if self.transport == "ros":
+            while any(
+                pub.get_num_connections() == 0 for pub in self.pubs.values()
+            ):
+                rospy.sleep(0.01)
+
+        self.callback_done = Event()
+        self.stage_times = defaultdict(list)
+        self.bytes_per_step = []
+        self.t_delivered = 0.0
+        self.t_callback_start = 0.0
+        self.count_steps = 0
+
+    @classmethod
+    def serialize_msg(cls, msg):
+        r"""
+        Serialize a ROS message the way rospy does before sending it.
+        :param msg: ROS message
+        :return: serialized message as bytes
+        """
+        buff = BytesIO()
+        msg.serialize(buff)
+        return buff.getvalue()
+
+    @classmethod
+    def deserialize_msg(cls, msg_class, data):
+        r"""
+        Deserialize a ROS message the way rospy does upon receiving it.
+        :param msg_class: class of the message to deserialize into
+        :param data: serialized message as bytes
+        :return: ROS message
+        """
+        msg = msg_class()
+        msg.deserialize(data)
+        return msg
+
+    def callback_agent(self, rgb_msg, depth_msg, pointgoal_with_gps_compass_msg):
+        r"""
+        Agent side of the round trip: decode the synchronized messages,
+        act and encode the action.
+        """
+        self.t_callback_start = time.perf_counter()
+
+        t_start = time.perf_counter()
+        if self.use_continuous_agent:
+            observations = HabitatAgentNode.msgs_to_obs(
+                rgb_msg=rgb_msg,
+                pointgoal_with_gps_compass_msg=pointgoal_with_gps_compass_msg,
+            )
+            observations["depth"] = np.expand_dims(
+                CvBridge().imgmsg_to_cv2(depth_msg, "passthrough"), 2
+            ).astype(np.float32)
+        else:
+            observations = HabitatAgentNode.msgs_to_obs(
+                rgb_msg=rgb_msg,
+                depth_msg=depth_msg,
+                pointgoal_with_gps_compass_msg=pointgoal_with_gps_compass_msg,
+            )
+        t_end = time.perf_counter()
+        self.stage_times["agent_decode"].append(t_end - t_start)
+
+        t_start = time.perf_counter()
+        action = self.policy.act(observations)
+        t_end = time.perf_counter()
+        self.stage_times["policy"].append(t_end - t_start)
+
+        t_start = time.perf_counter()
+        action_msg = HabitatAgentNode.action_to_msg(action)
+        self.serialize_msg(action_msg)
+        t_end = time.perf_counter()
+        self.stage_times["action_encode"].append(t_end - t_start)
+
+        self.callback_done.set()
+
+    def step(self):
+        r"""
+        Run one env->agent->env round trip.
+        """
+        self.callback_done.clear()
+        self.count_steps += 1
+
+        t_start = time.perf_counter()
+        observations_hab = self.sim.get_observations()
+        t_end = time.perf_counter()
+        self.stage_times["sim"].append(t_end - t_start)
+
+        # use strictly increasing stamps so the synchronizer never
+        # matches messages across steps
+        t_start = time.perf_counter()
+        observations_ros = HabitatEnvNode.obs_to_msgs(
+            observations_hab,
+            self.use_continuous_agent,
+            stamp=rospy.Time(self.count_steps),
+        )
+        t_end = time.perf_counter()
+        self.stage_times["env_encode"].append(t_end - t_start)
+
+        num_bytes = 0
+        if self.transport == "shim":
+            t_start = time.perf_counter()
+            msgs_rx = {}
+            for uuid in self.sensor_uuids:
+                data = self.serialize_msg(observations_ros[uuid])
+                num_bytes += len(data)
+                msgs_rx[uuid] = self.deserialize_msg(self.msg_classes[uuid], data)
+            t_end = time.perf_counter()
+            self.stage_times["transport"].append(t_end - t_start)
+
+            self.t_delivered = time.perf_counter()
+            for uuid in self.sensor_uuids:
+                self.filters[uuid].deliver(msgs_rx[uuid])
+        else:
+            for uuid in self.sensor_uuids:
+                num_bytes += len(self.serialize_msg(observations_ros[uuid]))
+            t_start = time.perf_counter()
+            for uuid in self.sensor_uuids:
+                self.pubs[uuid].publish(observations_ros[uuid])
+            self.t_delivered = t_start
+            if not self.callback_done.wait(self.timeout):
+                raise RuntimeError(
+                    f"agent callback not invoked within {self.timeout} seconds"
+                )
+        assert self.callback_done.is_set()
+
+        # for the ROS transport, "transport" covers everything from the
+        # first publish until the synchronized callback starts; the time
+        # spent in the synchronizer cannot be told apart, so "sync" is not
+        # recorded
+        if self.transport == "shim":
+            self.stage_times["sync"].append(self.t_callback_start - self.t_delivered)
+        else:
+            self.stage_times["transport"].append(
+                self.t_callback_start - self.t_delivered
+            )
+        self.bytes_per_step.append(num_bytes)
+
+    def run(self, num_steps: int, num_warmup_steps: int):
+        r"""
+        Run the benchmark. Stages not measured by the transport, such as
+        "sync" for the ROS transport, are left out of the latencies.
+        :param num_steps: number of timed steps
+        :param num_warmup_steps: number of untimed steps to run first
+        :return: dictionary of results
+        """
+        for _ in range(num_warmup_steps):
+            self.step()
+        self.stage_times = defaultdict(list)
+        self.bytes_per_step = []
+
+        t_start = time.perf_counter()
+        for _ in range(num_steps):
+            self.step()
+        t_elapsed = time.perf_counter() - t_start
+
+        return {
+            "transport": self.transport,
+            "encoding": self.encoding,
+            "height": self.sim.height,
+            "width": self.sim.width,
+            "num_steps": num_steps,
+            "steps_per_sec": num_steps / t_elapsed,
+            "bytes_per_step": float(np.mean(self.bytes_per_step)),
+            "latency_ms": {
+                stage: {
+                    "mean": 1000.0 * float(np.mean(self.stage_times[stage])),
+                    "p95": 1000.0 * float(np.percentile(self.stage_times[stage], 95)),
+                }
+                for stage in STAGES
+                if len(self.stage_times[stage]) > 0
+            },
+        }
+
+
+def print_results(results):
+    for result in results:
+        print(
+            f"transport={result['transport']}, encoding={result['encoding']}, "
+            f"size={result['height']}x{result['width']}"
+        )
+        print(f"  steps/sec: {result['steps_per_sec']:.2f}")
+        print(f"  bytes/step: {result['bytes_per_step']:.0f}")
+        for stage in STAGES:
+            if stage not in result["latency_ms"]:
+                print(f"  {stage}: not measured, included in transport")
+                continue
+            latency = result["latency_ms"][stage]
+            print(
+                f"  {stage}: mean {latency['mean']:.3f} ms, p95 {latency['p95']:.3f} ms"
+            )
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--transports", nargs="+", default=["shim"], choices=TRANSPORTS
+    )
+    parser.add_argument(
+        "--encodings", nargs="+", default=ENCODINGS, choices=ENCODINGS
+    )
+    parser.add_argument("--height", type=int, default=256)
+    parser.add_argument("--width", type=int, default=256)
+    parser.add_argument("--num-steps", type=int, default=200)
+    parser.add_argument("--num-warmup-steps", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output-path", type=str, default="")
+    args = parser.parse_args()
+
+    if "ros" in args.transports:
+        rospy.init_node("benchmark_ros_transport")
+
+    results = []
+    for transport in args.transports:
+        for encoding in args.encodings:
+            benchmark = TransportBenchmark(
+                transport=transport,
+                encoding=encoding,
+                height=args.height,
+                width=args.width,
+                seed=args.seed,
+            )
+            results.append(benchmark.run(args.num_steps, args.num_warmup_steps))
+
+    print_results(results)
+    if args.output_path != "":
+        with open(args.output_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
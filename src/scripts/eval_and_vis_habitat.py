@@ -32,6 +32,10 @@ def main():
     parser.add_argument("--map-dir", type=str, default="habitat_maps/")
     parser.add_argument("--make-plots", default=False, action="store_true")
     parser.add_argument("--plot-dir", type=str, default="plots/")
+    parser.add_argument("--trajectory-dir", type=str, default="")
+    # skip episodes already finished by an earlier, interrupted run with the
+    # same --log-dir; overrides --episode-id and --scene-id
+    parser.add_argument("--resume", default=False, action="store_true")
     args = parser.parse_args()
 
     # get exp config
@@ -90,6 +94,12 @@ def main():
         # create (per-episode) log dir
         os.makedirs(name=f"{args.log_dir}/seed={seed}", exist_ok=True)
 
+        # create (per-episode) trajectory dir
+        trajectory_dir_per_seed = ""
+        if args.trajectory_dir != "":
+            trajectory_dir_per_seed = f"{args.trajectory_dir}/seed={seed}"
+            os.makedirs(name=trajectory_dir_per_seed, exist_ok=True)
+
         # evaluate
         metrics_and_maps = evaluator.evaluate_and_get_maps(
             episode_id_last=args.episode_id,
@@ -97,10 +107,20 @@ def main():
             log_dir=f"{args.log_dir}/seed={seed}",
             agent_seed=seed,
             map_height=200,
+            trajectory_dir=trajectory_dir_per_seed,
+            resume=args.resume,
         )
 
-        # extract top-down-maps
-        maps_per_seed = evaluator.extract_metrics(metrics_and_maps, ["top_down_map"])
+        # extract top-down-maps. Episodes restored from an earlier run have
+        # no map
+        maps_per_seed = evaluator.extract_metrics(
+            {
+                episode_identifier: episode_metrics
+                for episode_identifier, episode_metrics in metrics_and_maps.items()
+                if "top_down_map" in episode_metrics
+            },
+            ["top_down_map"],
+        )
         maps.append(maps_per_seed)
 
         # extract other metrics
@@ -136,7 +156,12 @@ def main():
         if len(maps) > 0:
             for episode_identifier, _ in maps[0].items():
                 # plot maps for each episode. Here we assume the same
-                # episode has been evaluated with all seeds
+                # episode has been evaluated with all seeds; skip episodes
+                # whose maps were not produced in this run
+                if not all(
+                    episode_identifier in maps_per_seed for maps_per_seed in maps
+                ):
+                    continue
                 maps_per_episode = []
                 for seed_index in range(len(seeds)):
                     maps_per_episode.append(
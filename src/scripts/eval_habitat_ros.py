@@ -7,38 +7,32 @@ from collections import defaultdict
 from habitat.config.default import get_config
 
 from src.evaluators.habitat_ros_evaluator import HabitatROSEvaluator
+from src.evaluators.habitat_ros_node_pool import HabitatROSNodePool
 
 from src.utils import utils_logging, utils_files
 
 
-def main():
-    # parse input arguments
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--input-type",
-        default="blind",
-        choices=["blind", "rgb", "depth", "rgbd"],
-    )
-    parser.add_argument("--model-path", default="", type=str)
-    parser.add_argument(
-        "--task-config", type=str, default="configs/pointnav_d_orignal.yaml"
-    )
-    parser.add_argument("--episode-id", type=str, default="-1")
-    parser.add_argument(
-        "--scene-id",
-        type=str,
-        default="data/scene_datasets/habitat-test-scenes/skokloster-castle.glb",
-    )
-    parser.add_argument("--seed-file-path", type=str, default="seeds/seed=7.csv")
-    parser.add_argument("--sensor-pub-rate", type=float, default=5.0)
-    parser.add_argument(
-        "--do-not-start-nodes-from-evaluator", default=False, action="store_true"
-    )
-    parser.add_argument("--log-dir", type=str, default="logs/")
-    args = parser.parse_args()
-
+def evaluate_config(
+    task_config: str,
+    input_type: str,
+    model_path: str,
+    args: argparse.Namespace,
+    log_dir: str,
+    node_pool: HabitatROSNodePool,
+) -> None:
+    r"""
+    Evaluate an agent in the environment specified by one task config,
+    over all seeds.
+    :param task_config: path to the task config
+    :param input_type: agent's input type
+    :param model_path: path to agent's model
+    :param args: parsed command line arguments
+    :param log_dir: directory to save logs of this config
+    :param node_pool: pool to lease env/agent nodes from; None to let the
+        evaluator start its own nodes
+    """
     # get exp config
-    exp_config = get_config(args.task_config)
+    exp_config = get_config(task_config)
 
     # get seeds if provided; otherwise use default seed from Habitat
     seeds = []
@@ -48,11 +42,11 @@ def main():
         seeds = [exp_config.SEED]
 
     # create log dir
-    os.makedirs(name=f"{args.log_dir}", exist_ok=True)
+    os.makedirs(name=f"{log_dir}", exist_ok=True)
 
     # create logger and log experiment settings
     logger = utils_logging.setup_logger(
-        __name__, f"{args.log_dir}/summary-all_seeds.log"
+        f"{__name__}-{log_dir}", f"{log_dir}/summary-all_seeds.log"
     )
     logger.info("Experiment configuration:")
     logger.info(exp_config)
@@ -63,28 +57,32 @@ def main():
         logger.info("Instantiating continuous simulator with dynamics")
         # TODO: pass in control period
         evaluator = HabitatROSEvaluator(
-            config_paths=args.task_config,
-            input_type=args.input_type,
-            model_path=args.model_path,
+            config_paths=task_config,
+            input_type=input_type,
+            model_path=model_path,
             enable_physics=True,
             node_name="habitat_ros_evaluator_node",
             env_node_name="env_node",
             agent_node_name="agent_node",
             sensor_pub_rate=args.sensor_pub_rate,
             do_not_start_nodes=args.do_not_start_nodes_from_evaluator,
+            node_pool=node_pool,
+            num_envs=args.num_envs,
         )
     elif "SIMULATOR" in exp_config:
         logger.info("Instantiating discrete simulator")
         evaluator = HabitatROSEvaluator(
-            config_paths=args.task_config,
-            input_type=args.input_type,
-            model_path=args.model_path,
+            config_paths=task_config,
+            input_type=input_type,
+            model_path=model_path,
             enable_physics=False,
             node_name="habitat_ros_evaluator_node",
             env_node_name="env_node",
             agent_node_name="agent_node",
             sensor_pub_rate=args.sensor_pub_rate,
             do_not_start_nodes=args.do_not_start_nodes_from_evaluator,
+            node_pool=node_pool,
+            num_envs=args.num_envs,
         )
     else:
         logger.info("Simulator not properly specified")
@@ -95,17 +93,17 @@ def main():
     for seed in seeds:
         # create logger for each seed and log the seed
         logger_per_seed = utils_logging.setup_logger(
-            f"{__name__}-seed={seed}", f"{args.log_dir}/summary-seed={seed}.log"
+            f"{__name__}-{log_dir}-seed={seed}", f"{log_dir}/summary-seed={seed}.log"
         )
         logger_per_seed.info(f"Seed = {seed}")
 
         # create (per-episode) log dir
-        os.makedirs(name=f"{args.log_dir}/seed={seed}", exist_ok=True)
+        os.makedirs(name=f"{log_dir}/seed={seed}", exist_ok=True)
 
         dict_of_metrics = evaluator.evaluate(
             episode_id_last=args.episode_id,
             scene_id_last=args.scene_id,
-            log_dir=f"{args.log_dir}/seed={seed}",
+            log_dir=f"{log_dir}/seed={seed}",
             agent_seed=seed,
         )
 
@@ -122,9 +120,13 @@ def main():
         utils_logging.close_logger(logger_per_seed)
     logger.info("Evaluation ended")
 
-    # gracefully shutdown the env node and the agent node
-    evaluator.shutdown_env_node()
-    evaluator.shutdown_agent_node()
+    if node_pool is not None:
+        # return the nodes to the pool so the next config can reuse them
+        evaluator.release()
+    else:
+        # gracefully shutdown the env node and the agent node
+        evaluator.shutdown_env_node()
+        evaluator.shutdown_agent_node()
 
     # log average metrics across all seeds
     avg_metrics = evaluator.compute_avg_metrics(avg_metrics_all_seeds)
@@ -135,5 +137,83 @@ def main():
     utils_logging.close_logger(logger)
 
 
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    # --input-type and --model-path take either one value shared by all
+    # task configs, or one value per task config
+    parser.add_argument(
+        "--input-type",
+        nargs="+",
+        default=["blind"],
+        choices=["blind", "rgb", "depth", "rgbd"],
+    )
+    parser.add_argument("--model-path", nargs="+", default=[""], type=str)
+    # evaluating several task configs in one run lets them share warm
+    # env/agent nodes
+    parser.add_argument(
+        "--task-config",
+        nargs="+",
+        type=str,
+        default=["configs/pointnav_d_orignal.yaml"],
+    )
+    parser.add_argument("--episode-id", type=str, default="-1")
+    parser.add_argument(
+        "--scene-id",
+        type=str,
+        default="data/scene_datasets/habitat-test-scenes/skokloster-castle.glb",
+    )
+    parser.add_argument("--seed-file-path", type=str, default="seeds/seed=7.csv")
+    parser.add_argument("--sensor-pub-rate", type=float, default=5.0)
+    # evaluate episodes concurrently in this many environments, hosted by
+    # one multi-env node
+    parser.add_argument("--num-envs", type=int, default=1)
+    parser.add_argument(
+        "--do-not-start-nodes-from-evaluator", default=False, action="store_true"
+    )
+    parser.add_argument("--log-dir", type=str, default="logs/")
+    args = parser.parse_args()
+
+    num_configs = len(args.task_config)
+    input_types = args.input_type
+    if len(input_types) == 1:
+        input_types = input_types * num_configs
+    model_paths = args.model_path
+    if len(model_paths) == 1:
+        model_paths = model_paths * num_configs
+    assert len(input_types) == num_configs and len(model_paths) == num_configs
+
+    # with several configs, lease nodes from a shared pool unless nodes are
+    # started externally. The pool only holds single-env nodes, and runs
+    # them under its own namespaces, so a single config keeps the fixed
+    # node names
+    node_pool = None
+    if (
+        num_configs > 1
+        and not args.do_not_start_nodes_from_evaluator
+        and args.num_envs == 1
+    ):
+        node_pool = HabitatROSNodePool(
+            env_node_name="env_node", agent_node_name="agent_node"
+        )
+
+    for task_config, input_type, model_path in zip(
+        args.task_config, input_types, model_paths
+    ):
+        # with several configs, keep logs of each in its own directory
+        log_dir = args.log_dir
+        if num_configs > 1:
+            # include the parent directory, since configs of different
+            # settings may share a file name
+            config_name = os.path.splitext(os.path.basename(task_config))[0]
+            config_dir_name = os.path.basename(os.path.dirname(task_config))
+            log_dir = f"{args.log_dir}/{config_dir_name}-{config_name}"
+        evaluate_config(task_config, input_type, model_path, args, log_dir, node_pool)
+
+    # gracefully shutdown all env nodes and agent nodes
+    if node_pool is not None:
+        node_pool.shutdown()
+
+
 if __name__ == "__main__":
     main()
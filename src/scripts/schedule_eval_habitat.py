@@ -0,0 +1,160 @@
+import argparse
+import os
+from typing import Dict, List, Tuple
+
+from habitat.config.default import get_config
+from habitat.datasets import make_dataset
+
+from src.evaluators.habitat_evaluator import HabitatEvaluator
+from src.utils import utils_logging, utils_files, utils_scheduler
+
+
+def load_episodes_per_config(
+    task_configs: List[str], episode_subset: List[Tuple[str, str]]
+) -> Dict[str, List[Tuple[str, str]]]:
+    r"""
+    Load the identifiers of episodes to evaluate from each config's dataset.
+    :param task_configs: paths to task configs
+    :param episode_subset: if not empty, only keep these (episode ID,
+        scene ID) pairs
+    :returns: for each config, (episode ID, scene ID) pairs in dataset order
+    """
+    episodes_per_config = {}
+    for task_config in task_configs:
+        exp_config = get_config(task_config)
+        dataset = make_dataset(
+            id_dataset=exp_config.DATASET.TYPE, config=exp_config.DATASET
+        )
+        episodes = [
+            (str(episode.episode_id), episode.scene_id) for episode in dataset.episodes
+        ]
+        if len(episode_subset) > 0:
+            episode_subset_set = set(episode_subset)
+            episodes = [episode for episode in episodes if episode in episode_subset_set]
+        episodes_per_config[task_config] = episodes
+    return episodes_per_config
+
+
+def get_log_dir_per_config(log_dir: str, task_config: str) -> str:
+    # include the parent directory, since configs of different settings may
+    # share a file name
+    config_name = os.path.splitext(os.path.basename(task_config))[0]
+    config_dir_name = os.path.basename(os.path.dirname(task_config))
+    return f"{log_dir}/{config_dir_name}-{config_name}"
+
+
+def make_evaluator(task_config: str, input_type: str, model_path: str):
+    exp_config = get_config(task_config)
+    if "PHYSICS_SIMULATOR" in exp_config:
+        enable_physics = True
+    elif "SIMULATOR" in exp_config:
+        enable_physics = False
+    else:
+        raise NotImplementedError
+    return HabitatEvaluator(
+        config_paths=task_config,
+        input_type=input_type,
+        model_path=model_path,
+        enable_physics=enable_physics,
+    )
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input-type",
+        default="blind",
+        choices=["blind", "rgb", "depth", "rgbd"],
+    )
+    parser.add_argument("--model-path", default="", type=str)
+    parser.add_argument("--task-configs", nargs="+", type=str, required=True)
+    parser.add_argument("--seed-file-path", type=str, default="seeds/seed=7.csv")
+    # optional subset of episodes to evaluate from every config
+    parser.add_argument("--episodes-file-path", default="", type=str)
+    parser.add_argument(
+        "--episodes-file-has-header", default=False, action="store_true"
+    )
+    parser.add_argument("--log-dir", type=str, default="logs/")
+    # the queue file of each worker lives here; re-running with the same
+    # arguments resumes from it
+    parser.add_argument("--queue-dir", type=str, default="eval_queues/")
+    parser.add_argument("--num-workers", type=int, default=1)
+    parser.add_argument("--worker-id", type=int, default=0)
+    args = parser.parse_args()
+    assert 0 <= args.worker_id < args.num_workers
+
+    # create queue dir and logger
+    os.makedirs(name=f"{args.queue_dir}", exist_ok=True)
+    os.makedirs(name=f"{args.log_dir}", exist_ok=True)
+    logger = utils_logging.setup_logger(
+        __name__, f"{args.log_dir}/summary-worker={args.worker_id}.log"
+    )
+
+    def make_units_of_worker():
+        seeds = utils_files.load_seeds_from_file(args.seed_file_path)
+        episode_subset = []
+        if args.episodes_file_path != "":
+            episode_ids, scene_ids = utils_files.load_episode_identifiers(
+                episodes_to_visualize_file_path=args.episodes_file_path,
+                has_header=args.episodes_file_has_header,
+            )
+            episode_subset = list(zip(episode_ids, scene_ids))
+        units = utils_scheduler.make_work_units(
+            load_episodes_per_config(args.task_configs, episode_subset), seeds
+        )
+        return utils_scheduler.assign_work_units(units, args.num_workers)[
+            args.worker_id
+        ]
+
+    queue = utils_scheduler.WorkQueue.load_or_create(
+        f"{args.queue_dir}/worker={args.worker_id}-of-{args.num_workers}.json",
+        make_units_of_worker,
+    )
+    pending_units = queue.get_pending_units()
+    logger.info(
+        f"{len(pending_units)} of {len(queue.units)} work units pending on "
+        f"worker {args.worker_id}"
+    )
+
+    # units of the same config and scene are adjacent, so each config's
+    # environment is built once and each scene loaded once
+    evaluator = None
+    evaluator_config = None
+    for unit_index, unit in pending_units:
+        if unit["config_path"] != evaluator_config:
+            if evaluator is not None:
+                evaluator.env.close()
+            evaluator_config = unit["config_path"]
+            evaluator = make_evaluator(
+                evaluator_config, args.input_type, args.model_path
+            )
+
+        seed = unit["seed"]
+        log_dir_per_seed = (
+            f"{get_log_dir_per_config(args.log_dir, evaluator_config)}/seed={seed}"
+        )
+        os.makedirs(name=log_dir_per_seed, exist_ok=True)
+        logger.info(
+            f"Evaluating {len(unit['episodes'])} episodes of scene "
+            f"{unit['scene_id']} from {evaluator_config} with seed {seed}"
+        )
+        evaluator.evaluate_and_get_maps(
+            log_dir=log_dir_per_seed,
+            agent_seed=seed,
+            map_height=200,
+            episode_identifiers=[tuple(episode) for episode in unit["episodes"]],
+            # units of different scenes share a log dir, and the journal in
+            # it also lets an interrupted unit skip its finished episodes
+            resume=True,
+        )
+        queue.mark_done(unit_index)
+
+    if evaluator is not None:
+        evaluator.env.close()
+    logger.info("Evaluation ended")
+    utils_logging.close_logger(logger)
+
+
+if __name__ == "__main__":
+    main()
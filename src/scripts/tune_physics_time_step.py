@@ -0,0 +1,284 @@
+# sweep the physics time step and control period of a Nav-Phys task over a
+# set of episodes. For each (time step, control period) pair, reports the
+# simulation wall time per discrete action and the actuation error against
+# SIMULATOR.FORWARD_STEP_SIZE/TURN_ANGLE, finds the Pareto frontier, and
+# optionally writes the chosen pair into the PHYSICS_SIMULATOR section of a
+# task config.
+
+import argparse
+import csv
+import math
+import time
+from typing import Dict, List
+
+import numpy as np
+import yaml
+from habitat.config.default import get_config
+from habitat.sims.habitat_simulator.actions import HabitatSimActions
+from habitat.utils.geometry_utils import angle_between_quaternions
+
+from src.envs.habitat_eval_rlenv import HabitatEvalRLEnv
+from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
+
+ACTIONS = [
+    HabitatSimActions.MOVE_FORWARD,
+    HabitatSimActions.TURN_LEFT,
+    HabitatSimActions.TURN_RIGHT,
+]
+OBJECTIVES = ["wall_time_per_action", "translation_error", "rotation_error"]
+
+
+def measure_pair(
+    env: HabitatEvalRLEnv,
+    time_step: float,
+    control_period: float,
+    num_episodes: int,
+    num_actions_per_episode: int,
+    seed: int,
+) -> Dict[str, float]:
+    r"""
+    Act in the first episodes of `env` with one time step and control
+    period. Every pair sees the same episodes and action sequences.
+    :param env: environment with physics enabled
+    :param time_step: physics time step, in seconds
+    :param control_period: duration of a discrete action, in seconds
+    :param num_episodes: number of episodes to act in
+    :param num_actions_per_episode: number of actions taken per episode
+    :param seed: seed of the action sequences
+    :returns: dictionary of measurements
+    """
+    sim = env._env._sim
+    forward_step_size = sim.habitat_config.FORWARD_STEP_SIZE
+    turn_angle = sim.habitat_config.TURN_ANGLE
+
+    wall_times = []
+    translation_errors = []
+    rotation_errors = []
+    count_collisions = 0
+    env.reset_episode_iterator()
+    for episode_index in range(num_episodes):
+        env.reset()
+        rng = np.random.RandomState(seed + episode_index)
+        for action in rng.choice(ACTIONS, size=num_actions_per_episode):
+            state_before = sim.get_agent_state()
+            t_start = time.perf_counter()
+            env.step(
+                int(action), time_step=time_step, control_period=control_period
+            )
+            wall_times.append(time.perf_counter() - t_start)
+            state_after = sim.get_agent_state()
+
+            # actions that hit an obstacle are not expected to reach
+            # the target displacement
+            if sim.previous_step_collided:
+                count_collisions += 1
+                continue
+            if action == HabitatSimActions.MOVE_FORWARD:
+                displacement = np.linalg.norm(
+                    state_after.position - state_before.position
+                )
+                translation_errors.append(abs(displacement - forward_step_size))
+            else:
+                angle_diff = math.degrees(
+                    angle_between_quaternions(
+                        state_after.rotation, state_before.rotation
+                    )
+                )
+                rotation_errors.append(abs(angle_diff - turn_angle))
+
+    wall_time_per_action = float(np.mean(wall_times))
+    return {
+        "time_step": time_step,
+        "control_period": control_period,
+        "wall_time_per_action": wall_time_per_action,
+        # simulated seconds per wall-clock second
+        "real_time_factor": control_period / wall_time_per_action,
+        "translation_error": float(np.mean(translation_errors))
+        if len(translation_errors) > 0
+        else float("nan"),
+        "rotation_error": float(np.mean(rotation_errors))
+        if len(rotation_errors) > 0
+        else float("nan"),
+        "num_actions": len(wall_times),
+        "num_collisions": count_collisions,
+    }
+
+
+def get_pareto_frontier(results: List[Dict[str, float]]) -> List[Dict[str, float]]:
+    r"""
+    Get the results not dominated by any other result, i.e. no other result
+    is at least as good in every objective and better in one.
+    :param results: measurements from measure_pair()
+    :returns: the Pareto-optimal results, fastest first
+    """
+    frontier = []
+    for result in results:
+        dominated = False
+        for other in results:
+            if other is result:
+                continue
+            if all(other[k] <= result[k] for k in OBJECTIVES) and any(
+                other[k] < result[k] for k in OBJECTIVES
+            ):
+                dominated = True
+                break
+        if not dominated:
+            frontier.append(result)
+    return sorted(frontier, key=lambda result: result["wall_time_per_action"])
+
+
+def choose_pair(
+    frontier: List[Dict[str, float]],
+    max_translation_error: float,
+    max_rotation_error: float,
+    forward_step_size: float,
+    turn_angle: float,
+) -> Dict[str, float]:
+    r"""
+    Choose the fastest Pareto-optimal result within the error tolerances. If
+    none is, choose the one with the least relative actuation error.
+    :param frontier: Pareto frontier from get_pareto_frontier()
+    :param max_translation_error: tolerated translation error, in meters
+    :param max_rotation_error: tolerated rotation error, in degrees
+    :param forward_step_size: displacement of a forward action, in meters
+    :param turn_angle: angle of a turn action, in degrees
+    :returns: the chosen result
+    """
+    for result in frontier:
+        if (
+            result["translation_error"] <= max_translation_error
+            and result["rotation_error"] <= max_rotation_error
+        ):
+            return result
+    return min(
+        frontier,
+        key=lambda result: result["translation_error"] / forward_step_size
+        + result["rotation_error"] / turn_angle,
+    )
+
+
+def write_pair_to_config(
+    task_config: str, output_config_path: str, time_step: float, control_period: float
+) -> None:
+    r"""
+    Write a time step and control period into the PHYSICS_SIMULATOR section
+    of a task config, keeping all its other keys.
+    :param task_config: path to the task config to read
+    :param output_config_path: path to write the updated config to. Can be
+        `task_config` itself
+    :param time_step: physics time step, in seconds
+    :param control_period: duration of a discrete action, in seconds
+    """
+    with open(task_config, "r") as f:
+        config_dict = yaml.safe_load(f)
+    physics_sim_config = config_dict.setdefault("PHYSICS_SIMULATOR", {})
+    physics_sim_config["TIME_STEP"] = float(time_step)
+    physics_sim_config["CONTROL_PERIOD"] = float(control_period)
+    with open(output_config_path, "w") as f:
+        yaml.safe_dump(config_dict, f, default_flow_style=None, sort_keys=False)
+
+
+def main():
+    # parse input arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--task-config", type=str, default="configs/pointnav_rgbd_with_physics.yaml"
+    )
+    parser.add_argument(
+        "--time-steps",
+        nargs="+",
+        type=float,
+        default=[1.0 / 240.0, 1.0 / 120.0, 1.0 / 60.0, 1.0 / 30.0],
+    )
+    parser.add_argument(
+        "--control-periods", nargs="+", type=float, default=[0.25, 0.5, 1.0]
+    )
+    parser.add_argument("--num-episodes", type=int, default=5)
+    parser.add_argument("--num-actions-per-episode", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    # tolerances used to choose a pair on the Pareto frontier
+    parser.add_argument("--max-translation-error", type=float, default=0.01)
+    parser.add_argument("--max-rotation-error", type=float, default=0.5)
+    parser.add_argument("--output-path", type=str, default="")
+    # if given, write the chosen pair into this copy of the task config
+    parser.add_argument("--output-config-path", type=str, default="")
+    args = parser.parse_args()
+
+    # build the environment once; time step and control period are
+    # passed to each step
+    config = get_config(args.task_config)
+    assert "PHYSICS_SIMULATOR" in config
+    HabitatSimEvaluator.overwrite_simulator_config(config)
+    env = HabitatEvalRLEnv(config=config, enable_physics=True)
+
+    results = []
+    for time_step in args.time_steps:
+        for control_period in args.control_periods:
+            result = measure_pair(
+                env,
+                time_step,
+                control_period,
+                args.num_episodes,
+                args.num_actions_per_episode,
+                args.seed,
+            )
+            results.append(result)
+            print(
+                f"time_step={time_step:.5f}, control_period={control_period:.3f}: "
+                f"{1000.0 * result['wall_time_per_action']:.1f} ms/action, "
+                f"real-time factor {result['real_time_factor']:.1f}, "
+                f"translation error {result['translation_error']:.4f} m, "
+                f"rotation error {result['rotation_error']:.3f} deg"
+            )
+    forward_step_size = config.SIMULATOR.FORWARD_STEP_SIZE
+    turn_angle = config.SIMULATOR.TURN_ANGLE
+    env.close()
+
+    # pairs without an error estimate cannot be compared
+    comparable_results = [
+        result
+        for result in results
+        if not math.isnan(result["translation_error"])
+        and not math.isnan(result["rotation_error"])
+    ]
+    assert len(comparable_results) > 0, "No pair has a complete error estimate"
+    frontier = get_pareto_frontier(comparable_results)
+    print("Pareto frontier:")
+    for result in frontier:
+        print(
+            f"  time_step={result['time_step']:.5f}, "
+            f"control_period={result['control_period']:.3f}"
+        )
+    chosen = choose_pair(
+        frontier,
+        args.max_translation_error,
+        args.max_rotation_error,
+        forward_step_size,
+        turn_angle,
+    )
+    print(
+        f"Chosen: time_step={chosen['time_step']:.5f}, "
+        f"control_period={chosen['control_period']:.3f}"
+    )
+
+    if args.output_path != "":
+        with open(args.output_path, "w", newline="") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=list(results[0].keys()) + ["pareto_optimal"]
+            )
+            writer.writeheader()
+            for result in results:
+                writer.writerow(
+                    dict(result, pareto_optimal=int(any(r is result for r in frontier)))
+                )
+    if args.output_config_path != "":
+        write_pair_to_config(
+            args.task_config,
+            args.output_config_path,
+            chosen["time_step"],
+            chosen["control_period"],
+        )
+
+
+if __name__ == "__main__":
+    main()
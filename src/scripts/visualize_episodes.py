@@ -7,6 +7,12 @@ from typing import Dict, List
 import numpy as np
 
 
+def get_trajectory_dir_per_seed(trajectory_dir: str, seed: int) -> str:
+    if trajectory_dir == "":
+        return ""
+    return f"{trajectory_dir}/seed={seed}"
+
+
 def main():
     # parse input arguments
     parser = argparse.ArgumentParser()
@@ -29,6 +35,9 @@ def main():
     parser.add_argument("--make-blank-maps", default=False, action="store_true")
     parser.add_argument("--map-height", type=int, default=200)
     parser.add_argument("--map-dir", type=str, default="habitat_maps/")
+    # if given, replay trajectories recorded by eval_and_vis_habitat.py
+    # instead of re-running the agent
+    parser.add_argument("--trajectory-dir", type=str, default="")
 
     args = parser.parse_args()
 
@@ -73,7 +82,12 @@ def main():
         os.makedirs(name=f"{exp_config.VIDEO_DIR}", exist_ok=True)
 
         for seed in seeds:
-            evaluator.generate_videos(episode_ids, scene_ids, seed)
+            evaluator.generate_videos(
+                episode_ids,
+                scene_ids,
+                seed,
+                trajectory_dir=get_trajectory_dir_per_seed(args.trajectory_dir, seed),
+            )
 
     # evaluate and visualize top-down maps with agent position, shortest
     # and actual path
@@ -88,7 +102,11 @@ def main():
 
         for seed in seeds:
             maps_one_seed = evaluator.generate_maps(
-                episode_ids, scene_ids, seed, args.map_height
+                episode_ids,
+                scene_ids,
+                seed,
+                args.map_height,
+                trajectory_dir=get_trajectory_dir_per_seed(args.trajectory_dir, seed),
             )
             # add map from each episode to maps
             for episode_id, scene_id in zip(episode_ids, scene_ids):
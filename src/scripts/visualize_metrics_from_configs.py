@@ -13,6 +13,8 @@ def main():
     parser.add_argument("--log-dir-continuous-no-ros", type=str, default="")
     parser.add_argument("--log-dir-continuous-ros", type=str, default="")
     parser.add_argument("--plot-dir", type=str, default="metric_plots/")
+    # number of processes drawing plots; defaults to the number of CPUs
+    parser.add_argument("--num-plot-workers", type=int, default=None)
     parser.add_argument(
         "--plot-pairwise-diff-in-percentage", default=False, action="store_true"
     )
@@ -45,22 +47,21 @@ def main():
         list_of_log_filepaths=list_of_log_filepaths,
     )
 
+    # load the metrics of all configs once, for all plots below
+    df_of_metrics = utils_visualization.load_metrics_dataframe(
+        metrics_list=list_of_dict_of_metrics,
+        labels=[
+            "-physics & -ROS",
+            "-physics & +ROS",
+            "+physics & -ROS",
+            "+physics & +ROS",
+        ],
+    )
+
     # visualize number-of-steps, (per-step)-agent-time, (per-step)-simulation-time
     # with box plots
-    list_of_dict_of_metrics_for_box_plot = []
-    for dict_of_metrics in list_of_dict_of_metrics:
-        # remove other metrics
-        dict_of_metrics_for_box_plot = HabitatSimEvaluator.extract_metrics(
-            dict_of_metrics=dict_of_metrics,
-            metric_names=[
-                NumericalMetrics.SIM_TIME,
-                NumericalMetrics.RESET_TIME,
-                NumericalMetrics.AGENT_TIME,
-            ],
-        )
-        list_of_dict_of_metrics_for_box_plot.append(dict_of_metrics_for_box_plot)
     utils_visualization.visualize_metrics_across_configs_with_box_plots(
-        metrics_list=list_of_dict_of_metrics_for_box_plot,
+        metrics_list=df_of_metrics,
         config_names=[
             "-physics & -ROS",
             "-physics & +ROS",
@@ -69,23 +70,17 @@ def main():
         ],
         configs_or_seeds="configurations",
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
+        metric_names=[
+            NumericalMetrics.SIM_TIME,
+            NumericalMetrics.RESET_TIME,
+            NumericalMetrics.AGENT_TIME,
+        ],
     )
 
     # visualize spl, distance_to_goal, num_steps with histograms
-    list_of_dict_of_metrics_for_histogram = []
-    for dict_of_metrics in list_of_dict_of_metrics:
-        # remove other metrics
-        dict_of_metrics_for_histogram = HabitatSimEvaluator.extract_metrics(
-            dict_of_metrics=dict_of_metrics,
-            metric_names=[
-                NumericalMetrics.DISTANCE_TO_GOAL,
-                NumericalMetrics.SPL,
-                NumericalMetrics.NUM_STEPS,
-            ],
-        )
-        list_of_dict_of_metrics_for_histogram.append(dict_of_metrics_for_histogram)
     utils_visualization.visualize_metrics_across_configs_with_histograms(
-        metrics_list=list_of_dict_of_metrics_for_histogram,
+        metrics_list=df_of_metrics,
         config_names=[
             "(a) -physics & -ROS",
             "(b) -physics & +ROS",
@@ -94,12 +89,18 @@ def main():
         ],
         configs_or_seeds="configurations",
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
+        metric_names=[
+            NumericalMetrics.DISTANCE_TO_GOAL,
+            NumericalMetrics.SPL,
+            NumericalMetrics.NUM_STEPS,
+        ],
     )
 
 
     # visualize success with pie charts
     utils_visualization.visualize_success_across_configs_with_pie_charts(
-        metrics_list=list_of_dict_of_metrics,
+        metrics_list=df_of_metrics,
         config_names=[
             "(a) -physics & -ROS",
             "(b) -physics & +ROS",
@@ -165,6 +166,7 @@ def main():
         ],
         diff_in_percentage=args.plot_pairwise_diff_in_percentage,
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
     )
     # visualize effects of adding ROS (Setting 2 vs 3)
     pairwise_diff_dict_of_metrics = (
@@ -191,6 +193,7 @@ def main():
         ],
         diff_in_percentage=args.plot_pairwise_diff_in_percentage,
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
     )
 
 
@@ -2,7 +2,6 @@ import argparse
 import os
 from src.utils import utils_files, utils_visualization
 from src.constants.constants import NumericalMetrics
-from src.evaluators.habitat_sim_evaluator import HabitatSimEvaluator
 
 
 def main():
@@ -10,6 +9,8 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--log-dir-all-seeds", type=str, default="")
     parser.add_argument("--plot-dir", type=str, default="metric_plots/")
+    # number of processes drawing plots; defaults to the number of CPUs
+    parser.add_argument("--num-plot-workers", type=int, default=None)
     args = parser.parse_args()
 
     # create plot dir
@@ -42,54 +43,46 @@ def main():
         list_of_log_filepaths=list_of_log_filepaths,
     )
 
+    # load the metrics of all seeds once, for all plots below
+    df_of_metrics = utils_visualization.load_metrics_dataframe(
+        metrics_list=list_of_dict_of_metrics, labels=seeds
+    )
+
     # visualize (per-step)-agent-time, (per-step)-simulation-time,
     # (per-episode) reset time
-    list_of_dict_of_metrics_for_box_plot = []
-    for dict_of_metrics in list_of_dict_of_metrics:
-        # remove other metrics
-        dict_of_metrics_for_box_plot = HabitatSimEvaluator.extract_metrics(
-            dict_of_metrics=dict_of_metrics,
-            metric_names=[
-                NumericalMetrics.SIM_TIME,
-                NumericalMetrics.RESET_TIME,
-                NumericalMetrics.AGENT_TIME,
-            ],
-        )
-        list_of_dict_of_metrics_for_box_plot.append(dict_of_metrics_for_box_plot)
     utils_visualization.visualize_metrics_across_configs_with_box_plots(
-        metrics_list=list_of_dict_of_metrics_for_box_plot,
+        metrics_list=df_of_metrics,
         config_names=seeds,
         configs_or_seeds="seeds",
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
+        metric_names=[
+            NumericalMetrics.SIM_TIME,
+            NumericalMetrics.RESET_TIME,
+            NumericalMetrics.AGENT_TIME,
+        ],
     )
 
     # visualize distance-to-goal, spl
-    list_of_dict_of_metrics_for_histogram = []
-    for dict_of_metrics in list_of_dict_of_metrics:
-        # remove other metrics
-        dict_of_metrics_for_histogram = HabitatSimEvaluator.extract_metrics(
-            dict_of_metrics=dict_of_metrics,
-            metric_names=[
-                NumericalMetrics.DISTANCE_TO_GOAL,
-                NumericalMetrics.SPL
-            ],
-        )
-        list_of_dict_of_metrics_for_histogram.append(dict_of_metrics_for_histogram)
     utils_visualization.visualize_metrics_across_configs_with_histograms(
-        metrics_list=list_of_dict_of_metrics_for_histogram,
+        metrics_list=df_of_metrics,
         config_names=seeds,
         configs_or_seeds="seeds",
         plot_dir=args.plot_dir,
+        num_workers=args.num_plot_workers,
+        metric_names=[
+            NumericalMetrics.DISTANCE_TO_GOAL,
+            NumericalMetrics.SPL
+        ],
     )
 
     # visualize success
     utils_visualization.visualize_success_across_configs_with_pie_charts(
-        metrics_list=list_of_dict_of_metrics,
+        metrics_list=df_of_metrics,
         config_names=seeds,
         configs_or_seeds="seeds",
         plot_dir=args.plot_dir,
     )
 
-
 if __name__ == "__main__":
     main()
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import (
     Any,
     List,
@@ -28,6 +29,8 @@ from habitat.sims.habitat_simulator.habitat_simulator import (
 from numpy import ndarray
 
 from src.sims.physics_simulator import PhysicsSimulator
+from src.utils.utils_distance_field import GoalDistanceField
+from src.utils.utils_geodesic import GeodesicDistanceCache
 
 
 @registry.register_simulator(name="Sim-Phys")
@@ -63,6 +66,26 @@ class HabitatPhysicsSim(PhysicsSimulator, Simulator):
             len(self.sim_config.agents[0].action_space)
         )
         self._prev_sim_obs: Optional[Observations] = None
+        # geodesic distances kept across steps, episodes and simulator
+        # restarts; keys include the scene
+        self.geodesic_distance_cache = GeodesicDistanceCache(
+            max_size=self.habitat_config.get("GEODESIC_CACHE_SIZE", 10000),
+            quantum=self.habitat_config.get("GEODESIC_CACHE_QUANTUM", 1e-5),
+        )
+        # optionally answer geodesic distance queries from distance fields
+        # precomputed per scene and goal set. Queries within the exact
+        # radius of a goal still go to the pathfinder
+        self.use_goal_distance_field = self.habitat_config.get(
+            "USE_GOAL_DISTANCE_FIELD", False
+        )
+        self.goal_distance_field_cell_size = self.habitat_config.get(
+            "GOAL_DISTANCE_FIELD_CELL_SIZE", 0.1
+        )
+        self.goal_distance_field_exact_radius = self.habitat_config.get(
+            "GOAL_DISTANCE_FIELD_EXACT_RADIUS", 1.0
+        )
+        self.max_goal_distance_fields = 4
+        self.goal_distance_fields = OrderedDict()
 
     def create_sim_config(
         self, _sensor_suite: SensorSuite
@@ -166,9 +189,12 @@ class HabitatPhysicsSim(PhysicsSimulator, Simulator):
         return observations
 
     def step_physics(
-        self, agent_object: hsim.physics.ManagedRigidObject, time_step: float
+        self,
+        agent_object: hsim.physics.ManagedRigidObject,
+        time_step: float,
+        num_substeps: int = 1,
     ) -> Observations:
-        sim_obs = super().step_physics(agent_object, time_step)
+        sim_obs = super().step_physics(agent_object, time_step, num_substeps)
         self._prev_sim_obs = sim_obs
         observations = self._sensor_suite.get_observations(sim_obs)
         return observations
@@ -214,24 +240,100 @@ class HabitatPhysicsSim(PhysicsSimulator, Simulator):
         position_b: Union[Sequence[float], Sequence[Sequence[float]]],
         episode: Optional[Episode] = None,
     ) -> float:
+        if isinstance(position_b[0], (Sequence, np.ndarray)):
+            requested_ends = np.array(position_b, dtype=np.float32)
+        else:
+            requested_ends = np.array([np.array(position_b, dtype=np.float32)])
+        requested_start = np.array(position_a, dtype=np.float32)
+
+        if self.use_goal_distance_field:
+            distance = self.get_distance_from_field(requested_start, requested_ends)
+            if distance is not None:
+                return distance
+
+        # look up distances computed before from (almost) the same start
+        cache_key = self.geodesic_distance_cache.make_key(
+            self._current_scene, requested_start, requested_ends
+        )
+        distance = self.geodesic_distance_cache.get(cache_key)
+        if distance is not None:
+            return distance
+
         if episode is None or episode._shortest_path_cache is None:
             path = habitat_sim.MultiGoalShortestPath()
-            if isinstance(position_b[0], (Sequence, np.ndarray)):
-                path.requested_ends = np.array(position_b, dtype=np.float32)
-            else:
-                path.requested_ends = np.array([np.array(position_b, dtype=np.float32)])
+            path.requested_ends = requested_ends
         else:
             path = episode._shortest_path_cache
 
-        path.requested_start = np.array(position_a, dtype=np.float32)
+        path.requested_start = requested_start
 
         self.pathfinder.find_path(path)
 
         if episode is not None:
             episode._shortest_path_cache = path
 
+        self.geodesic_distance_cache.put(cache_key, path.geodesic_distance)
         return path.geodesic_distance
 
+    def recompute_navmesh(self, *args, **kwargs) -> bool:
+        r"""
+        Recompute the navmesh, dropping the geodesic distances and distance
+        fields computed on the old one.
+        """
+        navmesh_recomputed = super().recompute_navmesh(*args, **kwargs)
+        self.geodesic_distance_cache.clear()
+        self.goal_distance_fields.clear()
+        return navmesh_recomputed
+
+    def get_goal_distance_field(self, ends: np.ndarray) -> GoalDistanceField:
+        r"""
+        Get the distance field of a goal set in the current scene, building
+        it on first use, e.g. when an episode's measures are reset. The
+        field covers the navigable grid at the height of the first goal.
+        :param ends: (N, 3) array of goal positions
+        :returns: the distance field
+        """
+        key = (
+            self._current_scene,
+            tuple(sorted(set(tuple(np.round(end, 4)) for end in ends.tolist()))),
+        )
+        field = self.goal_distance_fields.get(key)
+        if field is None:
+            lower_bound, _ = self.pathfinder.get_bounds()
+            navigable_grid = self.pathfinder.get_topdown_view(
+                self.goal_distance_field_cell_size, float(ends[0][1])
+            )
+            field = GoalDistanceField(
+                navigable_grid,
+                (lower_bound[0], lower_bound[2]),
+                self.goal_distance_field_cell_size,
+                ends,
+            )
+            self.goal_distance_fields[key] = field
+            if len(self.goal_distance_fields) > self.max_goal_distance_fields:
+                self.goal_distance_fields.popitem(last=False)
+        self.goal_distance_fields.move_to_end(key)
+        return field
+
+    def get_distance_from_field(
+        self, start: np.ndarray, ends: np.ndarray
+    ) -> Optional[float]:
+        r"""
+        Look up the geodesic distance from `start` to the nearest of `ends`
+        in their distance field.
+        :param start: start position
+        :param ends: (N, 3) array of goal positions
+        :returns: the distance, or None if the pathfinder should answer
+            instead: near the goals, on another floor, or off the field
+        """
+        # the field only covers the floor of the goals
+        if abs(start[1] - ends[0][1]) > 0.5:
+            return None
+        distance = self.get_goal_distance_field(ends).get_distance(start)
+        if distance is None or distance < self.goal_distance_field_exact_radius:
+            return None
+        return distance
+
     def action_space_shortest_path(
         self,
         source: AgentState,
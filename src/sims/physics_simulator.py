@@ -16,7 +16,7 @@ class PhysicsSimulator(Simulator):
     object manipulation, and physics simulation.
     """
 
-    def step_physics(self, agent_object, dt):
+    def step_physics(self, agent_object, dt, num_substeps=1):
         r"""
         Step for one frame with physics. Unlike Simulator.step(),
         this method 1) does not complete the given action in one frame,
@@ -24,6 +24,8 @@ class PhysicsSimulator(Simulator):
 
         :param agent_object: the object that the agent embodies in.
         :param dt: simulation time step.
+        :param num_substeps: number of physics steps of length `dt` to
+            simulate before rendering the frame.
 
         :returns: sensor observations from the default agent.
         """
@@ -31,9 +33,11 @@ class PhysicsSimulator(Simulator):
         agent = self.get_agent(self._default_agent_id)
         self._Simulator__last_state[self._default_agent_id] = agent.get_state()
 
-        # step physics by dt
+        # step physics by dt for each substep; sensors are only rendered
+        # once, after the last substep
         step_start_Time = time.time()
-        super().step_world(dt)
+        for _ in range(num_substeps):
+            super().step_world(dt)
         self._previous_step_time = time.time() - step_start_Time
 
         # collision detection
@@ -19,7 +19,6 @@ from habitat.tasks.nav.nav import (
     TurnRightAction,
     StopAction,
 )
-import pandas as pd
 from src.utils.utils_logging import log_continuous_actuation
 
 
@@ -35,9 +34,26 @@ class PhysicsNavigationTask(EmbodiedTask):
         self, config: Config, sim: Simulator, dataset: Optional[Dataset] = None
     ) -> None:
         super().__init__(config=config, sim=sim, dataset=dataset)
-        self.df = pd.DataFrame(columns=["action", "desired_value", "actual_value"])
+        # actuation log, only created when collecting actuation error data
+        self._df = None
         self.df_name = None
 
+    @property
+    def df(self):
+        if self._df is None:
+            # pandas is only needed for actuation logging, so import it
+            # on first use
+            import pandas as pd
+
+            self._df = pd.DataFrame(
+                columns=["action", "desired_value", "actual_value"]
+            )
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+
     def reset(self, episode: Episode):
         observations = self._sim.reset()
         observations.update(
@@ -60,10 +76,13 @@ class PhysicsNavigationTask(EmbodiedTask):
         time_step: float,
         control_period: float,
         agent_object: hsim.physics.ManagedRigidObject,
+        num_substeps: int = 1,
     ):
         if action is None:
-            # step by one frame
-            observations = self._sim.step_physics(agent_object, time_step)
+            # step by one frame, made of num_substeps physics steps
+            observations = self._sim.step_physics(
+                agent_object, time_step, num_substeps
+            )
         else:
             # step multiple frames to complete an action
             if "action_args" not in action or action["action_args"] is None:
@@ -170,25 +189,26 @@ class PhysicsNavigationTask(EmbodiedTask):
             agent_vel_control.linear_velocity = np.float32([0, 0, 0])
             agent_vel_control.angular_velocity = np.float32([0, 0, 0])
         elif isinstance(action, MoveForwardAction):
-            # set linear velocity. 0.25m is defined as _C.SIMULATOR.FORWARD_STEP_SIZE
-            # in habitat/config/default.py. By default, forward movement happens on the
+            # set linear velocity so the agent covers SIMULATOR.FORWARD_STEP_SIZE
+            # in one control period. By default, forward movement happens on the
             # local z axis.
-            # TODO: programmatically load this value
+            forward_step_size = self._sim.habitat_config.FORWARD_STEP_SIZE
             agent_vel_control.linear_velocity = np.float32(
-                [0, 0, -0.25 / control_period]
+                [0, 0, -forward_step_size / control_period]
             )
             agent_vel_control.angular_velocity = np.float32([0, 0, 0])
         elif isinstance(action, TurnLeftAction):
-            # set angular velocity. 10 deg is defined as _C.SIMULATOR.TURN_ANGLE
-            # in habitat/config/default.py. By default, turning left/right is about
-            # the local y axis.
-            # TODO: programmatically load this value
+            # set angular velocity so the agent turns SIMULATOR.TURN_ANGLE
+            # degrees in one control period. By default, turning left/right is
+            # about the local y axis.
+            turn_angle = np.deg2rad(self._sim.habitat_config.TURN_ANGLE)
             agent_vel_control.linear_velocity = np.float32([0, 0, 0])
             agent_vel_control.angular_velocity = np.float32(
-                [0, (np.deg2rad(10.0) / control_period), 0]
+                [0, (turn_angle / control_period), 0]
             )
         elif isinstance(action, TurnRightAction):
+            turn_angle = np.deg2rad(self._sim.habitat_config.TURN_ANGLE)
             agent_vel_control.linear_velocity = np.float32([0, 0, 0])
             agent_vel_control.angular_velocity = np.float32(
-                [0, (np.deg2rad(-10.0) / control_period), 0]
+                [0, (-turn_angle / control_period), 0]
             )
@@ -124,7 +124,7 @@ class MockHabitatROSEvaluator(HabitatSimEvaluator):
     def shutdown_agent_node(self):
         rospy.wait_for_service(self.reset_agent_service_name)
         try:
-            resp = self.reset_agent(int(AgentResetCommands.SHUTDOWN), 0)
+            resp = self.reset_agent(int(AgentResetCommands.SHUTDOWN), 0, "")
             assert resp.done
         except rospy.ServiceException:
             self.logger.info("Failed to shut down agent!")
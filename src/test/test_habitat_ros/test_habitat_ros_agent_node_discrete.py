@@ -57,7 +57,7 @@ class HabitatROSAgentNodeDiscreteCase(unittest.TestCase):
             f"{PACKAGE_NAME}/{self.agent_node_under_test_name}/{ServiceNames.RESET_AGENT}"
         )
         try:
-            resp = self.reset_agent(int(AgentResetCommands.RESET), 7)
+            resp = self.reset_agent(int(AgentResetCommands.RESET), 7, "")
             assert resp.done
         except rospy.ServiceException:
             raise rospy.ServiceException
@@ -96,7 +96,7 @@ class HabitatROSAgentNodeDiscreteCase(unittest.TestCase):
             f"{PACKAGE_NAME}/{self.agent_node_under_test_name}/{ServiceNames.RESET_AGENT}"
         )
         try:
-            resp = self.reset_agent(int(AgentResetCommands.SHUTDOWN), 0)
+            resp = self.reset_agent(int(AgentResetCommands.SHUTDOWN), 0, "")
             assert resp.done
         except rospy.ServiceException:
             raise rospy.ServiceException
@@ -0,0 +1,106 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.constants.constants import NumericalMetrics
+from src.utils import utils_compare_metrics
+from src.utils.utils_compare_metrics import MetricsComparison
+
+METRIC_NAMES = [NumericalMetrics.SUCCESS, NumericalMetrics.SPL]
+
+
+def make_dict_of_metrics(list_of_success_and_spl):
+    return {
+        f"{episode_id},scene_1.glb": {
+            NumericalMetrics.SUCCESS: success,
+            NumericalMetrics.SPL: spl,
+        }
+        for episode_id, (success, spl) in enumerate(list_of_success_and_spl)
+    }
+
+
+class TestUtilsCompareMetrics(unittest.TestCase):
+    def setUp(self):
+        self.dict_of_metrics_1 = make_dict_of_metrics(
+            [(1.0, 0.9), (0.0, 0.0), (1.0, 0.8), (0.0, 0.0), (1.0, 0.9)]
+        )
+        self.dict_of_metrics_2 = make_dict_of_metrics(
+            [(0.0, 0.0), (1.0, 0.7), (1.0, 0.3), (0.0, 0.0)]
+        )
+        self.dict_of_metrics_3 = make_dict_of_metrics(
+            [(1.0, 0.9), (0.0, 0.0), (1.0, 0.8), (1.0, 0.5), (0.0, 0.0)]
+        )
+        self.csv_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+
+    def test_modes_of_two_runs(self):
+        comparison = MetricsComparison(
+            [self.dict_of_metrics_1, self.dict_of_metrics_2], METRIC_NAMES
+        )
+        # episode 4 is missing from run 2 and never selected
+        assert comparison.values.shape == (5, 2, 2)
+        assert np.all(np.isnan(comparison.values[4, 1]))
+        dict_of_episode_indices = comparison.select_modes(utils_compare_metrics.MODES)
+        assert {
+            mode: episode_indices.tolist()
+            for mode, episode_indices in dict_of_episode_indices.items()
+        } == {
+            "find_cases_success_in_1_fail_in_2": [0],
+            "find_cases_success_in_both_but_metrics_differ_by_a_lot": [2],
+            "find_cases_fail_in_1_success_in_2": [1],
+            "find_cases_fail_in_both": [3],
+        }
+
+    def test_each_run_is_compared_with_run_1(self):
+        comparison = MetricsComparison(
+            [self.dict_of_metrics_1, self.dict_of_metrics_2, self.dict_of_metrics_3],
+            METRIC_NAMES,
+        )
+        selected = comparison.select(utils_compare_metrics.success_in_1_fail_in_2)
+        assert selected.tolist() == [
+            [True, False],
+            [False, False],
+            [False, False],
+            [False, False],
+            [False, True],
+        ]
+
+        def spl_drops(metrics_1, metrics_2):
+            return metrics_2[NumericalMetrics.SPL] < metrics_1[NumericalMetrics.SPL]
+
+        episode_indices = comparison.select_modes({"spl_drops": spl_drops})
+        assert episode_indices["spl_drops"].tolist() == [0, 2, 4]
+
+    def test_empty_run(self):
+        comparison = MetricsComparison(
+            [self.dict_of_metrics_1, {}, self.dict_of_metrics_3], METRIC_NAMES
+        )
+        assert comparison.values.shape == (5, 3, 2)
+        assert np.all(np.isnan(comparison.values[:, 1]))
+        selected = comparison.select(utils_compare_metrics.fail_in_both)
+        assert not np.any(selected[:, 0])
+        assert selected[:, 1].tolist() == [False, True, False, False, False]
+
+    def test_write_csv(self):
+        comparison = MetricsComparison(
+            [self.dict_of_metrics_1, self.dict_of_metrics_2], METRIC_NAMES
+        )
+        csv_filepath = os.path.join(self.csv_dir, "episodes.csv")
+        comparison.write_csv(csv_filepath, np.array([2, 4]))
+        with open(csv_filepath, newline="") as csv_file:
+            rows = list(csv.reader(csv_file))
+        assert rows == [
+            ["episode_id", "scene_id", "success_1", "spl_1", "success_2", "spl_2"],
+            ["2", "scene_1.glb", "1.0", "0.8", "1.0", "0.3"],
+            ["4", "scene_1.glb", "1.0", "0.9", "", ""],
+        ]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from src.utils.utils_distance_field import GoalDistanceField
+
+
+class TestUtilsDistanceField(unittest.TestCase):
+    def setUp(self):
+        self.navigable_grid = np.ones((60, 80), dtype=bool)
+        self.goal = [1.03, 0.0, 1.57]
+
+    def test_open_grid_close_to_straight_line(self):
+        field = GoalDistanceField(self.navigable_grid, (0.0, 0.0), 0.1, [self.goal])
+        rng = np.random.RandomState(7)
+        for _ in range(200):
+            position = [rng.uniform(0.0, 7.8), 0.0, rng.uniform(0.0, 5.8)]
+            distance = np.hypot(position[0] - self.goal[0], position[2] - self.goal[2])
+            field_distance = field.get_distance(position)
+            # grid paths overestimate, by less than a few percent plus
+            # the interpolation error of a cell
+            assert distance - 1e-6 <= field_distance <= 1.05 * distance + 0.2
+
+    def test_wall_and_off_grid(self):
+        # a wall along column 40 with a gap at the bottom
+        self.navigable_grid[:55, 40] = False
+        field = GoalDistanceField(self.navigable_grid, (0.0, 0.0), 0.1, [self.goal])
+        position = [6.0, 0.0, 1.5]
+        # the shortest path goes through the gap, around (4.0, 5.5)
+        around_wall = np.hypot(4.0 - self.goal[0], 5.5 - self.goal[2]) + np.hypot(
+            position[0] - 4.0, position[2] - 5.5
+        )
+        assert around_wall <= field.get_distance(position) <= 1.05 * around_wall
+        # next to the wall, or off the grid
+        assert field.get_distance([4.05, 0.0, 1.5]) is None
+        assert field.get_distance([-1.0, 0.0, 1.5]) is None
+
+    def test_nearest_of_several_goals(self):
+        goals = [self.goal, [6.0, 0.0, 4.0]]
+        field = GoalDistanceField(self.navigable_grid, (0.0, 0.0), 0.1, goals)
+        assert field.get_distance([6.0, 0.0, 4.5]) < 0.6
+
+
+if __name__ == "__main__":
+    unittest.main()
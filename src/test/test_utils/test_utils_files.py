@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.constants.constants import NumericalMetrics
+from src.utils import utils_files
+
+
+def write_log_file(log_dir, episode_id, scene_id, spl):
+    log_filepath = f"{log_dir}/episode={episode_id}-scene={scene_id}.log"
+    with open(log_filepath, "w") as f:
+        f.write(f"2021-09-01 10:00:00,001 INFO episode id: {episode_id}\n")
+        f.write(f"2021-09-01 10:00:00,002 INFO scene id: data/{scene_id}.glb\n")
+        for metric_name in NumericalMetrics:
+            value = spl if metric_name == NumericalMetrics.SPL else 1.0
+            f.write(f"2021-09-01 10:00:01,003 INFO {metric_name.value},{value}\n")
+    return log_filepath
+
+
+class TestUtilsFiles(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        for episode_id in range(20):
+            write_log_file(self.log_dir, episode_id, "scene_1", episode_id / 20.0)
+        # not a log file
+        with open(f"{self.log_dir}/summary.txt", "w") as f:
+            f.write("not a log")
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def extract_metrics(self, use_index=True):
+        list_of_log_filepaths = utils_files.extract_log_filepaths([self.log_dir])
+        return utils_files.extract_metrics_from_each(
+            metric_names=[NumericalMetrics.SPL, NumericalMetrics.NUM_STEPS],
+            list_of_log_filepaths=list_of_log_filepaths,
+            num_workers=4,
+            use_index=use_index,
+        )[0]
+
+    def test_extract_metrics(self):
+        dict_of_metrics = self.extract_metrics(use_index=False)
+        assert len(dict_of_metrics) == 20
+        assert dict_of_metrics["3,data/scene_1.glb"] == {
+            NumericalMetrics.SPL: 0.15,
+            NumericalMetrics.NUM_STEPS: 1.0,
+        }
+        assert not os.path.exists(
+            f"{self.log_dir}/{utils_files.METRICS_INDEX_FILENAME}"
+        )
+
+    def test_index_reparses_only_changed_files(self):
+        dict_of_metrics = self.extract_metrics()
+        assert os.path.isfile(f"{self.log_dir}/{utils_files.METRICS_INDEX_FILENAME}")
+        assert self.extract_metrics() == dict_of_metrics
+
+        # a changed and a new log file are parsed; others come from the index
+        log_filepath = write_log_file(self.log_dir, 3, "scene_1", 0.99)
+        os.utime(log_filepath, ns=(0, 1))
+        write_log_file(self.log_dir, 20, "scene_2", 0.5)
+        parsed_filepaths = []
+        parse_log_file = utils_files.parse_log_file
+
+        def count_parse_log_file(log_filepath):
+            parsed_filepaths.append(log_filepath)
+            return parse_log_file(log_filepath)
+
+        utils_files.parse_log_file = count_parse_log_file
+        try:
+            dict_of_metrics = self.extract_metrics()
+        finally:
+            utils_files.parse_log_file = parse_log_file
+        assert len(parsed_filepaths) == 2
+        assert dict_of_metrics["3,data/scene_1.glb"][NumericalMetrics.SPL] == 0.99
+        assert dict_of_metrics["20,data/scene_2.glb"][NumericalMetrics.SPL] == 0.5
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from src.utils.utils_fog_of_war import FogOfWarRayTable, get_cells_on_ray
+
+
+class TestUtilsFogOfWar(unittest.TestCase):
+    def setUp(self):
+        self.top_down_map = np.ones((100, 120), dtype=np.uint8)
+        self.fog_of_war_mask = np.zeros_like(self.top_down_map)
+        self.table = FogOfWarRayTable(20.0)
+
+    def test_cells_on_ray_are_edge_connected(self):
+        for angle in np.linspace(0.0, 2 * np.pi, 37):
+            cells = get_cells_on_ray(angle, 20.0)
+            assert tuple(cells[0]) == (0, 0)
+            steps = np.abs(np.diff(cells, axis=0)).sum(axis=1)
+            assert np.all(steps == 1)
+            assert np.linalg.norm(cells[-1]) <= 20.0 + 1.0
+
+    def test_open_map_reveals_wedge(self):
+        point = np.array([50, 60])
+        # facing +row, with a 90 degree field of view
+        self.table.reveal(self.top_down_map, self.fog_of_war_mask, point, 0.0, 90.0)
+        rows, cols = np.nonzero(self.fog_of_war_mask)
+        d_rows = rows - point[0]
+        d_cols = cols - point[1]
+        # every revealed cell is within reach and roughly inside the wedge
+        assert np.all(np.hypot(d_rows, d_cols) <= 21.0)
+        assert np.all(d_rows >= np.abs(d_cols) - 1)
+        # cells well inside the wedge are revealed
+        assert self.fog_of_war_mask[point[0] + 15, point[1]] == 1
+        assert self.fog_of_war_mask[point[0] + 10, point[1] + 8] == 1
+        # nothing behind the agent is
+        assert self.fog_of_war_mask[point[0] - 5, point[1]] == 0
+
+    def test_heading_wraps_around(self):
+        point = np.array([50, 60])
+        mask = np.zeros_like(self.fog_of_war_mask)
+        self.table.reveal(self.top_down_map, mask, point, 0.0, 90.0)
+        self.table.reveal(
+            self.top_down_map, self.fog_of_war_mask, point, 2 * np.pi, 90.0
+        )
+        assert np.array_equal(mask, self.fog_of_war_mask)
+
+    def test_wall_blocks_rays(self):
+        point = np.array([50, 60])
+        self.top_down_map[58, :] = 0
+        self.table.reveal(self.top_down_map, self.fog_of_war_mask, point, 0.0, 90.0)
+        assert self.fog_of_war_mask[57, point[1]] == 1
+        assert not np.any(self.fog_of_war_mask[58:])
+
+    def test_map_edge(self):
+        point = np.array([95, 2])
+        self.table.reveal(self.top_down_map, self.fog_of_war_mask, point, 0.0, 360.0)
+        assert self.fog_of_war_mask[99, 2] == 1
+        assert self.fog_of_war_mask[95, 0] == 1
+        assert self.fog_of_war_mask[80, 10] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+import numpy as np
+
+from src.utils.utils_geodesic import GeodesicDistanceCache
+
+
+def euclidean_distance_to_goals(start, ends):
+    return float(np.min(np.linalg.norm(np.asarray(ends) - np.asarray(start), axis=1)))
+
+
+class TestUtilsGeodesic(unittest.TestCase):
+    def setUp(self):
+        self.cache = GeodesicDistanceCache(max_size=2)
+        self.goals = [[1.0, 0.0, 2.0], [-3.0, 0.0, 0.5]]
+
+    def test_hit_and_miss(self):
+        key = self.cache.make_key("scene_1.glb", [0.0, 0.0, 0.0], self.goals)
+        assert self.cache.get(key) is None
+        self.cache.put(key, 2.5)
+        assert self.cache.get(key) == 2.5
+        # goal order does not matter, but the scene does
+        assert (
+            self.cache.make_key("scene_1.glb", [0.0, 0.0, 0.0], self.goals[::-1])
+            == key
+        )
+        assert self.cache.make_key("scene_2.glb", [0.0, 0.0, 0.0], self.goals) != key
+        assert self.cache.get_stats() == {"num_hits": 1, "num_misses": 1, "size": 1}
+
+    def test_lru_eviction(self):
+        keys = [
+            self.cache.make_key("scene_1.glb", [float(i), 0.0, 0.0], self.goals)
+            for i in range(3)
+        ]
+        self.cache.put(keys[0], 0.0)
+        self.cache.put(keys[1], 1.0)
+        # using keys[0] makes keys[1] the least recently used
+        assert self.cache.get(keys[0]) == 0.0
+        self.cache.put(keys[2], 2.0)
+        assert self.cache.get(keys[1]) is None
+        assert self.cache.get(keys[0]) == 0.0
+        assert self.cache.get(keys[2]) == 2.0
+
+    def make_sim(self):
+        r"""
+        Make a HabitatPhysicsSim without a renderer, whose pathfinder
+        returns Euclidean distances and counts its calls.
+        """
+        from src.sims import habitat_physics_simulator
+        from src.sims.habitat_physics_simulator import HabitatPhysicsSim
+
+        class FakeMultiGoalShortestPath:
+            def __init__(self):
+                self.requested_start = None
+                self.requested_ends = None
+                self.geodesic_distance = None
+
+        class FakePathFinder:
+            def __init__(self):
+                self.num_find_path_calls = 0
+
+            def find_path(self, path):
+                self.num_find_path_calls += 1
+                path.geodesic_distance = euclidean_distance_to_goals(
+                    path.requested_start, path.requested_ends
+                )
+                return True
+
+        patcher = mock.patch.object(
+            habitat_physics_simulator.habitat_sim,
+            "MultiGoalShortestPath",
+            FakeMultiGoalShortestPath,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        sim = HabitatPhysicsSim.__new__(HabitatPhysicsSim)
+        # there is no simulator backend to close
+        sim.close = lambda *args, **kwargs: None
+        sim.pathfinder = FakePathFinder()
+        sim._current_scene = "scene_1.glb"
+        sim.geodesic_distance_cache = GeodesicDistanceCache(max_size=1000)
+        sim.use_goal_distance_field = False
+        sim.goal_distance_fields = OrderedDict()
+        return sim
+
+    def test_sim_queries_hit_cache(self):
+        sim = self.make_sim()
+        rng = np.random.RandomState(7)
+        # starts in the middle of quantization cells, so float32 round-off
+        # and small offsets stay in the same cell
+        starts = np.round(rng.uniform(-5.0, 5.0, size=(100, 3)), 3).astype(
+            np.float32
+        )
+        for start in starts:
+            assert np.isclose(
+                sim.geodesic_distance(start, self.goals),
+                euclidean_distance_to_goals(start, self.goals),
+            )
+        assert sim.pathfinder.num_find_path_calls == len(starts)
+
+        # repeated starts, and starts that quantize to the same key, hit
+        for start in np.concatenate([starts, starts + np.float32(2e-6)]):
+            assert np.isclose(
+                sim.geodesic_distance(start, self.goals[::-1]),
+                euclidean_distance_to_goals(start, self.goals),
+            )
+        assert sim.pathfinder.num_find_path_calls == len(starts)
+
+        # distinct goals miss
+        for start in starts[:10]:
+            sim.geodesic_distance(start, [3.0, 0.0, 3.0])
+        assert sim.pathfinder.num_find_path_calls == len(starts) + 10
+
+    def test_sim_cache_invalidation(self):
+        sim = self.make_sim()
+        start = [0.5, 0.0, 0.5]
+        sim.geodesic_distance(start, self.goals)
+        sim.geodesic_distance(start, self.goals)
+        assert sim.pathfinder.num_find_path_calls == 1
+
+        # a new scene misses
+        sim._current_scene = "scene_2.glb"
+        sim.geodesic_distance(start, self.goals)
+        assert sim.pathfinder.num_find_path_calls == 2
+
+        # so does the same scene after its navmesh is recomputed
+        from src.sims import habitat_physics_simulator
+
+        with mock.patch.object(
+            habitat_physics_simulator.PhysicsSimulator,
+            "recompute_navmesh",
+            return_value=True,
+            create=True,
+        ):
+            assert sim.recompute_navmesh(sim.pathfinder, None)
+        sim.geodesic_distance(start, self.goals)
+        assert sim.pathfinder.num_find_path_calls == 3
+        assert sim.geodesic_distance_cache.get_stats()["size"] == 1
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+from src.utils.utils_geometry import (
+    compute_pointgoal,
+    compute_pointgoal_from_trajectory,
+    yaw_from_quaternion,
+)
+
+
+def compute_pointgoal_with_matrix_inverse(curr_pos, curr_rotation, goal_pos):
+    # reference implementation: build the 4x4 local->world matrix from the
+    # quaternion, invert it and transform the goal direction
+    x, y, z, w = np.array(curr_rotation) / np.linalg.norm(curr_rotation)
+    yaw = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    local_to_world = np.identity(4)
+    local_to_world[0:2, 0:2] = [
+        [np.cos(yaw), -np.sin(yaw)],
+        [np.sin(yaw), np.cos(yaw)],
+    ]
+    world_to_local = np.linalg.inv(local_to_world)
+    direction_vector_world = np.zeros((4,))
+    direction_vector_world[0:3] = goal_pos - curr_pos
+    direction_vector_local = np.matmul(world_to_local, direction_vector_world)
+    rho = np.sqrt(direction_vector_local[0] ** 2 + direction_vector_local[1] ** 2)
+    phi = np.arctan2(direction_vector_local[1], direction_vector_local[0])
+    return rho, phi
+
+
+def yaw_to_quaternion(yaw):
+    return np.array([0.0, 0.0, np.sin(yaw / 2.0), np.cos(yaw / 2.0)])
+
+
+class TestUtilsGeometry(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.num_poses = 100
+        self.positions = rng.uniform(-10.0, 10.0, size=(self.num_poses, 3))
+        self.yaws = rng.uniform(-np.pi, np.pi, size=(self.num_poses,))
+        self.rotations = np.stack([yaw_to_quaternion(yaw) for yaw in self.yaws])
+        self.goal_pos = np.array([1.5, -2.0, 0.0])
+
+    def test_yaw_from_quaternion(self):
+        assert np.allclose(yaw_from_quaternion(self.rotations), self.yaws)
+        # scaling the quaternion must not change the yaw
+        assert np.allclose(yaw_from_quaternion(3.0 * self.rotations), self.yaws)
+
+    def test_compute_pointgoal(self):
+        for i in range(self.num_poses):
+            rho, phi = compute_pointgoal(
+                self.positions[i], self.rotations[i], self.goal_pos
+            )
+            rho_ref, phi_ref = compute_pointgoal_with_matrix_inverse(
+                self.positions[i], self.rotations[i], self.goal_pos
+            )
+            assert np.linalg.norm(rho - rho_ref) < 1e-9
+            assert np.linalg.norm(phi - phi_ref) < 1e-9
+
+    def test_compute_pointgoal_from_trajectory(self):
+        pointgoals = compute_pointgoal_from_trajectory(
+            self.positions, self.rotations, self.goal_pos
+        )
+        assert pointgoals.shape == (self.num_poses, 2)
+        for i in range(self.num_poses):
+            rho, phi = compute_pointgoal(
+                self.positions[i], self.rotations[i], self.goal_pos
+            )
+            assert np.linalg.norm(pointgoals[i, 0] - rho) < 1e-9
+            assert np.linalg.norm(pointgoals[i, 1] - phi) < 1e-9
+
+
+if __name__ == "__main__":
+    unittest.main()
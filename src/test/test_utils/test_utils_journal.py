@@ -0,0 +1,49 @@
+import tempfile
+import unittest
+
+from src.utils.utils_journal import EvalJournal, get_journal_path
+
+
+class TestUtilsJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal = EvalJournal(get_journal_path(self.temp_dir.name))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_commit_and_load(self):
+        assert len(self.journal.load()) == 0
+        self.journal.commit("1", "scene_1.glb", {"success": 1.0, "num_steps": 42})
+        self.journal.commit(2, "scene_2.glb", {"success": 0.0, "num_steps": 500})
+        finished_episodes = self.journal.load()
+        assert list(finished_episodes.keys()) == [
+            ("1", "scene_1.glb"),
+            ("2", "scene_2.glb"),
+        ]
+        assert finished_episodes[("2", "scene_2.glb")] == {
+            "success": 0.0,
+            "num_steps": 500.0,
+        }
+
+    def test_load_ignores_partial_last_line(self):
+        self.journal.commit("1", "scene_1.glb", {"success": 1.0})
+        # simulate a crash in the middle of writing the second record
+        with open(self.journal.journal_path, "a") as journal_file:
+            journal_file.write('{"episode_id": "2", "scene_id": "sce')
+        assert list(self.journal.load().keys()) == [("1", "scene_1.glb")]
+        # the partial record is dropped, so the next commit is readable
+        self.journal.commit("3", "scene_3.glb", {"success": 0.0})
+        assert list(self.journal.load().keys()) == [
+            ("1", "scene_1.glb"),
+            ("3", "scene_3.glb"),
+        ]
+
+    def test_clear(self):
+        self.journal.commit("1", "scene_1.glb", {"success": 1.0})
+        self.journal.clear()
+        assert len(self.journal.load()) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
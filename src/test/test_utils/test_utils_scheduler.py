@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from src.utils.utils_scheduler import (
+    DONE,
+    WorkQueue,
+    assign_work_units,
+    make_work_units,
+)
+
+
+class TestUtilsScheduler(unittest.TestCase):
+    def setUp(self):
+        self.episodes_per_config = {
+            "configs/a.yaml": [
+                ("1", "scene_1.glb"),
+                ("2", "scene_2.glb"),
+                ("3", "scene_1.glb"),
+                ("4", "scene_3.glb"),
+                ("5", "scene_2.glb"),
+            ],
+            "configs/b.yaml": [("1", "scene_1.glb")],
+        }
+        self.seeds = [7, 8]
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_make_work_units(self):
+        units = make_work_units(self.episodes_per_config, self.seeds)
+        # one unit per (config, scene, seed); seeds of a scene are adjacent
+        assert [(u["config_path"], u["scene_id"], u["seed"]) for u in units] == [
+            ("configs/a.yaml", "scene_1.glb", 7),
+            ("configs/a.yaml", "scene_1.glb", 8),
+            ("configs/a.yaml", "scene_2.glb", 7),
+            ("configs/a.yaml", "scene_2.glb", 8),
+            ("configs/a.yaml", "scene_3.glb", 7),
+            ("configs/a.yaml", "scene_3.glb", 8),
+            ("configs/b.yaml", "scene_1.glb", 7),
+            ("configs/b.yaml", "scene_1.glb", 8),
+        ]
+        assert units[0]["episodes"] == [["1", "scene_1.glb"], ["3", "scene_1.glb"]]
+
+    def test_assign_work_units(self):
+        units = make_work_units(self.episodes_per_config, self.seeds)
+        units_per_worker = assign_work_units(units, 2)
+        assert sum(len(worker_units) for worker_units in units_per_worker) == len(
+            units
+        )
+        # no scene of a config is split across workers
+        scenes_per_worker = [
+            {(u["config_path"], u["scene_id"]) for u in worker_units}
+            for worker_units in units_per_worker
+        ]
+        assert not (scenes_per_worker[0] & scenes_per_worker[1])
+        # scenes carry 4, 4, 2 and 2 episodes over both seeds
+        loads = [
+            sum(len(u["episodes"]) for u in worker_units)
+            for worker_units in units_per_worker
+        ]
+        assert loads == [6, 6]
+
+    def test_work_queue_resume(self):
+        queue_path = os.path.join(self.temp_dir.name, "queue.json")
+        queue = WorkQueue.load_or_create(
+            queue_path, lambda: make_work_units(self.episodes_per_config, self.seeds)
+        )
+        pending_units = queue.get_pending_units()
+        assert len(pending_units) == 8
+        queue.mark_done(pending_units[0][0])
+        queue.mark_done(pending_units[1][0])
+
+        # a resumed queue is loaded from file and skips finished units
+        resumed_queue = WorkQueue.load_or_create(queue_path, lambda: [])
+        resumed_units = resumed_queue.get_pending_units()
+        assert len(resumed_units) == 6
+        assert resumed_units[0][0] == 2
+        assert resumed_queue.units[0]["status"] == DONE
+
+
+if __name__ == "__main__":
+    unittest.main()
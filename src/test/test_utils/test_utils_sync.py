@@ -0,0 +1,27 @@
+import unittest
+
+from src.utils.utils_sync import SyncStats
+
+
+class TestUtilsSync(unittest.TestCase):
+    def test_sync_stats(self):
+        matched_sets = []
+        stats = SyncStats(num_inputs=2)
+        callback = stats.wrap_callback(lambda *msgs: matched_sets.append(msgs))
+
+        # five messages arrive on the two inputs; two sets get matched
+        for msg in ["rgb_0", "ptgoal_0", "rgb_1", "rgb_2", "ptgoal_2"]:
+            stats.count_received(msg)
+        callback("rgb_0", "ptgoal_0")
+        callback("rgb_2", "ptgoal_2")
+
+        assert matched_sets == [("rgb_0", "ptgoal_0"), ("rgb_2", "ptgoal_2")]
+        assert stats.get_stats() == {
+            "num_received": 5,
+            "num_matched": 2,
+            "num_dropped": 1,
+        }
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from src.utils.utils_trajectory import (
+    POSE_DIM,
+    TrajectoryReplayer,
+    get_trajectory_path,
+    load_trajectory,
+    save_trajectory,
+)
+
+
+class TestUtilsTrajectory(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.num_steps = 50
+        self.actions = [int(a) for a in rng.randint(0, 4, size=(self.num_steps,))]
+        self.poses = [
+            rng.uniform(-10.0, 10.0, size=(POSE_DIM,)).astype(np.float32)
+            for _ in range(self.num_steps + 1)
+        ]
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.trajectory_path = get_trajectory_path(
+            self.temp_dir.name,
+            "42",
+            "data/scene_datasets/habitat-test-scenes/skokloster-castle.glb",
+        )
+        save_trajectory(self.trajectory_path, self.actions, self.poses)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_and_load_trajectory(self):
+        assert os.path.basename(self.trajectory_path) == (
+            "episode=42-scene=skokloster-castle.glb.npz"
+        )
+        actions, poses = load_trajectory(self.trajectory_path)
+        assert actions.dtype == np.int8
+        assert poses.dtype == np.float32
+        assert np.array_equal(actions, np.asarray(self.actions))
+        assert np.array_equal(poses, np.stack(self.poses))
+
+    def test_replay_trajectory(self):
+        replayer = TrajectoryReplayer(self.trajectory_path)
+        assert replayer.check_pose(self.poses[0])
+        for i in range(self.num_steps):
+            assert replayer.act(None) == {"action": self.actions[i]}
+            assert replayer.check_pose(self.poses[i + 1])
+        assert replayer.is_exact()
+
+        # replaying again after reset flags the first diverging pose
+        replayer.reset()
+        assert replayer.check_pose(self.poses[0])
+        replayer.act(None)
+        assert not replayer.check_pose(self.poses[0])
+        assert replayer.first_mismatch_step == 1
+        assert not replayer.is_exact()
+
+    def test_replay_shortened_trajectory(self):
+        from habitat.sims.habitat_simulator.actions import HabitatSimActions
+
+        num_recorded_steps = 10
+        save_trajectory(
+            self.trajectory_path,
+            self.actions[:num_recorded_steps],
+            self.poses[: num_recorded_steps + 1],
+        )
+        replayer = TrajectoryReplayer(self.trajectory_path)
+        assert replayer.check_pose(self.poses[0])
+        for i in range(num_recorded_steps):
+            assert replayer.act(None) == {"action": self.actions[i]}
+            assert replayer.check_pose(self.poses[i + 1])
+        assert replayer.is_exact()
+
+        # the simulator did not stop where the recording did
+        assert replayer.act(None) == {"action": HabitatSimActions.STOP}
+        replayer.check_pose(self.poses[num_recorded_steps + 1])
+        assert replayer.first_mismatch_step == num_recorded_steps
+        assert not replayer.is_exact()
+
+
+if __name__ == "__main__":
+    unittest.main()
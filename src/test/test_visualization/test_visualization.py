@@ -1,6 +1,16 @@
 import unittest
+import numpy as np
+import pandas as pd
 from src.utils.utils_files import load_seeds_from_file
 from src.utils.utils_visualization import (
+    EPISODE_COLUMN,
+    LABEL_COLUMN,
+    downsample_for_strip_plot,
+    drop_invalid_samples,
+    get_metrics_dataframe,
+    get_plot_hash,
+    load_metrics_dataframe,
+    plot_box_and_strip,
     visualize_variability_due_to_seed_with_box_plots,
 )
 from src.constants.constants import NumericalMetrics
@@ -31,6 +41,65 @@ class TestVisualization(unittest.TestCase):
         # we eye-ball check the generated plot for now
         visualize_variability_due_to_seed_with_box_plots(metrics_list, seeds, plot_dir)
 
+    def test_load_metrics_dataframe(self):
+        metrics_list = [
+            {
+                "episode_a": {NumericalMetrics.SPL: 0.8, NumericalMetrics.SUCCESS: 1.0},
+                "episode_b": {
+                    NumericalMetrics.SPL: float("nan"),
+                    NumericalMetrics.SUCCESS: 0.0,
+                },
+            },
+            {"episode_a": {NumericalMetrics.SPL: float("inf")}},
+        ]
+        df = load_metrics_dataframe(metrics_list, ["config_1", "config_2"])
+        assert len(df) == 3
+        assert list(df[LABEL_COLUMN]) == ["config_1", "config_1", "config_2"]
+        assert list(df[EPISODE_COLUMN]) == ["episode_a", "episode_b", "episode_a"]
+        assert df[LABEL_COLUMN].dtype.name == "category"
+        assert df[NumericalMetrics.SPL].dtype == np.float32
+        # missing metrics are NaN
+        assert np.isnan(df[NumericalMetrics.SUCCESS][2])
+
+        df_valid = drop_invalid_samples(df, [NumericalMetrics.SPL])
+        assert list(df_valid[EPISODE_COLUMN]) == ["episode_a"]
+
+        df_renamed = get_metrics_dataframe(df, ["(a)", "(b)"])
+        assert list(df_renamed[LABEL_COLUMN]) == ["(a)", "(a)", "(b)"]
+        assert list(df[LABEL_COLUMN]) == ["config_1", "config_1", "config_2"]
+
+    def test_downsample_for_strip_plot(self):
+        df = pd.DataFrame(
+            {
+                "config": ["a"] * 2000 + ["b"] * 10,
+                "spl": np.linspace(0.0, 1.0, 2010),
+            }
+        )
+        df_downsampled = downsample_for_strip_plot(df, "config", 100)
+        counts = df_downsampled["config"].value_counts()
+        assert counts["a"] == 100
+        assert counts["b"] == 10
+        # sampling is deterministic, so cached plots stay valid
+        assert df_downsampled.equals(downsample_for_strip_plot(df, "config", 100))
+        # small data is plotted as is
+        assert downsample_for_strip_plot(df, "config", 2000) is df
+
+    def test_plot_hash_changes_with_data(self):
+        df = pd.DataFrame({"config": ["a", "b"] * 1000, "spl": np.zeros(2000)})
+        plot_kwargs = {"df": df, "x": "config", "y": "spl", "plot_path": "p.png"}
+        plot_hash = get_plot_hash(plot_box_and_strip, plot_kwargs)
+        assert get_plot_hash(plot_box_and_strip, dict(plot_kwargs)) == plot_hash
+        df_changed = df.copy()
+        df_changed.loc[1000, "spl"] = 1.0
+        assert (
+            get_plot_hash(plot_box_and_strip, {**plot_kwargs, "df": df_changed})
+            != plot_hash
+        )
+        assert (
+            get_plot_hash(plot_box_and_strip, {**plot_kwargs, "x": "spl"})
+            != plot_hash
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,199 @@
+import csv
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from src.constants.constants import NumericalMetrics
+from src.utils import utils_files
+
+# tolerance of the success checks
+SUCCESS_TOLERANCE = 1e-5
+
+
+class RunMetrics:
+    r"""
+    View of the metrics of some runs of a comparison. Indexing it by a
+    metric gives an (E, R) array of that metric over all episodes and the
+    viewed runs, with NaN where a run has no such episode.
+    """
+
+    def __init__(self, values: np.ndarray, metric_names: List[str]) -> None:
+        r"""
+        :param values: (E, R, M) array of metrics
+        :param metric_names: names of the M metrics
+        """
+        self.values = values
+        self.metric_ids = {
+            utils_files.get_metric_key(metric_name): metric_id
+            for metric_id, metric_name in enumerate(metric_names)
+        }
+
+    def __getitem__(self, metric_name) -> np.ndarray:
+        metric_id = self.metric_ids[utils_files.get_metric_key(metric_name)]
+        return self.values[..., metric_id]
+
+
+# a predicate maps the metrics of run 1 and of the runs compared against it
+# to an (E, R) boolean array of the episodes to keep for each compared run
+Predicate = Callable[[RunMetrics, RunMetrics], np.ndarray]
+
+
+def is_success(metrics: RunMetrics) -> np.ndarray:
+    return np.abs(metrics[NumericalMetrics.SUCCESS] - 1.0) < SUCCESS_TOLERANCE
+
+
+def is_fail(metrics: RunMetrics) -> np.ndarray:
+    return np.abs(metrics[NumericalMetrics.SUCCESS] - 0.0) < SUCCESS_TOLERANCE
+
+
+def success_in_1_fail_in_2(metrics_1: RunMetrics, metrics_2: RunMetrics) -> np.ndarray:
+    return is_success(metrics_1) & is_fail(metrics_2)
+
+
+def success_in_both_but_metrics_differ_by_a_lot(
+    metrics_1: RunMetrics, metrics_2: RunMetrics
+) -> np.ndarray:
+    # NOTE: criteria:
+    # 1) Both are successes
+    # 2.1) Exp 2 SPL < 50% Exp 1 SPL OR 2.2) Exp 2 SPL > 150% Exp 1 SPL
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spl_ratio = metrics_2[NumericalMetrics.SPL] / metrics_1[NumericalMetrics.SPL]
+    return (
+        is_success(metrics_1)
+        & is_success(metrics_2)
+        & ((spl_ratio < 0.5) | (spl_ratio > 1.5))
+    )
+
+
+def fail_in_1_success_in_2(metrics_1: RunMetrics, metrics_2: RunMetrics) -> np.ndarray:
+    return is_fail(metrics_1) & is_success(metrics_2)
+
+
+def fail_in_both(metrics_1: RunMetrics, metrics_2: RunMetrics) -> np.ndarray:
+    return is_fail(metrics_1) & is_fail(metrics_2)
+
+
+MODES = {
+    "find_cases_success_in_1_fail_in_2": success_in_1_fail_in_2,
+    "find_cases_success_in_both_but_metrics_differ_by_a_lot": success_in_both_but_metrics_differ_by_a_lot,
+    "find_cases_fail_in_1_success_in_2": fail_in_1_success_in_2,
+    "find_cases_fail_in_both": fail_in_both,
+}
+
+
+class MetricsComparison:
+    r"""
+    Metrics of N runs over the same episodes, aligned into one
+    episodes x runs x metrics array. Episode sets of the runs are outer
+    joined: an episode missing from a run has NaN metrics in that run, so
+    no predicate selects it for that run. Run 1 is the reference the other
+    runs are compared against.
+    """
+
+    def __init__(
+        self,
+        list_of_dict_of_metrics: Sequence[Dict[str, Dict]],
+        metric_names: List[str],
+    ) -> None:
+        r"""
+        :param list_of_dict_of_metrics: dictionary of metrics of each run,
+            keyed by "<episode id>,<scene id>", as returned by
+            `utils_files.extract_metrics_from_each`
+        :param metric_names: names of the metrics to compare
+        """
+        assert len(list_of_dict_of_metrics) >= 2
+        self.metric_names = list(metric_names)
+        self.episode_identifiers = list(
+            dict.fromkeys(
+                episode_identifier
+                for dict_of_metrics in list_of_dict_of_metrics
+                for episode_identifier in dict_of_metrics
+            )
+        )
+        episode_ids = {
+            episode_identifier: episode_id
+            for episode_id, episode_identifier in enumerate(self.episode_identifiers)
+        }
+        self.values = np.full(
+            (
+                len(self.episode_identifiers),
+                len(list_of_dict_of_metrics),
+                len(self.metric_names),
+            ),
+            np.nan,
+        )
+        for run_id, dict_of_metrics in enumerate(list_of_dict_of_metrics):
+            # a run with no episodes keeps an all-NaN column
+            if len(dict_of_metrics) == 0:
+                continue
+            rows = [
+                episode_ids[episode_identifier] for episode_identifier in dict_of_metrics
+            ]
+            self.values[rows, run_id] = [
+                [episode_metrics[metric_name] for metric_name in self.metric_names]
+                for episode_metrics in dict_of_metrics.values()
+            ]
+
+    @property
+    def num_runs(self) -> int:
+        return self.values.shape[1]
+
+    def get_fieldnames(self) -> List[str]:
+        r"""
+        :returns: csv field names: episode and scene ID, then the metrics
+            of each run suffixed by the run number, eg. 'spl_2'
+        """
+        metric_keys = [
+            utils_files.get_metric_key(metric_name) for metric_name in self.metric_names
+        ]
+        return ["episode_id", "scene_id"] + [
+            metric_name
+            for metric_names in utils_files.get_metric_names_with_suffices(
+                metric_keys, [f"_{run_id + 1}" for run_id in range(self.num_runs)]
+            )
+            for metric_name in metric_names
+        ]
+
+    def select(self, predicate: Predicate) -> np.ndarray:
+        r"""
+        Evaluate a predicate on all episodes and runs at once.
+        :param predicate: predicate comparing run 1 with the other runs
+        :returns: (E, N - 1) boolean array; entry (i, j) is true if episode
+            i satisfies the predicate between run 1 and run j + 2
+        """
+        metrics_1 = RunMetrics(self.values[:, 0:1], self.metric_names)
+        metrics_2 = RunMetrics(self.values[:, 1:], self.metric_names)
+        return np.asarray(predicate(metrics_1, metrics_2), dtype=bool)
+
+    def select_modes(self, modes: Dict[str, Predicate]) -> Dict[str, np.ndarray]:
+        r"""
+        Find the episodes of each mode. An episode is kept in a mode if it
+        satisfies its predicate between run 1 and any other run.
+        :param modes: predicate of each mode, by mode name
+        :returns: indices of the kept episodes of each mode, by mode name
+        """
+        return {
+            mode: np.flatnonzero(self.select(predicate).any(axis=1))
+            for mode, predicate in modes.items()
+        }
+
+    def write_csv(self, csv_filepath: str, episode_indices: np.ndarray) -> None:
+        r"""
+        Write the metrics of all runs on the given episodes to a .csv file,
+        one row per episode. Metrics of episodes a run does not have are
+        left empty.
+        :param csv_filepath: path to the .csv file
+        :param episode_indices: indices of the episodes to write
+        """
+        with open(csv_filepath, "w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(self.get_fieldnames())
+            for episode_index in episode_indices:
+                episode_id, scene_id = self.episode_identifiers[episode_index].split(
+                    ",", 1
+                )
+                values = self.values[episode_index].ravel().tolist()
+                csv_writer.writerow(
+                    [episode_id, scene_id]
+                    + ["" if np.isnan(value) else value for value in values]
+                )
@@ -0,0 +1,149 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+# moves between grid cells considered by the flood: the 8 king moves and
+# the 8 knight moves. Knight moves cut the overestimate of grid paths
+# against straight lines from ~8% to a few percent. Only one of each pair of
+# opposite moves is listed; edges are undirected
+GRID_MOVES = [(0, 1), (1, 0), (1, 1), (1, -1), (1, 2), (2, 1), (1, -2), (2, -1)]
+
+
+def get_cells_crossed(move):
+    r"""
+    Get the cells, relative to the start cell, a move passes through
+    besides its start and end.
+    :param move: (row, column) offset of the move
+    :returns: list of (row, column) offsets
+    """
+    d_row, d_col = move
+    if abs(d_row) == 2:
+        return [(1, 0), (1, d_col)]
+    if abs(d_col) == 2:
+        return [(0, int(np.sign(d_col))), (1, int(np.sign(d_col)))]
+    if d_row != 0 and d_col != 0:
+        return [(d_row, 0), (0, d_col)]
+    return []
+
+
+class GoalDistanceField:
+    r"""
+    Geodesic distance to a set of goals, precomputed over a top-down
+    navigable grid by a Dijkstra flood from the goals. Distances at other
+    positions are bilinearly interpolated from the four surrounding cells.
+    Row i and column j of the grid are at z = `origin[1]` + i * `cell_size`
+    and x = `origin[0]` + j * `cell_size`.
+    """
+
+    def __init__(
+        self,
+        navigable_grid: np.ndarray,
+        origin: Sequence[float],
+        cell_size: float,
+        goals: Sequence[Sequence[float]],
+    ) -> None:
+        r"""
+        :param navigable_grid: (H, W) boolean grid of navigable cells
+        :param origin: world (x, z) coordinates of cell (0, 0)
+        :param cell_size: size of a cell, in meters
+        :param goals: goal positions in world (x, y, z) coordinates
+        """
+        # scipy is only needed to build fields; import it on first use
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import dijkstra
+
+        self.origin = np.array(origin, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        navigable_grid = np.asarray(navigable_grid, dtype=bool)
+        height, width = navigable_grid.shape
+        num_cells = height * width
+        cell_ids = np.arange(num_cells).reshape(height, width)
+
+        # edges between navigable cells for each move, if the cells the
+        # move crosses are navigable too
+        rows, cols, weights = [], [], []
+        for move in GRID_MOVES:
+            d_row, d_col = move
+            valid = np.zeros_like(navigable_grid)
+            row_slice = slice(0, height - d_row)
+            col_slice = slice(max(0, -d_col), width - max(0, d_col))
+            valid[row_slice, col_slice] = (
+                navigable_grid[row_slice, col_slice]
+                & navigable_grid[
+                    d_row : height, max(0, d_col) : width - max(0, -d_col)
+                ]
+            )
+            for c_row, c_col in get_cells_crossed(move):
+                valid[row_slice, col_slice] &= navigable_grid[
+                    c_row : height - d_row + c_row,
+                    max(0, -d_col) + c_col : width - max(0, d_col) + c_col,
+                ]
+            starts = cell_ids[valid]
+            rows.append(starts)
+            cols.append(starts + d_row * width + d_col)
+            weights.append(
+                np.full(len(starts), self.cell_size * np.hypot(d_row, d_col))
+            )
+
+        # a virtual source node linked to the cells around each goal, at
+        # their straight-line distance to the nearest goal. Duplicate
+        # entries would be summed by the sparse matrix, so keep one per cell
+        source = num_cells
+        source_weights = {}
+        for goal in goals:
+            goal_row = (goal[2] - self.origin[1]) / self.cell_size
+            goal_col = (goal[0] - self.origin[0]) / self.cell_size
+            for cell_row in (int(np.floor(goal_row)), int(np.floor(goal_row)) + 1):
+                for cell_col in (int(np.floor(goal_col)), int(np.floor(goal_col)) + 1):
+                    if (
+                        0 <= cell_row < height
+                        and 0 <= cell_col < width
+                        and navigable_grid[cell_row, cell_col]
+                    ):
+                        cell_id = cell_ids[cell_row, cell_col]
+                        # a goal exactly on a cell would give a zero
+                        # weight, which csgraph may read as no edge
+                        weight = max(
+                            self.cell_size
+                            * np.hypot(cell_row - goal_row, cell_col - goal_col),
+                            1e-9,
+                        )
+                        source_weights[cell_id] = min(
+                            weight, source_weights.get(cell_id, np.inf)
+                        )
+        rows.append(np.full(len(source_weights), source))
+        cols.append(np.array(list(source_weights.keys()), dtype=int))
+        weights.append(np.array(list(source_weights.values()), dtype=np.float64))
+
+        graph = coo_matrix(
+            (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(num_cells + 1, num_cells + 1),
+        ).tocsr()
+        distances = dijkstra(graph, directed=False, indices=source)
+        self.distances = distances[:num_cells].reshape(height, width)
+
+    def get_distance(self, position: Sequence[float]) -> Optional[float]:
+        r"""
+        Look up the distance from a position to the nearest goal.
+        :param position: world (x, y, z) position
+        :returns: the interpolated distance, or None if the position is off
+            the grid or next to a cell the goals cannot be reached from
+        """
+        row = (position[2] - self.origin[1]) / self.cell_size
+        col = (position[0] - self.origin[0]) / self.cell_size
+        row_0 = int(np.floor(row))
+        col_0 = int(np.floor(col))
+        height, width = self.distances.shape
+        if not (0 <= row_0 < height - 1 and 0 <= col_0 < width - 1):
+            return None
+        corners = self.distances[row_0 : row_0 + 2, col_0 : col_0 + 2]
+        if not np.all(np.isfinite(corners)):
+            return None
+        d_row = row - row_0
+        d_col = col - col_0
+        return float(
+            corners[0, 0] * (1 - d_row) * (1 - d_col)
+            + corners[0, 1] * (1 - d_row) * d_col
+            + corners[1, 0] * d_row * (1 - d_col)
+            + corners[1, 1] * d_row * d_col
+        )
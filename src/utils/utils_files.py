@@ -1,9 +1,22 @@
 import csv
-from src.constants.constants import NumericalMetrics
-from typing import List, Dict, Tuple
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Tuple
 import glob
 from datetime import datetime
 
+# per-episode log lines, after the logger's "<date> <time> <level> " prefix
+EPISODE_ID_PATTERN = re.compile(r"episode id: (?P<id>.*)$")
+SCENE_ID_PATTERN = re.compile(r"scene id: (?P<id>.*)$")
+METRIC_PATTERN = re.compile(r" (?:\w+\.)?(?P<name>\w+),(?P<value>[^,\s]+)$")
+# name of the file in each log directory caching the metrics parsed from
+# its log files, by file name
+METRICS_INDEX_FILENAME = ".metrics_index.json"
+# default number of threads reading log files; each has one file open
+DEFAULT_NUM_READERS = 16
+
 
 def load_seeds_from_file(seed_file_path):
     r"""
@@ -48,45 +61,84 @@ def load_episode_identifiers(
     return episode_ids, scene_ids
 
 
-def extract_metrics_from_log_file(log_filepath, metric_names):
+def get_metric_key(metric_name) -> str:
     r"""
-    Create a dictionary of metrics for the episode logged in `log_filepath`.
-    Require `metric_names` contain names only of numerical metrics.
+    :param metric_name: a NumericalMetrics member or its value
+    :returns: the name the metric is logged under, e.g. "spl"
+    """
+    return str(getattr(metric_name, "value", metric_name)).lower()
+
+
+def parse_log_file(log_filepath: str) -> Tuple[str, str, Dict[str, float]]:
+    r"""
+    Parse the log file of one episode.
     :param log_filepath: path to the log file of one episode
-    :metric_names: metrics we want to extract
     :return: a tuple of three things:
         1) episode ID,
         2) scene ID,
-        3) metrics dictionary
+        3) dictionary of all metrics logged, keyed by get_metric_key()
     """
-    log_file = open(log_filepath, "r")
-    log_file_lines = log_file.readlines()
+    with open(log_filepath, "r") as log_file:
+        log_file_lines = log_file.readlines()
 
-    # get episode ID
-    episode_id_line = log_file_lines[0]
-    episode_id = str(episode_id_line.split(": ")[1]).rstrip("\n")
+    episode_id = None
+    scene_id = None
+    metrics = {}
+    for line in log_file_lines:
+        line = line.rstrip("\n")
+        if episode_id is None:
+            match = EPISODE_ID_PATTERN.search(line)
+            if match is not None:
+                episode_id = match.group("id")
+                continue
+        if scene_id is None:
+            match = SCENE_ID_PATTERN.search(line)
+            if match is not None:
+                scene_id = match.group("id")
+                continue
+        match = METRIC_PATTERN.search(line)
+        if match is not None:
+            try:
+                metrics[match.group("name").lower()] = float(match.group("value"))
+            except ValueError:
+                pass
+    if episode_id is None or scene_id is None:
+        raise ValueError(f"No episode or scene ID in {log_filepath}")
+    return episode_id, scene_id, metrics
 
-    # get scene ID
-    scene_id_line = log_file_lines[1]
-    scene_id = str(scene_id_line.split(": ")[1]).rstrip("\n")
 
-    # for each metric, extract its value
+def select_metrics(
+    log_filepath: str, metrics: Dict[str, float], metric_names: List[str]
+) -> Dict[str, float]:
+    r"""
+    Select metrics parsed by parse_log_file().
+    :param log_filepath: path of the parsed log file
+    :param metrics: all metrics of the log file
+    :param metric_names: metrics to select
+    :return: the selected metrics, keyed by the given names
+    """
     per_ep_metrics = {}
-    metric_line_nums = {
-        NumericalMetrics.DISTANCE_TO_GOAL: 2,
-        NumericalMetrics.SUCCESS: 3,
-        NumericalMetrics.SPL: 4,
-        NumericalMetrics.NUM_STEPS: 5,
-        NumericalMetrics.SIM_TIME: 6,
-        NumericalMetrics.RESET_TIME: 7,
-        NumericalMetrics.AGENT_TIME: 8,
-    }
     for metric_name in metric_names:
-        metric_line = log_file_lines[metric_line_nums[metric_name]]
-        metric_val = float(metric_line.split(",")[2])
-        per_ep_metrics[metric_name] = metric_val
+        metric_key = get_metric_key(metric_name)
+        if metric_key not in metrics:
+            raise ValueError(f"No {metric_key} in {log_filepath}")
+        per_ep_metrics[metric_name] = metrics[metric_key]
+    return per_ep_metrics
 
-    return (episode_id, scene_id, per_ep_metrics)
+
+def extract_metrics_from_log_file(log_filepath, metric_names):
+    r"""
+    Create a dictionary of metrics for the episode logged in `log_filepath`.
+    Require `metric_names` contain names only of numerical metrics.
+    :param log_filepath: path to the log file of one episode
+    :metric_names: metrics we want to extract
+    :return: a tuple of three things:
+        1) episode ID,
+        2) scene ID,
+        3) metrics dictionary
+    """
+    episode_id, scene_id, metrics = parse_log_file(log_filepath)
+    return (episode_id, scene_id, select_metrics(log_filepath, metrics, metric_names))
 
 
 def extract_seed_dir_paths(
@@ -102,23 +154,69 @@ def extract_seed_dir_paths(
     return log_dirs_all_seeds
 
 
+def list_log_filepaths(log_dir: str) -> List[str]:
+    r"""
+    List the per-episode log files in a directory.
+    :param log_dir: directory path
+    :return: sorted paths to the .log files in the directory; empty if
+        the directory does not exist
+    """
+    if not os.path.isdir(log_dir):
+        return []
+    with os.scandir(log_dir) as entries:
+        return sorted(
+            os.path.join(log_dir, entry.name)
+            for entry in entries
+            if entry.name.endswith(".log") and entry.is_file()
+        )
+
+
 def extract_log_filepaths(
     list_of_log_dirs: List[str],
+    num_workers: int = DEFAULT_NUM_READERS,
 ) -> List[List[str]]:
     r"""
     Return paths to per-episode log files in each of the given directories,
-    respectively.
+    respectively. Directories are listed concurrently.
     :param list_of_log_dirs: list of directory paths
+    :param num_workers: number of threads listing directories
     :return: a list containing lists of paths to per-episode log files
         from each directory
     """
-    list_of_log_filepaths = []
-    for log_dir in list_of_log_dirs:
-        log_filepaths = []
-        for log_filepath in glob.glob(f"{log_dir}/*.log"):
-            log_filepaths.append(log_filepath)
-        list_of_log_filepaths.append(log_filepaths)
-    return list_of_log_filepaths
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(list_log_filepaths, list_of_log_dirs))
+
+
+def load_metrics_index(log_dir: str) -> Dict[str, Dict[str, Any]]:
+    r"""
+    Load the metrics cached for the log files of a directory.
+    :param log_dir: directory path
+    :return: index entries keyed by log file name; empty if there is no
+        readable index
+    """
+    try:
+        with open(os.path.join(log_dir, METRICS_INDEX_FILENAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_metrics_index(log_dir: str, index: Dict[str, Dict[str, Any]]) -> None:
+    r"""
+    Save the metrics cached for the log files of a directory. The index is
+    replaced atomically; failing to write it, e.g. in a read-only
+    directory, is not an error.
+    :param log_dir: directory path
+    :param index: index entries keyed by log file name
+    """
+    index_path = os.path.join(log_dir, METRICS_INDEX_FILENAME)
+    tmp_index_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_index_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_index_path, index_path)
+    except OSError:
+        pass
 
 
 def get_metric_name_appended_by_suffix(metric_name: str, suffix: str) -> str:
@@ -165,22 +263,83 @@ def get_metric_names_with_suffices(
 def extract_metrics_from_each(
     metric_names: List[str],
     list_of_log_filepaths: List[List[str]],
+    num_workers: int = DEFAULT_NUM_READERS,
+    use_index: bool = True,
 ) -> List[Dict[str, Dict]]:
     r"""
     Create a dictionary of metrics for each given list of paths to log files.
+    Log files are read concurrently by `num_workers` threads, so at most as
+    many files are open at once. With `use_index`, metrics parsed from a
+    log file are cached in an index file in its directory, and only log
+    files that are new, or whose modification time or size changed, are
+    parsed again.
     :param metric_names: list of metric names to extract
     :param list_of_log_filepaths: list of log file path lists
+    :param num_workers: number of threads reading log files
+    :param use_index: if true, read and update the metrics index of each
+        log directory
     :return: a list of dictionaries of metrics; each list corresponds to a
         given log file path list
     """
+    all_log_filepaths = list(
+        dict.fromkeys(
+            log_filepath
+            for log_filepaths in list_of_log_filepaths
+            for log_filepath in log_filepaths
+        )
+    )
+    log_dirs = list(
+        dict.fromkeys(os.path.dirname(log_filepath) for log_filepath in all_log_filepaths)
+    )
+    indices = {}
+    if use_index:
+        indices = {log_dir: load_metrics_index(log_dir) for log_dir in log_dirs}
+
+    def get_index_entry(log_filepath):
+        # reuse the cached entry if the file did not change
+        stat = os.stat(log_filepath)
+        log_dir, log_filename = os.path.split(log_filepath)
+        entry = indices.get(log_dir, {}).get(log_filename)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+        ):
+            return entry
+        episode_id, scene_id, metrics = parse_log_file(log_filepath)
+        return {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "episode_id": episode_id,
+            "scene_id": scene_id,
+            "metrics": metrics,
+        }
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        entries = dict(
+            zip(all_log_filepaths, executor.map(get_index_entry, all_log_filepaths))
+        )
+
+    if use_index:
+        for log_dir in log_dirs:
+            index = indices[log_dir]
+            changed = False
+            for log_filepath in all_log_filepaths:
+                dir_name, log_filename = os.path.split(log_filepath)
+                if dir_name == log_dir and index.get(log_filename) != entries[log_filepath]:
+                    index[log_filename] = entries[log_filepath]
+                    changed = True
+            if changed:
+                save_metrics_index(log_dir, index)
+
     list_of_dict_of_metrics = []
     for log_filepaths in list_of_log_filepaths:
         dict_of_metrics = {}
         for log_filepath in log_filepaths:
-            episode_id, scene_id, per_episode_metrics = extract_metrics_from_log_file(
-                log_filepath=log_filepath, metric_names=metric_names
+            entry = entries[log_filepath]
+            dict_of_metrics[f"{entry['episode_id']},{entry['scene_id']}"] = select_metrics(
+                log_filepath, entry["metrics"], metric_names
             )
-            dict_of_metrics[f"{episode_id},{scene_id}"] = per_episode_metrics
         list_of_dict_of_metrics.append(dict_of_metrics)
     return list_of_dict_of_metrics
 
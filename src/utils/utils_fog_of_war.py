@@ -0,0 +1,142 @@
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def get_cells_on_ray(angle: float, length: float) -> np.ndarray:
+    r"""
+    Get the grid cells a ray from the center of cell (0, 0) passes through,
+    in the order it passes through them. Consecutive cells share an edge,
+    so a ray cannot slip between two diagonally adjacent obstacles.
+    :param angle: direction of the ray, in radians; the ray runs along
+        (cos(angle), sin(angle)) in (row, column) coordinates
+    :param length: length of the ray, in cells
+    :returns: (N, 2) array of (row, column) offsets
+    """
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    step = np.sign(direction).astype(int)
+    with np.errstate(divide="ignore"):
+        # ray length needed to cross one cell along each axis
+        t_delta = np.where(direction != 0, 1.0 / np.abs(direction), np.inf)
+    # ray length at which the next cell boundary is crossed along each axis
+    t_max = 0.5 * t_delta
+    cell = np.zeros(2, dtype=int)
+    cells = [cell.copy()]
+    while True:
+        axis = int(np.argmin(t_max))
+        if t_max[axis] > length:
+            break
+        cell[axis] += step[axis]
+        t_max[axis] += t_delta[axis]
+        cells.append(cell.copy())
+    return np.array(cells)
+
+
+class FogOfWarRayTable:
+    r"""
+    Rays cast to reveal the fog of war of a top-down map, precomputed for
+    all directions for one visibility distance. The ray directions are
+    spaced so that neighbouring rays end about one cell apart, as in
+    `habitat.utils.visualizations.fog_of_war.reveal_fog_of_war`. Revealing
+    only casts the rays of the field-of-view wedge, inside the bounding box
+    the rays can reach, and updates the mask in place.
+    """
+
+    def __init__(self, max_line_len: float) -> None:
+        r"""
+        :param max_line_len: visibility distance, in cells
+        """
+        assert max_line_len > 0
+        self.max_line_len = max_line_len
+        self.num_rays = int(np.ceil(2 * np.pi * max_line_len))
+        self.angle_step = 2 * np.pi / self.num_rays
+        rays = [
+            get_cells_on_ray(ray_id * self.angle_step, max_line_len)
+            for ray_id in range(self.num_rays)
+        ]
+
+        # rays padded to the same number of cells. Padding cells repeat the
+        # origin and are flagged, so they block the rest of their ray
+        max_num_cells = max(len(ray) for ray in rays)
+        self.offsets = np.zeros((self.num_rays, max_num_cells, 2), dtype=np.int32)
+        self.is_padding = np.ones((self.num_rays, max_num_cells), dtype=bool)
+        for ray_id, ray in enumerate(rays):
+            self.offsets[ray_id, : len(ray)] = ray
+            self.is_padding[ray_id, : len(ray)] = False
+        self.radius = int(np.abs(self.offsets).max())
+
+    def get_wedge(self, heading: float, fov: float) -> np.ndarray:
+        r"""
+        :param heading: direction the agent faces, in radians
+        :param fov: field of view, in degrees
+        :returns: indices of the rays in the field of view
+        """
+        half_fov = np.deg2rad(fov) / 2
+        first_ray = int(np.ceil((heading - half_fov) / self.angle_step))
+        num_rays = int(np.floor((heading + half_fov) / self.angle_step)) - first_ray + 1
+        num_rays = min(max(num_rays, 0), self.num_rays)
+        return (first_ray + np.arange(num_rays)) % self.num_rays
+
+    def reveal(
+        self,
+        top_down_map: np.ndarray,
+        fog_of_war_mask: np.ndarray,
+        point: Sequence[int],
+        heading: float,
+        fov: float,
+        invalid_value: int = 0,
+    ) -> Optional[Tuple[int, int, int, int]]:
+        r"""
+        Reveal the cells visible from a point, in place. A ray stops at the
+        first cell that is off the map or holds `invalid_value`.
+        :param top_down_map: (H, W) top-down map
+        :param fog_of_war_mask: (H, W) mask, set to 1 on revealed cells
+        :param point: (row, column) of the agent on the map
+        :param heading: direction the agent faces, in radians
+        :param fov: field of view, in degrees
+        :param invalid_value: value of the cells that block rays
+        :returns: (row_min, row_max, col_min, col_max) of the box of the
+            mask that may have changed, or None if nothing was cast
+        """
+        rays = self.get_wedge(heading, fov)
+        if len(rays) == 0:
+            return None
+
+        # the bounding box of the cells the rays can reach, clipped to the map
+        height, width = top_down_map.shape[0:2]
+        row_min = max(int(point[0]) - self.radius, 0)
+        row_max = min(int(point[0]) + self.radius + 1, height)
+        col_min = max(int(point[1]) - self.radius, 0)
+        col_max = min(int(point[1]) + self.radius + 1, width)
+        if row_min >= row_max or col_min >= col_max:
+            return None
+        box_map = top_down_map[row_min:row_max, col_min:col_max]
+        box_mask = fog_of_war_mask[row_min:row_max, col_min:col_max]
+
+        offsets = self.offsets[rays]
+        rows = offsets[..., 0] + (int(point[0]) - row_min)
+        cols = offsets[..., 1] + (int(point[1]) - col_min)
+        in_box = (
+            (rows >= 0) & (rows < box_map.shape[0]) & (cols >= 0) & (cols < box_map.shape[1])
+        )
+        rows = np.clip(rows, 0, box_map.shape[0] - 1)
+        cols = np.clip(cols, 0, box_map.shape[1] - 1)
+        blocked = (
+            ~in_box | self.is_padding[rays] | (box_map[rows, cols] == invalid_value)
+        )
+        # a cell is visible if no cell before it on its ray is blocked
+        visible = ~np.logical_or.accumulate(blocked, axis=1)
+        box_mask[rows[visible], cols[visible]] = 1
+        return row_min, row_max, col_min, col_max
+
+
+@lru_cache(maxsize=16)
+def get_ray_table(max_line_len: float) -> FogOfWarRayTable:
+    r"""
+    Get the ray table of a visibility distance, building it on first use.
+    Tables are shared across episodes of scenes with the same map scale.
+    :param max_line_len: visibility distance, in cells
+    :returns: ray table
+    """
+    return FogOfWarRayTable(max_line_len)
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class GeodesicDistanceCache:
+    r"""
+    LRU cache of geodesic distances from a start position to the nearest
+    of a set of goal positions. Positions are quantized to build keys, so
+    a cached distance is returned for starts within `quantum` of each
+    other; with the default quantum this is at the precision of float32
+    positions. The goal set is order-independent, so episodes sharing a
+    goal in the same scene share entries.
+    """
+
+    def __init__(self, max_size: int = 10000, quantum: float = 1e-5) -> None:
+        r"""
+        :param max_size: max number of cached distances
+        :param quantum: size of the grid positions are snapped to, in
+            meters
+        """
+        assert max_size > 0
+        assert quantum > 0
+        self.max_size = max_size
+        self.quantum = quantum
+        self.lock = Lock()
+        with self.lock:
+            self.distances = OrderedDict()
+            self.num_hits = 0
+            self.num_misses = 0
+
+    def quantize(self, position: Sequence[float]) -> Tuple[int, ...]:
+        r"""
+        :param position: a position
+        :returns: the position snapped to the quantization grid
+        """
+        return tuple(
+            int(v) for v in np.round(np.asarray(position, dtype=np.float64) / self.quantum)
+        )
+
+    def make_key(
+        self, scene_id: str, start: Sequence[float], ends: Sequence[Sequence[float]]
+    ) -> Hashable:
+        r"""
+        :param scene_id: scene the positions are in
+        :param start: start position
+        :param ends: goal positions
+        :returns: cache key of the geodesic distance from `start` to `ends`
+        """
+        return (
+            scene_id,
+            self.quantize(start),
+            tuple(sorted(set(self.quantize(end) for end in ends))),
+        )
+
+    def get(self, key: Hashable) -> Optional[float]:
+        r"""
+        Look up a distance, marking it as recently used.
+        :param key: key from make_key()
+        :returns: the cached distance, or None on a miss
+        """
+        with self.lock:
+            distance = self.distances.get(key)
+            if distance is None:
+                self.num_misses += 1
+                return None
+            self.num_hits += 1
+            self.distances.move_to_end(key)
+            return distance
+
+    def put(self, key: Hashable, distance: float) -> None:
+        r"""
+        Cache a distance, evicting the least recently used one if full.
+        :param key: key from make_key()
+        :param distance: geodesic distance
+        """
+        with self.lock:
+            self.distances[key] = distance
+            self.distances.move_to_end(key)
+            if len(self.distances) > self.max_size:
+                self.distances.popitem(last=False)
+
+    def clear(self) -> None:
+        r"""
+        Remove all cached distances. Counters are kept.
+        """
+        with self.lock:
+            self.distances.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        r"""
+        :returns: number of hits, misses and cached distances
+        """
+        with self.lock:
+            return {
+                "num_hits": self.num_hits,
+                "num_misses": self.num_misses,
+                "size": len(self.distances),
+            }
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def yaw_from_quaternion(rotation):
+    r"""
+    Extract the yaw angle (rotation about the world z axis) from a quaternion.
+    Equivalent to the yaw returned by tf.transformations.euler_from_quaternion()
+    with the default "sxyz" axes, but computed in closed form. The quaternion
+    does not need to be normalized.
+    :param rotation: quaternion in (x, y, z, w) format; either a single
+        quaternion of shape (4, ) or a batch of shape (N, 4)
+    :return: yaw angle(s) in radians
+    """
+    rotation = np.asarray(rotation, dtype=np.float64)
+    x = rotation[..., 0]
+    y = rotation[..., 1]
+    z = rotation[..., 2]
+    w = rotation[..., 3]
+    return np.arctan2(2.0 * (w * z + x * y), w * w + x * x - y * y - z * z)
+
+
+def compute_pointgoal(curr_pos, curr_rotation, goal_pos):
+    r"""
+    Compute distance-to-goal and angle-to-goal of an agent in the world
+    frame. Since the world->local transform is a pure rotation about the z
+    axis, we rotate the goal direction by -yaw in closed form instead of
+    building and inverting a 4x4 homogeneous matrix.
+    :param curr_pos: current position of the agent as a (3, ) array
+    :param curr_rotation: current orientation of the agent as a (x, y, z, w)
+        quaternion
+    :param goal_pos: goal position as a (3, ) array
+    :return: tuple 1) distance-to-goal, 2) angle-to-goal
+    """
+    yaw = yaw_from_quaternion(curr_rotation)
+    cos_yaw = np.cos(yaw)
+    sin_yaw = np.sin(yaw)
+    dx = goal_pos[0] - curr_pos[0]
+    dy = goal_pos[1] - curr_pos[1]
+    # direction vector in the local frame
+    x_local = cos_yaw * dx + sin_yaw * dy
+    y_local = -sin_yaw * dx + cos_yaw * dy
+    rho = np.sqrt(x_local ** 2 + y_local ** 2)
+    phi = np.arctan2(y_local, x_local)
+    return rho, phi
+
+
+def compute_pointgoal_from_trajectory(positions, rotations, goal_pos):
+    r"""
+    Vectorized version of compute_pointgoal() over a whole trajectory, e.g.
+    odometry recorded from Gazebo. Useful for offline replay and for checking
+    the bridge's readings against Habitat's PointGoalSensor.
+    :param positions: agent positions as an (N, 3) array
+    :param rotations: agent orientations as an (N, 4) array of (x, y, z, w)
+        quaternions
+    :param goal_pos: goal position as a (3, ) array
+    :return: an (N, 2) array; each row is (distance-to-goal, angle-to-goal)
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    goal_pos = np.asarray(goal_pos, dtype=np.float64)
+    assert positions.ndim == 2 and positions.shape[1] == 3
+    yaws = yaw_from_quaternion(rotations)
+    assert yaws.shape == (positions.shape[0],)
+
+    cos_yaws = np.cos(yaws)
+    sin_yaws = np.sin(yaws)
+    deltas = goal_pos[0:2] - positions[:, 0:2]
+    x_local = cos_yaws * deltas[:, 0] + sin_yaws * deltas[:, 1]
+    y_local = -sin_yaws * deltas[:, 0] + cos_yaws * deltas[:, 1]
+
+    pointgoals = np.empty((positions.shape[0], 2), dtype=np.float64)
+    pointgoals[:, 0] = np.sqrt(x_local ** 2 + y_local ** 2)
+    pointgoals[:, 1] = np.arctan2(y_local, x_local)
+    return pointgoals
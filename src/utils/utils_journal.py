@@ -0,0 +1,83 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+def get_journal_path(log_dir: str) -> str:
+    r"""
+    Get the path of the evaluation journal kept in a log directory.
+    :param log_dir: directory of per-episode logs
+    :returns: path to the journal
+    """
+    return f"{log_dir}/journal.jsonl"
+
+
+class EvalJournal:
+    r"""
+    Append-only record of finished episodes and their metrics. Each episode
+    is committed as one JSON line which is flushed and fsync'ed before
+    evaluation moves on, so a crash loses at most the episode in progress.
+    """
+
+    def __init__(self, journal_path: str) -> None:
+        r"""
+        :param journal_path: path to the journal file
+        """
+        self.journal_path = journal_path
+
+    def load(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        r"""
+        Read finished episodes from the journal. A partially written last
+        line, left by a crash mid-write, is truncated away so later commits
+        start on a fresh line.
+        :returns: metrics of each finished episode, keyed by (episode ID,
+            scene ID), in the order they were committed
+        """
+        finished_episodes = OrderedDict()
+        if not os.path.exists(self.journal_path):
+            return finished_episodes
+        valid_size = 0
+        with open(self.journal_path, "rb") as journal_file:
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                finished_episodes[
+                    (str(record["episode_id"]), record["scene_id"])
+                ] = record["metrics"]
+                valid_size += len(line)
+        if valid_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as journal_file:
+                journal_file.truncate(valid_size)
+        return finished_episodes
+
+    def clear(self) -> None:
+        r"""
+        Start an empty journal, discarding any previous one.
+        """
+        with open(self.journal_path, "w") as journal_file:
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def commit(
+        self, episode_id: str, scene_id: str, metrics: Dict[str, float]
+    ) -> None:
+        r"""
+        Durably record a finished episode.
+        :param episode_id: episode ID
+        :param scene_id: scene ID
+        :param metrics: numerical metrics of the episode
+        """
+        record = {
+            "episode_id": str(episode_id),
+            "scene_id": scene_id,
+            "metrics": {str(k): float(v) for k, v in metrics.items()},
+        }
+        with open(self.journal_path, "a") as journal_file:
+            journal_file.write(json.dumps(record) + "\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
@@ -4,16 +4,7 @@
 import logging
 import sys
 import numpy as np
-from habitat.tasks.nav.nav import (
-    merge_sim_episode_config,
-    SimulatorTaskAction,
-    MoveForwardAction,
-    TurnLeftAction,
-    TurnRightAction,
-    StopAction,
-)
 import math
-from habitat.utils.geometry_utils import angle_between_quaternions
 
 
 def setup_logger(name, log_file=None, level=logging.INFO):
@@ -59,6 +50,15 @@ def log_continuous_actuation(
     r"""
     Log the actuation of a discrete action in the continuous action space.
     """
+    # habitat is only needed here; import it on first use so loggers can
+    # be set up without loading habitat
+    from habitat.tasks.nav.nav import (
+        MoveForwardAction,
+        TurnLeftAction,
+        TurnRightAction,
+    )
+    from habitat.utils.geometry_utils import angle_between_quaternions
+
     displacement = np.linalg.norm(new_position - current_position)
     # NOTE: to get angle between quarternions, use angle_between_quaternions()
     # from geometry_utils in habitat
@@ -0,0 +1,142 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+# status of a work unit in the queue
+PENDING = "pending"
+DONE = "done"
+
+
+def make_work_units(
+    episodes_per_config: Dict[str, List[Tuple[str, str]]], seeds: List[int]
+) -> List[Dict]:
+    r"""
+    Split evaluation jobs into work units, one per (config, scene, seed).
+    Units of the same config and scene are adjacent, with all seeds of a
+    scene run back to back, so each scene is loaded once per worker
+    instead of once per seed.
+    :param episodes_per_config: for each config path, the (episode ID,
+        scene ID) pairs to evaluate, in dataset order
+    :param seeds: agent seeds to evaluate each episode with
+    :returns: list of work units. Each unit is a dictionary of "config_path",
+        "scene_id", "seed", "episodes" and "status"
+    """
+    units = []
+    for config_path, episodes in episodes_per_config.items():
+        # group episodes by scene, keeping the order in which scenes first
+        # appear in the dataset
+        episodes_per_scene = OrderedDict()
+        for episode_id, scene_id in episodes:
+            episodes_per_scene.setdefault(scene_id, []).append(
+                [str(episode_id), scene_id]
+            )
+        for scene_id, scene_episodes in episodes_per_scene.items():
+            for seed in seeds:
+                units.append(
+                    {
+                        "config_path": config_path,
+                        "scene_id": scene_id,
+                        "seed": seed,
+                        "episodes": scene_episodes,
+                        "status": PENDING,
+                    }
+                )
+    return units
+
+
+def assign_work_units(units: List[Dict], num_workers: int) -> List[List[Dict]]:
+    r"""
+    Partition work units among workers. All units of the same (config,
+    scene) go to the same worker so no two workers load the same scene;
+    scenes are assigned largest first to the least loaded worker.
+    :param units: work units from make_work_units()
+    :param num_workers: number of workers
+    :returns: one list of work units per worker, each in the original order
+    """
+    assert num_workers > 0
+    groups = OrderedDict()
+    for unit_index, unit in enumerate(units):
+        groups.setdefault((unit["config_path"], unit["scene_id"]), []).append(
+            unit_index
+        )
+
+    # longest-processing-time-first assignment, measuring load in episodes
+    group_loads = [
+        (sum(len(units[i]["episodes"]) for i in unit_indices), group_index)
+        for group_index, unit_indices in enumerate(groups.values())
+    ]
+    group_loads.sort(key=lambda group_load: (-group_load[0], group_load[1]))
+    worker_loads = [0] * num_workers
+    worker_unit_indices = [[] for _ in range(num_workers)]
+    all_unit_indices = list(groups.values())
+    for load, group_index in group_loads:
+        worker_id = worker_loads.index(min(worker_loads))
+        worker_loads[worker_id] += load
+        worker_unit_indices[worker_id].extend(all_unit_indices[group_index])
+
+    return [[units[i] for i in sorted(indices)] for indices in worker_unit_indices]
+
+
+class WorkQueue:
+    r"""
+    Work units of one worker, persisted to a JSON file after every update
+    so an interrupted sweep resumes exactly where it stopped.
+    """
+
+    def __init__(self, queue_path: str, units: List[Dict]) -> None:
+        r"""
+        :param queue_path: path to the queue file
+        :param units: work units
+        """
+        self.queue_path = queue_path
+        self.units = units
+
+    @classmethod
+    def load_or_create(
+        cls, queue_path: str, make_units: Callable[[], List[Dict]]
+    ) -> "WorkQueue":
+        r"""
+        Load the queue from `queue_path` if it exists; otherwise create it
+        from `make_units()` and save it.
+        :param queue_path: path to the queue file
+        :param make_units: callable returning the work units of a new queue
+        :returns: the work queue
+        """
+        if os.path.exists(queue_path):
+            with open(queue_path, "r") as queue_file:
+                units = json.load(queue_file)
+            return cls(queue_path, units)
+        queue = cls(queue_path, make_units())
+        queue.save()
+        return queue
+
+    def save(self) -> None:
+        r"""
+        Atomically write the queue to its file, so a crash mid-write never
+        leaves a corrupted queue behind.
+        """
+        queue_path_tmp = f"{self.queue_path}.tmp"
+        with open(queue_path_tmp, "w") as queue_file:
+            json.dump(self.units, queue_file, indent=2)
+            queue_file.flush()
+            os.fsync(queue_file.fileno())
+        os.replace(queue_path_tmp, self.queue_path)
+
+    def get_pending_units(self) -> List[Tuple[int, Dict]]:
+        r"""
+        :returns: (index, unit) of units not done yet, in queue order
+        """
+        return [
+            (unit_index, unit)
+            for unit_index, unit in enumerate(self.units)
+            if unit["status"] != DONE
+        ]
+
+    def mark_done(self, unit_index: int) -> None:
+        r"""
+        Mark a unit as done and persist the queue.
+        :param unit_index: index of the unit in the queue
+        """
+        self.units[unit_index]["status"] = DONE
+        self.save()
@@ -0,0 +1,92 @@
+from threading import Lock
+from typing import Callable, Dict, List
+
+
+class SyncStats:
+    r"""
+    Thread-safe counters of a message synchronizer: messages received on
+    its inputs, and sets of messages matched and passed to its callback.
+    """
+
+    def __init__(self, num_inputs: int) -> None:
+        r"""
+        :param num_inputs: number of topics synchronized
+        """
+        self.num_inputs = num_inputs
+        self.lock = Lock()
+        with self.lock:
+            self.num_received = 0
+            self.num_matched = 0
+
+    def count_received(self, *args) -> None:
+        r"""
+        Count a message received on one of the inputs. Meant to be
+        registered as a callback of each input filter.
+        """
+        with self.lock:
+            self.num_received += 1
+
+    def wrap_callback(self, callback: Callable) -> Callable:
+        r"""
+        Wrap a synchronizer callback so each matched set of messages is
+        counted before `callback` runs.
+        :param callback: callback of the synchronizer
+        :returns: wrapped callback
+        """
+
+        def callback_counted(*msgs):
+            with self.lock:
+                self.num_matched += 1
+            return callback(*msgs)
+
+        return callback_counted
+
+    def get_stats(self) -> Dict[str, int]:
+        r"""
+        :returns: number of messages received, number of matched sets, and
+            number of messages received but not (yet) used in a match
+        """
+        with self.lock:
+            return {
+                "num_received": self.num_received,
+                "num_matched": self.num_matched,
+                "num_dropped": self.num_received - self.num_inputs * self.num_matched,
+            }
+
+
+def make_synchronizer(
+    subscribers: List,
+    callback: Callable,
+    queue_size: int,
+    use_approx_sync: bool = False,
+    slop: float = 0.1,
+):
+    r"""
+    Synchronize messages from `subscribers` and register `callback` on the
+    matched sets. Exact synchronization requires identical header stamps;
+    approximate synchronization matches stamps up to `slop` apart, which
+    sensors with separate drivers or plugins need.
+    :param subscribers: message_filters subscribers to synchronize
+    :param callback: callback taking one message from each subscriber
+    :param queue_size: number of messages queued per subscriber
+    :param use_approx_sync: if true, use ApproximateTimeSynchronizer;
+        otherwise use TimeSynchronizer
+    :param slop: max stamp difference, in seconds, of messages matched by
+        ApproximateTimeSynchronizer
+    :returns: tuple 1) the synchronizer, 2) its SyncStats
+    """
+    # message_filters comes with ROS; import it here so this module can be
+    # imported without a ROS installation
+    from message_filters import ApproximateTimeSynchronizer, TimeSynchronizer
+
+    stats = SyncStats(len(subscribers))
+    for subscriber in subscribers:
+        subscriber.registerCallback(stats.count_received)
+    if use_approx_sync:
+        synchronizer = ApproximateTimeSynchronizer(
+            subscribers, queue_size=queue_size, slop=slop
+        )
+    else:
+        synchronizer = TimeSynchronizer(subscribers, queue_size=queue_size)
+    synchronizer.registerCallback(stats.wrap_callback(callback))
+    return synchronizer, stats
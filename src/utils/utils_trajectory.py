@@ -0,0 +1,127 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# each pose is stored as (position x, y, z, rotation x, y, z, w)
+POSE_DIM = 7
+
+
+def get_trajectory_path(trajectory_dir: str, episode_id: str, scene_id: str) -> str:
+    r"""
+    Get the path of the file recording one episode's trajectory. Follows
+    the naming of per-episode log files.
+    :param trajectory_dir: directory of trajectory files
+    :param episode_id: episode ID
+    :param scene_id: scene ID
+    :returns: path to the trajectory file
+    """
+    return f"{trajectory_dir}/episode={episode_id}-scene={os.path.basename(scene_id)}.npz"
+
+
+def make_pose(position, rotation) -> np.ndarray:
+    r"""
+    Pack an agent pose into a single array.
+    :param position: agent position as a (3, ) array
+    :param rotation: agent orientation as a numpy-quaternion
+    :returns: a float32 array of shape (POSE_DIM, )
+    """
+    pose = np.empty((POSE_DIM,), dtype=np.float32)
+    pose[0:3] = position
+    pose[3:6] = rotation.imag
+    pose[6] = rotation.real
+    return pose
+
+
+def save_trajectory(
+    trajectory_path: str, actions: List[int], poses: List[np.ndarray]
+) -> None:
+    r"""
+    Save an episode's trajectory.
+    :param trajectory_path: path to the trajectory file
+    :param actions: discrete actions taken by the agent, one per step
+    :param poses: agent poses from make_pose(); the pose after reset,
+        followed by the pose after each step
+    """
+    assert len(poses) == len(actions) + 1
+    np.savez_compressed(
+        trajectory_path,
+        actions=np.asarray(actions, dtype=np.int8),
+        poses=np.asarray(poses, dtype=np.float32).reshape((-1, POSE_DIM)),
+    )
+
+
+def load_trajectory(trajectory_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    r"""
+    Load an episode's trajectory saved by save_trajectory().
+    :param trajectory_path: path to the trajectory file
+    :returns: tuple 1) int8 array of actions of shape (N, ); 2) float32
+        array of poses of shape (N + 1, POSE_DIM)
+    """
+    with np.load(trajectory_path) as trajectory:
+        actions = trajectory["actions"]
+        poses = trajectory["poses"]
+    assert poses.shape == (actions.shape[0] + 1, POSE_DIM)
+    return actions, poses
+
+
+class TrajectoryReplayer:
+    r"""
+    Stand-in for a Habitat agent which replays a recorded action sequence
+    instead of running a policy. Also checks the simulator re-traces the
+    recorded poses.
+    """
+
+    def __init__(self, trajectory_path: str) -> None:
+        r"""
+        :param trajectory_path: path to a trajectory file saved by
+            save_trajectory()
+        """
+        self.trajectory_path = trajectory_path
+        self.actions, self.poses = load_trajectory(trajectory_path)
+        self.reset()
+
+    def reset(self) -> None:
+        self.count_steps = 0
+        self.first_mismatch_step = None
+        self.num_extra_steps = 0
+
+    def act(self, observations) -> Dict[str, int]:
+        r"""
+        Return the next recorded action. Observations are ignored. If the
+        recorded actions have run out, the simulator has diverged from the
+        recording; return STOP to end the episode and record the mismatch.
+        """
+        if self.count_steps >= self.actions.shape[0]:
+            from habitat.sims.habitat_simulator.actions import HabitatSimActions
+
+            if self.first_mismatch_step is None:
+                self.first_mismatch_step = self.count_steps
+            self.num_extra_steps += 1
+            return {"action": HabitatSimActions.STOP}
+        action = int(self.actions[self.count_steps])
+        self.count_steps += 1
+        return {"action": action}
+
+    def check_pose(self, pose: np.ndarray) -> bool:
+        r"""
+        Compare the current agent pose against the recorded one. Must be
+        called after reset and after each step.
+        :param pose: current agent pose from make_pose()
+        :returns: True if the poses are identical
+        """
+        pose_matches = np.array_equal(pose, self.poses[self.count_steps])
+        if not pose_matches and self.first_mismatch_step is None:
+            self.first_mismatch_step = self.count_steps
+        return pose_matches
+
+    def is_exact(self) -> bool:
+        r"""
+        :returns: True if exactly the recorded actions have been replayed
+            and every checked pose matched the recording
+        """
+        return (
+            self.count_steps == self.actions.shape[0]
+            and self.num_extra_steps == 0
+            and self.first_mismatch_step is None
+        )
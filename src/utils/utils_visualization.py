@@ -7,22 +7,14 @@
 # moved from habitat_baselines due to dependency issues
 
 import os
-from typing import Any, Dict, List, Optional
-import matplotlib.pyplot as plt
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
-import torch
-from habitat.core.utils import try_cv2_import
-from habitat.utils.visualizations.utils import images_to_video
-from mpl_toolkits.axes_grid1 import ImageGrid
-from torch.utils.tensorboard import SummaryWriter
-import pandas as pd
-import seaborn as sns
-from habitat.utils.visualizations import maps
-from PIL import Image
 from src.constants.constants import NumericalMetrics
-from habitat.utils.visualizations.utils import draw_collision
 
-cv2 = try_cv2_import()
+# NOTE: heavy dependencies (torch, tensorboard, matplotlib, seaborn, pandas
+# and habitat's visualization utilities) are imported inside the functions
+# using them, so that importing this module, e.g. from a ROS node which only
+# needs generate_video(), stays cheap.
 
 
 class TensorboardWriter:
@@ -37,6 +29,8 @@ class TensorboardWriter:
             *args: Additional positional args for SummaryWriter
             **kwargs: Additional keyword args for SummaryWriter
         """
+        from torch.utils.tensorboard import SummaryWriter
+
         self.writer = None
         if log_dir is not None and len(log_dir) > 0:
             self.writer = SummaryWriter(log_dir, *args, **kwargs)
@@ -68,16 +62,143 @@ class TensorboardWriter:
         Returns:
             None.
         """
-        if not self.writer:
+        import torch
+
+        if not self.writer or len(images) == 0:
             return
-        # initial shape of np.ndarray list: N * (H, W, 3)
-        frame_tensors = [torch.from_numpy(np_arr).unsqueeze(0) for np_arr in images]
-        video_tensor = torch.cat(tuple(frame_tensors))
-        video_tensor = video_tensor.permute(0, 3, 1, 2).unsqueeze(0)
-        # final shape of video tensor: (1, n, 3, H, W)
+        # initial shape of np.ndarray list: N * (H, W, 3). Copy the frames
+        # once into a preallocated array of the final shape (1, n, 3, H, W)
+        height, width, num_channels = images[0].shape
+        video_array = np.empty(
+            (1, len(images), num_channels, height, width), dtype=images[0].dtype
+        )
+        for frame_index, np_arr in enumerate(images):
+            video_array[0, frame_index] = np_arr.transpose(2, 0, 1)
+        video_tensor = torch.from_numpy(video_array)
         self.writer.add_video(video_name, video_tensor, fps=fps, global_step=step_idx)
 
 
+# tensorboard writers of a video generator's worker process, by log dir
+_worker_tb_writers: Dict[str, TensorboardWriter] = {}
+
+
+def write_video(
+    video_option: List[str],
+    video_dir: Optional[str],
+    images: List[np.ndarray],
+    video_name: str,
+    tb_log_dir: Optional[str],
+    tb_video_name: str,
+    checkpoint_idx: int,
+    fps: int,
+) -> None:
+    r"""Write a video to disk and/or tensorboard. Run in the worker
+    processes of AsyncVideoGenerator; each process keeps its own
+    tensorboard writer per log dir, since writers cannot be shared between
+    processes.
+
+    Args:
+        video_option: string list of "tensorboard" or "disk" or both.
+        video_dir: path to target video directory.
+        images: list of images to be converted to video.
+        video_name: name of the video file.
+        tb_log_dir: log dir of the tensorboard writer.
+        tb_video_name: name of the video in tensorboard.
+        checkpoint_idx: checkpoint index to be displayed in tensorboard.
+        fps: fps for generated video.
+    Returns:
+        None
+    """
+    from habitat.utils.visualizations.utils import images_to_video
+
+    if "disk" in video_option:
+        assert video_dir is not None
+        images_to_video(images, video_dir, video_name)
+    if "tensorboard" in video_option and tb_log_dir is not None:
+        if tb_log_dir not in _worker_tb_writers:
+            _worker_tb_writers[tb_log_dir] = TensorboardWriter(tb_log_dir)
+        tb_writer = _worker_tb_writers[tb_log_dir]
+        tb_writer.add_video_from_np_images(
+            tb_video_name, checkpoint_idx, images, fps=fps
+        )
+        tb_writer.flush()
+
+
+class AsyncVideoGenerator:
+    r"""
+    Writes videos in a pool of worker processes, so encoding them to MP4
+    and tensorboard runs in parallel with the caller, e.g. while it keeps
+    evaluating episodes. Pass it to generate_video(); close() waits for all
+    videos to be written. At most `max_pending_videos` videos are held in
+    memory waiting for a worker; submitting more waits for the oldest one.
+    Workers are spawned rather than forked, so they do not inherit the
+    simulator's and GL state of the caller.
+    """
+
+    def __init__(self, num_workers: int = 2, max_pending_videos: int = None):
+        r"""
+        :param num_workers: number of worker processes
+        :param max_pending_videos: max number of videos submitted but not
+            yet written; defaults to twice the number of workers
+        """
+        import multiprocessing
+        from collections import deque
+
+        assert num_workers >= 1
+        if max_pending_videos is None:
+            max_pending_videos = 2 * num_workers
+        assert max_pending_videos >= 1
+        self.max_pending_videos = max_pending_videos
+        self.pool = multiprocessing.get_context("spawn").Pool(processes=num_workers)
+        self.pending_results = deque()
+        self.failed_results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def wait_for_oldest(self) -> None:
+        r"""
+        Wait for the oldest pending video to be written, keeping it for
+        close() if it failed.
+        """
+        result = self.pending_results.popleft()
+        result.wait()
+        if not result.successful():
+            self.failed_results.append(result)
+
+    def submit(self, *args: Any) -> None:
+        r"""
+        Schedule a video to be written. Frames can be given as any iterable,
+        e.g. a generator yielding frames as they are composed; they are
+        collected before being handed to a worker.
+        :param args: arguments of write_video()
+        """
+        args = list(args)
+        args[2] = list(args[2])
+        while len(self.pending_results) >= self.max_pending_videos:
+            self.wait_for_oldest()
+        self.pending_results.append(self.pool.apply_async(write_video, args))
+
+    def close(self) -> None:
+        r"""
+        Wait for all scheduled videos to be written and stop the workers.
+        Raises the first error of a worker, if any.
+        """
+        try:
+            while len(self.pending_results) > 0:
+                self.wait_for_oldest()
+            for result in self.failed_results:
+                result.get()
+        finally:
+            self.pending_results.clear()
+            self.failed_results = []
+            self.pool.close()
+            self.pool.join()
+
+
 def generate_video(
     video_option: List[str],
     video_dir: Optional[str],
@@ -89,6 +210,7 @@ def generate_video(
     metrics: Dict[str, float],
     tb_writer: TensorboardWriter,
     fps: int = 10,
+    video_generator: Optional[AsyncVideoGenerator] = None,
 ) -> None:
     r"""Generate video according to specified information.
 
@@ -104,9 +226,13 @@ def generate_video(
         metric_value: value of metric.
         tb_writer: tensorboard writer object for uploading video.
         fps: fps for generated video.
+        video_generator: if given, the video is written asynchronously by
+            its workers, which upload to tb_writer's log dir.
     Returns:
         None
     """
+    from habitat.utils.visualizations.utils import images_to_video
+
     if len(images) < 1:
         return
 
@@ -119,6 +245,21 @@ def generate_video(
         f"episode={episode_id}-scene={scene_id}-seed={agent_seed}-ckpt={checkpoint_idx}-"
         + "-".join(metric_strs)
     )
+    if video_generator is not None:
+        tb_log_dir = None
+        if tb_writer is not None and tb_writer.writer is not None:
+            tb_log_dir = tb_writer.writer.get_logdir()
+        video_generator.submit(
+            video_option,
+            video_dir,
+            images,
+            video_name,
+            tb_log_dir,
+            f"episode{episode_id}",
+            checkpoint_idx,
+            fps,
+        )
+        return
     if "disk" in video_option:
         assert video_dir is not None
         images_to_video(images, video_dir, video_name)
@@ -143,6 +284,9 @@ def generate_grid_of_maps(episode_id, scene_id, seeds, maps, map_dir):
             the same order as seeds.
         map_dir: directory to store the map
     """
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.axes_grid1 import ImageGrid
+
     fig = plt.figure(figsize=(16.0, 4.0))
     grid = ImageGrid(
         fig,
@@ -170,6 +314,11 @@ def colorize_and_fit_to_height(top_down_map_raw: np.ndarray, output_height: int)
     :param top_down_map_raw: raw top-down map
     :param output_height: The desired output height
     """
+    from habitat.core.utils import try_cv2_import
+    from habitat.utils.visualizations import maps
+
+    cv2 = try_cv2_import()
+
     top_down_map = maps.colorize_topdown_map(top_down_map_raw, None)
 
     if top_down_map.shape[0] > top_down_map.shape[1]:
@@ -189,6 +338,224 @@ def colorize_and_fit_to_height(top_down_map_raw: np.ndarray, output_height: int)
     return top_down_map
 
 
+class TopDownMapRenderer:
+    r"""
+    Incremental renderer of the top-down map of a roaming episode, with the
+    same look as `maps.colorize_draw_agent_and_fit_to_height`. It keeps a
+    colorized copy of the map and a colorized, scaled base image. After
+    every step, only the region the measure reports as changed
+    (`dirty_region` of `TopDownMapForRoam`) is recolorized; render()
+    rescales only the regions changed since the last frame and draws the
+    agent marker on a copy of the base, so the cost of a frame does not
+    grow with the map size. Maps without a dirty region are recolorized in
+    full. To keep the recolorizing off the stepping thread, the stepping
+    thread only copies the changed region with get_map_update(), and the
+    rendering thread applies it with apply_map_update().
+    """
+
+    def __init__(self):
+        from threading import RLock
+
+        self.lock = RLock()
+        self.reset()
+
+    def reset(self):
+        r"""
+        Drop the rendered map, e.g. when a new episode starts.
+        """
+        with self.lock:
+            self.map_shape = None
+            self.rotate = False
+            # colorized map, rotated to be wider than it is tall
+            self.colorized_map = None
+            # colorized map scaled to the output height
+            self.base_image = None
+            # (row_min, row_max, col_min, col_max) of the colorized map not
+            # yet scaled into the base image
+            self.pending_region = None
+
+    def get_rotated_region(self, region):
+        r"""
+        :param region: (row_min, row_max, col_min, col_max) on the map
+        :returns: the same region on the rotated map
+        """
+        if not self.rotate:
+            return region
+        row_min, row_max, col_min, col_max = region
+        width = self.map_shape[1]
+        return width - col_max, width - col_min, row_min, row_max
+
+    @classmethod
+    def get_map_update(
+        cls, top_down_map_info: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        r"""
+        Copy the region of the map and of the fog of war mask changed by a
+        step, so it can be applied on another thread while the measure
+        keeps updating its map. Maps without a dirty region are copied in
+        full.
+        :param top_down_map_info: info of the TopDownMapForRoam measure
+        :returns: map update for apply_map_update(), or None if nothing
+            changed
+        """
+        top_down_map = top_down_map_info["map"]
+        fog_of_war_mask = top_down_map_info["fog_of_war_mask"]
+        map_shape = top_down_map.shape[0:2]
+        if "dirty_region" in top_down_map_info:
+            region = top_down_map_info["dirty_region"]
+            if region is None:
+                return None
+        else:
+            region = (0, map_shape[0], 0, map_shape[1])
+        row_min, row_max, col_min, col_max = region
+        return {
+            "map_shape": map_shape,
+            "region": region,
+            "map": np.copy(top_down_map[row_min:row_max, col_min:col_max]),
+            "fog_of_war_mask": None
+            if fog_of_war_mask is None
+            else np.copy(fog_of_war_mask[row_min:row_max, col_min:col_max]),
+        }
+
+    def apply_map_update(self, map_update: Dict[str, Any]):
+        r"""
+        Recolorize the changed region of the map. Updates must be applied
+        in order, one for every step of the episode that changed the map,
+        including steps no frame is rendered for.
+        :param map_update: map update from get_map_update()
+        """
+        from habitat.utils.visualizations import maps
+
+        region = map_update["region"]
+        with self.lock:
+            if self.map_shape != map_update["map_shape"]:
+                # a new map starts with a full update
+                height, width = map_update["map_shape"]
+                assert tuple(region) == (0, height, 0, width)
+                self.reset()
+                self.map_shape = map_update["map_shape"]
+                self.rotate = self.map_shape[0] > self.map_shape[1]
+
+            colorized_region = maps.colorize_topdown_map(
+                map_update["map"], map_update["fog_of_war_mask"]
+            )
+            if self.rotate:
+                colorized_region = np.rot90(colorized_region, 1)
+            region = self.get_rotated_region(region)
+            if self.colorized_map is None:
+                self.colorized_map = np.ascontiguousarray(colorized_region)
+            else:
+                self.colorized_map[
+                    region[0] : region[1], region[2] : region[3]
+                ] = colorized_region
+
+            if self.pending_region is not None:
+                region = (
+                    min(region[0], self.pending_region[0]),
+                    max(region[1], self.pending_region[1]),
+                    min(region[2], self.pending_region[2]),
+                    max(region[3], self.pending_region[3]),
+                )
+            self.pending_region = region
+
+    def update(self, top_down_map_info: Dict[str, Any]):
+        r"""
+        Recolorize the region of the map changed by a step, on the calling
+        thread. Must be called after every step of the episode, including
+        steps no frame is rendered for.
+        :param top_down_map_info: info of the TopDownMapForRoam measure
+        """
+        map_update = self.get_map_update(top_down_map_info)
+        if map_update is not None:
+            self.apply_map_update(map_update)
+
+    def update_base_image(self, output_height: int):
+        r"""
+        Scale the pending region of the colorized map into the base image.
+        Requires holding the lock.
+        :param output_height: height of the base image
+        """
+        from habitat.core.utils import try_cv2_import
+
+        cv2 = try_cv2_import()
+
+        old_h, old_w, _ = self.colorized_map.shape
+        if self.base_image is None or self.base_image.shape[0] != output_height:
+            output_width = int(float(output_height) / old_h * old_w)
+            self.base_image = cv2.resize(
+                self.colorized_map,
+                (output_width, output_height),
+                interpolation=cv2.INTER_CUBIC,
+            )
+            self.pending_region = None
+            return
+        if self.pending_region is None:
+            return
+
+        # output pixels the region affects, with a margin for the support
+        # of the cubic kernel
+        out_h, out_w, _ = self.base_image.shape
+        scale_y = out_h / old_h
+        scale_x = out_w / old_w
+        row_min, row_max, col_min, col_max = self.pending_region
+        out_row_min = max(int(np.floor(row_min * scale_y)) - 2, 0)
+        out_row_max = min(int(np.ceil(row_max * scale_y)) + 2, out_h)
+        out_col_min = max(int(np.floor(col_min * scale_x)) - 2, 0)
+        out_col_max = min(int(np.ceil(col_max * scale_x)) + 2, out_w)
+        # map output pixels back to the colorized map as cv2.resize() does
+        inverse_map = np.array(
+            [
+                [1.0 / scale_x, 0.0, (out_col_min + 0.5) / scale_x - 0.5],
+                [0.0, 1.0 / scale_y, (out_row_min + 0.5) / scale_y - 0.5],
+            ]
+        )
+        self.base_image[
+            out_row_min:out_row_max, out_col_min:out_col_max
+        ] = cv2.warpAffine(
+            self.colorized_map,
+            inverse_map,
+            (out_col_max - out_col_min, out_row_max - out_row_min),
+            flags=cv2.INTER_CUBIC | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+        self.pending_region = None
+
+    def render(self, top_down_map_info: Dict[str, Any], output_height: int):
+        r"""
+        Render the map as of the last applied update, with the agent drawn
+        on it, fit to an output height.
+        :param top_down_map_info: info of the TopDownMapForRoam measure;
+            only the agent's map coordinates and angle are read
+        :param output_height: the desired output height
+        :returns: rendered map
+        """
+        from habitat.utils.visualizations import maps
+
+        with self.lock:
+            self.update_base_image(output_height)
+            frame = self.base_image.copy()
+            scale_y = frame.shape[0] / self.colorized_map.shape[0]
+            scale_x = frame.shape[1] / self.colorized_map.shape[1]
+            map_shape = self.map_shape
+            rotate = self.rotate
+
+        # draw the agent where habitat would draw it before scaling
+        agent_row, agent_col = top_down_map_info["agent_map_coord"]
+        agent_angle = top_down_map_info["agent_angle"]
+        if rotate:
+            agent_row, agent_col = map_shape[1] - 1 - agent_col, agent_row
+            agent_angle = agent_angle + np.pi / 2
+        return maps.draw_agent(
+            image=frame,
+            agent_center_coord=(
+                int(np.round((agent_row + 0.5) * scale_y - 0.5)),
+                int(np.round((agent_col + 0.5) * scale_x - 0.5)),
+            ),
+            agent_rotation=agent_angle,
+            agent_radius_px=max(int(min(map_shape) // 32 * scale_y), 1),
+        )
+
+
 def save_blank_map(episode_id: str, scene_id: str, blank_map: np.ndarray, map_dir: str):
     r"""
     Save the given blank map in .pgm format in <map_dir>/
@@ -197,6 +564,8 @@ def save_blank_map(episode_id: str, scene_id: str, blank_map: np.ndarray, map_di
     :param blank_map: blank top-down map of the specified episode
     :param map_dir: directory to save the map
     """
+    from PIL import Image
+
     map_img = Image.fromarray(blank_map, "RGB")
     map_img.save(
         f"{map_dir}/blank_map-episode={episode_id}-scene={os.path.basename(scene_id)}.pgm"
@@ -223,10 +592,327 @@ def resolve_metric_unit(metric_name):
         return "(seconds)"
 
 
-def visualize_variability_due_to_seed_with_box_plots(
+# strip plots draw at most this many points per category; the box plots
+# under them still summarize all points
+MAX_STRIP_PLOT_POINTS_PER_CATEGORY = 500
+# suffix of the file next to each plot holding the hash of its input
+PLOT_HASH_SUFFIX = ".hash"
+
+
+def downsample_for_strip_plot(
+    df, x: str, max_points_per_category: int = MAX_STRIP_PLOT_POINTS_PER_CATEGORY
+):
+    r"""
+    Randomly sample at most `max_points_per_category` rows of each category
+    of a DataFrame, for a strip plot.
+    :param df: long-form DataFrame
+    :param x: name of the category column
+    :param max_points_per_category: max number of rows per category
+    :returns: the sampled rows; `df` itself if no category has more rows
+    """
+    if df[x].value_counts().max() <= max_points_per_category:
+        return df
+    # shuffle with a fixed seed, so unchanged data gives unchanged plots
+    return (
+        df.sample(frac=1.0, random_state=0)
+        .groupby(x, sort=False, observed=True)
+        .head(max_points_per_category)
+    )
+
+
+def get_plot_hash(plot_function: Callable, plot_kwargs: Dict[str, Any]) -> str:
+    r"""
+    Hash the inputs of a plot.
+    :param plot_function: function drawing the plot
+    :param plot_kwargs: keyword arguments of `plot_function`
+    :returns: hex digest of the function name and its arguments, with
+        DataFrames hashed by content
+    """
+    import hashlib
+    import pandas as pd
+
+    def update_hash(plot_hash, value):
+        # repr() elides the middle of large arrays, so hash data by content
+        if isinstance(value, pd.DataFrame):
+            plot_hash.update(repr(list(value.columns)).encode())
+            plot_hash.update(pd.util.hash_pandas_object(value, index=False).values)
+        elif isinstance(value, np.ndarray):
+            plot_hash.update(repr((value.shape, value.dtype.str)).encode())
+            plot_hash.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                plot_hash.update(repr(key).encode())
+                update_hash(plot_hash, item)
+        else:
+            plot_hash.update(repr(value).encode())
+
+    plot_hash = hashlib.sha1(plot_function.__name__.encode())
+    update_hash(plot_hash, dict(sorted(plot_kwargs.items())))
+    return plot_hash.hexdigest()
+
+
+def run_plot_job(plot_function: Callable, plot_kwargs: Dict[str, Any]) -> None:
+    r"""
+    Draw a plot with matplotlib's non-interactive Agg backend. Run in the
+    worker processes of run_plot_jobs(), so the caller's backend is left
+    as is.
+    :param plot_function: function drawing the plot
+    :param plot_kwargs: keyword arguments of `plot_function`
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    plot_function(**plot_kwargs)
+
+
+def run_plot_jobs(
+    plot_jobs: List[Tuple[Callable, Dict[str, Any]]],
+    num_workers: Optional[int] = None,
+) -> None:
+    r"""
+    Draw plots in parallel in a pool of worker processes. A plot is skipped
+    if it exists and its inputs hash to the value saved next to it when it
+    was drawn; delete the plot to force redrawing it.
+    :param plot_jobs: list of (plot function, keyword arguments). The
+        arguments must include `plot_path`, where the plot is saved
+    :param num_workers: number of worker processes; defaults to the number
+        of CPUs. If 1, plots are drawn in the calling process
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    # skip plots whose inputs did not change
+    jobs_to_run = []
+    for plot_function, plot_kwargs in plot_jobs:
+        plot_path = plot_kwargs["plot_path"]
+        plot_hash = get_plot_hash(plot_function, plot_kwargs)
+        if os.path.isfile(plot_path) and os.path.isfile(plot_path + PLOT_HASH_SUFFIX):
+            with open(plot_path + PLOT_HASH_SUFFIX, "r") as f:
+                if f.read().strip() == plot_hash:
+                    continue
+        jobs_to_run.append((plot_function, plot_kwargs, plot_hash))
+
+    if num_workers == 1 or len(jobs_to_run) <= 1:
+        # drawn with the caller's own matplotlib backend
+        for plot_function, plot_kwargs, _ in jobs_to_run:
+            plot_function(**plot_kwargs)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(run_plot_job, plot_function, plot_kwargs)
+                for plot_function, plot_kwargs, _ in jobs_to_run
+            ]
+            for future in futures:
+                future.result()
+
+    # save the hashes of the plots drawn
+    for _, plot_kwargs, plot_hash in jobs_to_run:
+        with open(plot_kwargs["plot_path"] + PLOT_HASH_SUFFIX, "w") as f:
+            f.write(plot_hash)
+
+
+def plot_box_and_strip(
+    df,
+    x: str,
+    y: str,
+    plot_path: str,
+    xlabel: Optional[str] = None,
+    ylabel: Optional[str] = None,
+    label_fontsize: Optional[int] = None,
+    xticks_rotation: Optional[float] = None,
+    xticks_ha: str = "center",
+    bottom: Optional[float] = None,
+    font_scale: Optional[float] = None,
+    max_strip_plot_points: int = MAX_STRIP_PLOT_POINTS_PER_CATEGORY,
+) -> None:
+    r"""
+    Draw a box plot of a column per category, overlaid by a strip plot of
+    the samples, and save it.
+    :param df: long-form DataFrame
+    :param x: name of the category column
+    :param y: name of the value column
+    :param plot_path: path to save the plot
+    :param xlabel: if not None, label of the x axis
+    :param ylabel: if not None, label of the y axis
+    :param label_fontsize: font size of the axis labels
+    :param xticks_rotation: if not None, rotation of the x tick labels
+    :param xticks_ha: horizontal alignment of the x tick labels
+    :param bottom: if not None, bottom margin of the plot
+    :param font_scale: if not None, seaborn font scale
+    :param max_strip_plot_points: max number of strip plot points per
+        category
+    """
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(12.8, 9.6))
+    ax = fig.add_subplot(111)
+    if font_scale is not None:
+        sns.set(font_scale=font_scale, style="white")
+    # both plots must draw the categories in the same order
+    order = list(pd.unique(df[x]))
+    sns.boxplot(x=x, y=y, data=df, order=order, ax=ax)
+    sns.stripplot(
+        x=x,
+        y=y,
+        data=downsample_for_strip_plot(df, x, max_strip_plot_points),
+        order=order,
+        color=".25",
+        size=2,
+        ax=ax,
+    )
+    if xlabel is not None:
+        ax.set_xlabel(xlabel, fontsize=label_fontsize)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel, fontsize=label_fontsize)
+    if xticks_rotation is not None:
+        plt.xticks(rotation=xticks_rotation, ha=xticks_ha)
+    if bottom is not None:
+        plt.subplots_adjust(bottom=bottom)
+    fig.savefig(plot_path)
+    plt.close(fig)
+
+
+def plot_histograms(
+    data_per_config: Dict[str, np.ndarray],
+    xlabel: str,
+    plot_path: str,
+) -> None:
+    r"""
+    Draw a grid of histograms, one per configuration, and save it.
+    :param data_per_config: samples of each configuration, by name
+    :param xlabel: common label of the x axes
+    :param plot_path: path to save the plot
+    """
+    import matplotlib.pyplot as plt
+
+    num_configs = len(data_per_config)
+    fig, axes = plt.subplots(
+        int(np.ceil(num_configs / 2)), 2, sharey=True, figsize=(12.8, 9.6)
+    )
+    axes_flattened = axes.ravel()
+    for config_index, (config_name, data_to_plot) in enumerate(
+        data_per_config.items()
+    ):
+        axes_flattened[config_index].hist(data_to_plot, bins=50)
+        axes_flattened[config_index].set_title(config_name, fontsize=18)
+    # set common x and y label. Code adapted from
+    # https://stackoverflow.com/questions/16150819/common-xlabel-ylabel-for-matplotlib-subplots
+    fig.text(0.5, 0.04, xlabel, ha="center", fontsize=22)
+    fig.text(0.04, 0.5, "number of episodes", va="center", rotation="vertical", fontsize=22)
+    plt.xticks(rotation=0)
+    plt.subplots_adjust(left=0.125, bottom=0.1, right=0.9, top=0.9, wspace=0.2, hspace=0.6)
+    fig.savefig(plot_path)
+    plt.close(fig)
+
+
+# columns of the DataFrames from load_metrics_dataframe(), besides one
+# column per metric
+LABEL_COLUMN = "config"
+EPISODE_COLUMN = "episode"
+
+
+def load_metrics_dataframe(
     metrics_list: List[Dict[str, Dict[str, float]]],
+    labels: List[Any],
+    metric_names: Optional[List[str]] = None,
+):
+    r"""
+    Load per-episode metrics of several experiment runs into one tidy
+    DataFrame, with a row per episode per run. The run labels and episode
+    identifiers are categorical columns (LABEL_COLUMN and EPISODE_COLUMN),
+    and each metric is a float32 column. Build it once and pass it to
+    several of the visualize_* functions instead of `metrics_list`.
+    :param metrics_list: per-episode metrics of each run, e.g. from
+        utils_files.extract_metrics_from_each()
+    :param labels: label of each run, e.g. its configuration name or seed.
+        Should be in the same order as metrics_list
+    :param metric_names: metrics to load; defaults to the metrics of the
+        first episode of the first run. Metrics an episode lacks are NaN
+    :returns: the DataFrame
+    """
+    import pandas as pd
+
+    assert len(metrics_list) == len(labels)
+    if metric_names is None:
+        metric_names = []
+        for dict_of_metrics in metrics_list:
+            for _, episode_metrics in dict_of_metrics.items():
+                metric_names = list(episode_metrics.keys())
+                break
+            break
+
+    dfs = []
+    for dict_of_metrics in metrics_list:
+        df = pd.DataFrame.from_dict(dict_of_metrics, orient="index")
+        dfs.append(df.reindex(columns=metric_names))
+    if len(dfs) == 0:
+        df = pd.DataFrame(columns=metric_names)
+    else:
+        df = pd.concat(dfs, axis=0)
+    df = df.astype(np.float32)
+
+    # the label of each row, as codes into the list of unique labels
+    unique_labels = list(pd.unique(pd.Series(labels, dtype=object)))
+    label_codes = np.repeat(
+        [unique_labels.index(label) for label in labels],
+        [len(dict_of_metrics) for dict_of_metrics in metrics_list],
+    )
+    df.insert(
+        0,
+        LABEL_COLUMN,
+        pd.Categorical.from_codes(label_codes, categories=unique_labels),
+    )
+    df.insert(1, EPISODE_COLUMN, pd.Categorical(df.index.astype(str)))
+    return df.reset_index(drop=True)
+
+
+def get_metrics_dataframe(metrics, config_names: List[Any]):
+    r"""
+    Get the DataFrame of metrics given to a visualize_* function, with the
+    runs labelled by the given names.
+    :param metrics: a DataFrame from load_metrics_dataframe(), or the list of
+        per-episode metrics of each run
+    :param config_names: names of the runs, in order
+    :returns: the DataFrame
+    """
+    import pandas as pd
+
+    if not isinstance(metrics, pd.DataFrame):
+        return load_metrics_dataframe(metrics, config_names)
+    # rename runs without copying the metrics
+    assert len(metrics[LABEL_COLUMN].cat.categories) == len(config_names)
+    df = metrics.copy(deep=False)
+    df[LABEL_COLUMN] = df[LABEL_COLUMN].cat.rename_categories(list(config_names))
+    return df
+
+
+def get_metric_names(df) -> List[Any]:
+    r"""
+    :param df: DataFrame from load_metrics_dataframe()
+    :returns: names of the metric columns
+    """
+    return [
+        column for column in df.columns if column not in [LABEL_COLUMN, EPISODE_COLUMN]
+    ]
+
+
+def drop_invalid_samples(df, columns: List[Any]):
+    r"""
+    Drop the rows with a NaN or infinite value in any of the given columns.
+    :param df: DataFrame
+    :param columns: names of the columns to check
+    :returns: the valid rows
+    """
+    return df[np.isfinite(df[columns].to_numpy(dtype=np.float64)).all(axis=1)]
+
+
+def visualize_variability_due_to_seed_with_box_plots(
+    metrics_list,
     seeds: List[int],
     plot_dir: str,
+    num_workers: Optional[int] = None,
+    metric_names: Optional[List[str]] = None,
 ):
     r"""
     Generate box plots from metrics and seeds. Requires same metrics collected
@@ -234,72 +920,56 @@ def visualize_variability_due_to_seed_with_box_plots(
     where <metric_name> is for eg. "spl", <n> is the number of seeds.
     Args:
         metrics_list: list of metrics collected from experiment run with the
-            given seeds.
+            given seeds, or a DataFrame of them from load_metrics_dataframe().
         seeds: seeds to initialize agents. Should be in the same order as
             metrics_list.
         plot_dir: directory to save the box plot.
+        num_workers: number of processes drawing the plots.
+        metric_names: metrics to plot; defaults to all.
     """
     # check if we have metrics from all seeds
     num_seeds = len(seeds)
-    assert len(metrics_list) == num_seeds
 
     # return if no data
     if num_seeds == 0:
         return
-    num_samples_per_seed = len(metrics_list[0])
-    if num_samples_per_seed == 0:
+    df = get_metrics_dataframe(metrics_list, seeds)
+    if len(df) == 0:
         return
-
-    # check if all seeds have the same number of data points
-    # for i in range(num_seeds):
-    #    assert  len(metrics_list[i]) == num_samples_per_seed
-
-    # extract metric names
-    metric_names = []
-    for _, episode_metrics in metrics_list[0].items():
-        for metric_name, _ in episode_metrics.items():
-            metric_names.append(metric_name)
-        break
-
-    # build dataframe
-    data = {}
-    total_num_samples = num_samples_per_seed * num_seeds
-    data["seed"] = np.ndarray((total_num_samples,))
-    for metric_name in metric_names:
-        data[metric_name] = np.ndarray((total_num_samples,))
-    # populate each array
-    total_sample_count = 0
-    for seed_index in range(num_seeds):
-        for _, episode_metrics in metrics_list[seed_index].items():
-            # register a new sample
-            data["seed"][total_sample_count] = seeds[seed_index]
-            for metric_name in metric_names:
-                data[metric_name][total_sample_count] = episode_metrics[metric_name]
-            total_sample_count += 1
-    df = pd.DataFrame(data)
+    if metric_names is None:
+        metric_names = get_metric_names(df)
 
     # drop invalid samples
-    # code adapted from piRSquared's work on
-    # https://stackoverflow.com/questions/45745085/python-pandas-how-to-remove-nan-and-inf-values
-    df = df[~df.isin([np.nan, np.inf, -np.inf]).any(1)]
+    df = drop_invalid_samples(df, metric_names)
 
     # create box-and-strip plot for each metric
-    for metric_name in metric_names:
-        fig = plt.figure(figsize=(12.8, 9.6))
-        ax = fig.add_subplot(111)
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=90)
-        sns.boxplot(x="seed", y=metric_name, data=df, ax=ax)
-        sns.stripplot(x="seed", y=metric_name, data=df, color=".25", size=2, ax=ax)
-        fig.subplots_adjust(bottom=0.15)
-        fig.savefig(f"{plot_dir}/{metric_name}-{num_seeds}_seeds.png")
-        plt.close(fig)
+    run_plot_jobs(
+        [
+            (
+                plot_box_and_strip,
+                {
+                    "df": df[[LABEL_COLUMN, metric_name]],
+                    "x": LABEL_COLUMN,
+                    "y": metric_name,
+                    "plot_path": f"{plot_dir}/{metric_name}-{num_seeds}_seeds.png",
+                    "xlabel": "seed",
+                    "xticks_rotation": 90,
+                    "bottom": 0.15,
+                },
+            )
+            for metric_name in metric_names
+        ],
+        num_workers,
+    )
 
 
 def visualize_metrics_across_configs_with_box_plots(
-    metrics_list: List[Dict[str, Dict[str, float]]],
+    metrics_list,
     config_names: List[str],
     configs_or_seeds: str,
     plot_dir: str,
+    num_workers: Optional[int] = None,
+    metric_names: Optional[List[str]] = None,
 ):
     r"""
     Generate box plots from metrics and experiment configurations. Requires same
@@ -307,82 +977,58 @@ def visualize_metrics_across_configs_with_box_plots(
     <plot_dir>/<metric_name>.png, where <metric_name> is for eg. "agent_time".
     Args:
         metrics_list: list of metrics collected from experiment run with the
-            given seeds.
+            given seeds, or a DataFrame of them from load_metrics_dataframe().
         config_names: names of experiment configurations. Should be in the same
             order as metrics_list.
         configs_or_seeds: if visualizing across configs or seeds. Can only be
             "configurations" or "seeds"
         plot_dir: directory to save the box plot.
+        num_workers: number of processes drawing the plots.
+        metric_names: metrics to plot; defaults to all.
     """
     # check configs_or_seeds
     assert configs_or_seeds in ["configurations", "seeds"]
-    
-    # check if we have metrics from all configs
-    num_configs = len(config_names)
-    assert len(metrics_list) == num_configs
 
     # return if no data
+    num_configs = len(config_names)
     if num_configs == 0:
         return
-    num_samples_per_config = len(metrics_list[0])
-    if num_samples_per_config == 0:
+    df = get_metrics_dataframe(metrics_list, config_names)
+    if len(df) == 0:
         return
-
-    # check if all configs have the same number of data points
-    # for i in range(num_configs):
-    #    assert  len(metrics_list[i]) == num_samples_per_config
-
-    # extract metric names
-    metric_names = []
-    for _, episode_metrics in metrics_list[0].items():
-        for metric_name, _ in episode_metrics.items():
-            metric_names.append(metric_name)
-        break
-
-    # build dataframe
-    data = {}
-    total_num_samples = num_samples_per_config * num_configs
-    data[configs_or_seeds] = np.ndarray((total_num_samples,), dtype=object)
-    for metric_name in metric_names:
-        data[metric_name] = np.ndarray((total_num_samples,))
-    # populate each array
-    total_sample_count = 0
-    for config_index in range(num_configs):
-        for _, episode_metrics in metrics_list[config_index].items():
-            # register a new sample
-            data[configs_or_seeds][total_sample_count] = config_names[config_index]
-            for metric_name in metric_names:
-                data[metric_name][total_sample_count] = episode_metrics[metric_name]
-            total_sample_count += 1
-    df = pd.DataFrame(data)
+    if metric_names is None:
+        metric_names = get_metric_names(df)
 
     # drop invalid samples
-    # code adapted from piRSquared's work on
-    # https://stackoverflow.com/questions/45745085/python-pandas-how-to-remove-nan-and-inf-values
-    df = df[~df.isin([np.nan, np.inf, -np.inf]).any(1)]
+    df = drop_invalid_samples(df, metric_names)
 
     # create box-and-strip plot for each metric
-    for metric_name in metric_names:
-        fig = plt.figure(figsize=(12.8, 9.6))
-        ax = fig.add_subplot(111)
-        sns.set(font_scale=1.2, style="white")
-        sns.boxplot(x=configs_or_seeds, y=metric_name, data=df, ax=ax)
-        sns.stripplot(x=configs_or_seeds, y=metric_name, data=df, color=".25", size=2, ax=ax)
-        ax.set_xlabel(f"{configs_or_seeds}", fontsize=22)
-        if configs_or_seeds == "seeds":
-            plt.xticks(rotation=90, ha="right")
-            plt.subplots_adjust(bottom=0.2)
-        else:
-            plt.xticks(rotation=0)
-            plt.subplots_adjust(bottom=0.1)
-        ax.set_ylabel(f"{metric_name.value} {resolve_metric_unit(metric_name)}", fontsize=22)
-        #fig.suptitle(f"{metric_name.value} across {num_configs} {configs_or_seeds}")
-        fig.savefig(f"{plot_dir}/{metric_name}-{num_configs}_{configs_or_seeds}.png")
-        plt.close(fig)
+    run_plot_jobs(
+        [
+            (
+                plot_box_and_strip,
+                {
+                    "df": df[[LABEL_COLUMN, metric_name]],
+                    "x": LABEL_COLUMN,
+                    "y": metric_name,
+                    "plot_path": f"{plot_dir}/{metric_name}-{num_configs}_{configs_or_seeds}.png",
+                    "xlabel": f"{configs_or_seeds}",
+                    "ylabel": f"{metric_name.value} {resolve_metric_unit(metric_name)}",
+                    "label_fontsize": 22,
+                    "xticks_rotation": 90 if configs_or_seeds == "seeds" else 0,
+                    "xticks_ha": "right" if configs_or_seeds == "seeds" else "center",
+                    "bottom": 0.2 if configs_or_seeds == "seeds" else 0.1,
+                    "font_scale": 1.2,
+                },
+            )
+            for metric_name in metric_names
+        ],
+        num_workers,
+    )
 
 
 def visualize_success_across_configs_with_pie_charts(
-    metrics_list: List[Dict[str, Dict[str, float]]],
+    metrics_list,
     config_names: List[str],
     configs_or_seeds: str,
     plot_dir: str,
@@ -392,47 +1038,39 @@ def visualize_success_across_configs_with_pie_charts(
     the success metric collected across all configs. Save the plot to <plot_dir>/success.png.
     Args:
         metrics_list: list of metrics collected from experiment run with the
-            given seeds.
+            given seeds, or a DataFrame of them from load_metrics_dataframe().
         config_names: names of experiment configurations. Should be in the same
             order as metrics_list.
         configs_or_seeds: if visualizing across configs or seeds. Can only be
             "configurations" or "seeds"
         plot_dir: directory to save the pie chart.
     """
+    import matplotlib.pyplot as plt
+
     # check configs_or_seeds
     assert configs_or_seeds in ["configurations", "seeds"]
 
-    # check if we have metrics from all configs
-    num_configs = len(config_names)
-    assert len(metrics_list) == num_configs
-
     # return if no data
+    num_configs = len(config_names)
     if num_configs == 0:
         return
-    num_samples_per_config = len(metrics_list[0])
-    if num_samples_per_config == 0:
+    df = get_metrics_dataframe(metrics_list, config_names)
+    if len(df) == 0:
         return
 
-    # check if all configs have the same number of data points
-    # for i in range(num_configs):
-    #    assert  len(metrics_list[i]) == num_samples_per_config
-
-    # build data for plotting
-    success_counts = []
-    for config_index in range(0, num_configs):
-        # count success in this config
-        dict_of_metrics = metrics_list[config_index]
-        count = 0
-        for _, per_episode_metrics in dict_of_metrics.items():
-            count += per_episode_metrics[NumericalMetrics.SPL]
-        success_counts.append(count)
+    # count success in each config
+    grouped = df.groupby(LABEL_COLUMN, sort=False, observed=False)[
+        NumericalMetrics.SPL
+    ]
+    success_counts = grouped.sum()
+    episode_counts = grouped.size()
     dict_of_success_counts = {}
-    for config_index in range(0, num_configs):
-        dict_of_success_counts[config_names[config_index]] = [
-            success_counts[config_index],
-            num_samples_per_config - success_counts[config_index],
+    for config_name in config_names:
+        dict_of_success_counts[config_name] = [
+            success_counts[config_name],
+            episode_counts[config_name] - success_counts[config_name],
         ]
-    
+
     # create pie plots for all configs
     fig, axes = plt.subplots(
         int(np.ceil(num_configs/2)),
@@ -456,10 +1094,12 @@ def visualize_success_across_configs_with_pie_charts(
 
 
 def visualize_metrics_across_configs_with_histograms(
-    metrics_list: List[Dict[str, Dict[str, float]]],
+    metrics_list,
     config_names: List[str],
     configs_or_seeds: str,
     plot_dir: str,
+    num_workers: Optional[int] = None,
+    metric_names: Optional[List[str]] = None,
 ):
     r"""
     Generate histograms from metrics and experiment configurations. Requires same
@@ -467,92 +1107,63 @@ def visualize_metrics_across_configs_with_histograms(
     <plot_dir>/<metric_name>.png, where <metric_name> is for eg. "spl".
     Args:
         metrics_list: list of metrics collected from experiment run with the
-            given seeds.
+            given seeds, or a DataFrame of them from load_metrics_dataframe().
         config_names: names of experiment configurations. Should be in the same
             order as metrics_list.
         configs_or_seeds: if visualizing across configs or seeds. Can only be
             "configurations" or "seeds"
         plot_dir: directory to save the histograms.
+        num_workers: number of processes drawing the plots.
+        metric_names: metrics to plot; defaults to all.
     """
     # check configs_or_seeds
     assert configs_or_seeds in ["configurations", "seeds"]
 
-    # check if we have metrics from all configs
-    num_configs = len(config_names)
-    assert len(metrics_list) == num_configs
-
     # return if no data
+    num_configs = len(config_names)
     if num_configs == 0:
         return
-    num_samples_per_config = len(metrics_list[0])
-    if num_samples_per_config == 0:
+    df = get_metrics_dataframe(metrics_list, config_names)
+    if len(df) == 0:
         return
-
-    # check if all configs have the same number of data points
-    # for i in range(num_configs):
-    #    assert  len(metrics_list[i]) == num_samples_per_config
-
-    # extract metric names
-    metric_names = []
-    for _, episode_metrics in metrics_list[0].items():
-        for metric_name, _ in episode_metrics.items():
-            metric_names.append(metric_name)
-        break
-
-    # build data for plotting
-    data_all_configs_all_metrics = {} # Dict[Dict[List[float]]]
-    for config_index in range(0, num_configs):
-        data_per_config_all_metrics = {} # Dict[List[float]]
-        metrics_per_config = metrics_list[config_index]
-        for metric_name in metric_names:
-            data_per_config_per_metric = []
-            for _, dict_of_metrics in metrics_per_config.items():
-                if (
-                    not np.isnan(dict_of_metrics[metric_name])
-                    and not np.isinf(dict_of_metrics[metric_name])
-                ):
-                    data_per_config_per_metric.append(dict_of_metrics[metric_name])
-            data_per_config_all_metrics[metric_name] = data_per_config_per_metric
-        data_all_configs_all_metrics[config_names[config_index]] = data_per_config_all_metrics
-
-    # plot histograms
+    if metric_names is None:
+        metric_names = get_metric_names(df)
     for metric_name in metric_names:
-        fig, axes = plt.subplots(
-            int(np.ceil(num_configs/2)),
-            2,
-            sharey=True,
-            figsize=(12.8, 9.6))
-        axes_flattened = axes.ravel()
-        for config_index in range(0, num_configs):
-            config_name = config_names[config_index]
-            # create histogram per metric, per config
-            data_to_plot = data_all_configs_all_metrics[config_name][metric_name]
-            if (
-                metric_name == NumericalMetrics.DISTANCE_TO_GOAL
-                or metric_name == metric_name == NumericalMetrics.SPL
-                or metric_name == NumericalMetrics.NUM_STEPS
-            ):
-                axes_flattened[config_index].hist(
-                    data_to_plot,
-                    bins=50
-                )
-            else:
-                raise NotImplementedError
-            axes_flattened[config_index].set_title(config_name, fontsize=18)
-        # set common x and y label. Code adapted from
-        # https://stackoverflow.com/questions/16150819/common-xlabel-ylabel-for-matplotlib-subplots
-        fig.text(0.5, 0.04, f"{metric_name.value} {resolve_metric_unit(metric_name)}", ha="center", fontsize=22)
-        fig.text(0.04, 0.5, "number of episodes", va="center", rotation="vertical", fontsize=22)
-        plt.xticks(rotation=0)
-        plt.subplots_adjust(left=0.125, bottom=0.1, right=0.9, top=0.9, wspace=0.2, hspace=0.6)
-        fig.savefig(f"{plot_dir}/{metric_name}-{num_configs}_{configs_or_seeds}.png")
-        plt.close(fig)
+        if metric_name not in [
+            NumericalMetrics.DISTANCE_TO_GOAL,
+            NumericalMetrics.SPL,
+            NumericalMetrics.NUM_STEPS,
+        ]:
+            raise NotImplementedError
+
+    # plot histograms of the valid samples of each metric, per config
+    plot_jobs = []
+    for metric_name in metric_names:
+        df_metric = drop_invalid_samples(df[[LABEL_COLUMN, metric_name]], [metric_name])
+        data_per_config = {
+            config_name: df_metric[metric_name].to_numpy()[
+                (df_metric[LABEL_COLUMN] == config_name).to_numpy()
+            ]
+            for config_name in config_names
+        }
+        plot_jobs.append(
+            (
+                plot_histograms,
+                {
+                    "data_per_config": data_per_config,
+                    "xlabel": f"{metric_name.value} {resolve_metric_unit(metric_name)}",
+                    "plot_path": f"{plot_dir}/{metric_name}-{num_configs}_{configs_or_seeds}.png",
+                },
+            )
+        )
+    run_plot_jobs(plot_jobs, num_workers)
 
 
 def observations_to_image_for_roam(
     observation: Dict,
     info: Dict,
     max_depth: float,
+    top_down_map_renderer: Optional[TopDownMapRenderer] = None,
 ) -> np.ndarray:
     r"""Generate image of single frame from observation and info
     returned from a single environment step(). Modified upon
@@ -562,10 +1173,17 @@ def observations_to_image_for_roam(
         observation: observation returned from an environment step().
         info: info returned from an environment step().
         max_depth: max depth reading of the depth sensor.
+        top_down_map_renderer: if given, renders the top-down map
+            incrementally. The caller must apply the map updates of every
+            step of the episode up to this one, so the top-down map info
+            needs only the agent's map coordinates and angle.
 
     Returns:
         generated image of a single frame.
     """
+    from habitat.utils.visualizations import maps
+    from habitat.utils.visualizations.utils import draw_collision
+
     egocentric_view_l: List[np.ndarray] = []
     if "rgb" in observation:
         rgb = observation["rgb"]
@@ -602,9 +1220,14 @@ def observations_to_image_for_roam(
     frame = egocentric_view
 
     if "top_down_map_for_roam" in info:
-        top_down_map = maps.colorize_draw_agent_and_fit_to_height(
-            info["top_down_map_for_roam"], egocentric_view.shape[0]
-        )
+        if top_down_map_renderer is not None:
+            top_down_map = top_down_map_renderer.render(
+                info["top_down_map_for_roam"], egocentric_view.shape[0]
+            )
+        else:
+            top_down_map = maps.colorize_draw_agent_and_fit_to_height(
+                info["top_down_map_for_roam"], egocentric_view.shape[0]
+            )
         frame = np.concatenate((egocentric_view, top_down_map), axis=1)
     return frame
 
@@ -620,6 +1243,10 @@ def visualize_running_times_with_bar_plots(
         as `running_times`
     :param plot_dir: directory to save the plot
     """
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
     # precondition check
     assert len(running_times) == len(config_names)
 
@@ -642,104 +1269,74 @@ def visualize_running_times_with_bar_plots(
 
 
 def visualize_pairwise_percentage_diff_of_metrics(
-    pairwise_diff_dict_of_metrics: Dict[str, Dict[str, float]],
+    pairwise_diff_dict_of_metrics,
     config_names: List[str],
     diff_in_percentage: bool,
     plot_dir: str,
+    num_workers: Optional[int] = None,
+    metric_names: Optional[List[str]] = None,
 ):
     r"""
     Visualize pair-wise difference in metrics across multiple configs. Save
     the plot to plot_dir/<metric_name>-pairwise_diff.png, where <metric_name>
     is for eg. "spl".
     :param pairwise_diff_dict_of_metrics: pair-wise difference in metrics between
-        two experiment configs.
+        two experiment configs, or a DataFrame of them from
+        load_metrics_dataframe() with a single run
     :param config_names: list of names of two experiment configs
     :param diff_in_percentage: if the pair-wise difference is computed as percentage
         or not
     :param plot_dir: directory to save the plots
+    :param num_workers: number of processes drawing the plots
+    :param metric_names: metrics to plot; defaults to all
     """
+    import pandas as pd
+
     # precondition check
     num_configs = len(config_names)
     assert num_configs == 2
 
     # return if no data
-    if num_configs == 0:
-        return
-    num_samples = len(pairwise_diff_dict_of_metrics)
-    if num_samples == 0:
+    compared_configs = f"configs: {config_names[1]} vs {config_names[0]}"
+    if isinstance(pairwise_diff_dict_of_metrics, pd.DataFrame):
+        df = get_metrics_dataframe(pairwise_diff_dict_of_metrics, [compared_configs])
+    else:
+        df = load_metrics_dataframe(
+            [pairwise_diff_dict_of_metrics], [compared_configs]
+        )
+    if len(df) == 0:
         return
-
-    # extract metric names
-    metric_names = []
-    for _, episode_metrics in pairwise_diff_dict_of_metrics.items():
-        for metric_name, _ in episode_metrics.items():
-            metric_names.append(metric_name)
-        break
-
-    # build dataframe
-    data = {}
-    data["compared configs"] = np.ndarray((num_samples,), dtype=object)
-    for metric_name in metric_names:
-        if diff_in_percentage:
-            data[f"{metric_name} difference (%)"] = np.ndarray((num_samples,))
-        else:
-            data[f"{metric_name} difference"] = np.ndarray((num_samples,))
-    # populate each array
-    total_sample_count = 0
-    for _, episode_metrics in pairwise_diff_dict_of_metrics.items():
-        # register a new sample
-        data["compared configs"][
-            total_sample_count
-        ] = f"configs: {config_names[1]} vs {config_names[0]}"
-        for metric_name in metric_names:
-            if diff_in_percentage:
-                data[f"{metric_name} difference (%)"][
-                    total_sample_count
-                ] = episode_metrics[metric_name]
-            else:
-                data[f"{metric_name} difference"][total_sample_count] = episode_metrics[
-                    metric_name
-                ]
-        total_sample_count += 1
-    df = pd.DataFrame(data)
+    if metric_names is None:
+        metric_names = get_metric_names(df)
 
     # drop invalid samples
-    # code adapted from piRSquared's work on
-    # https://stackoverflow.com/questions/45745085/python-pandas-how-to-remove-nan-and-inf-values
-    df = df[~df.isin([np.nan, np.inf, -np.inf]).any(1)]
+    df = drop_invalid_samples(df, metric_names)
 
     # create box-and-strip plot for each metric
+    plot_jobs = []
     for metric_name in metric_names:
-        fig = plt.figure(figsize=(12.8, 9.6))
-        ax = fig.add_subplot(111)
         if diff_in_percentage:
-            sns.boxplot(
-                x="compared configs", y=f"{metric_name} difference (%)", data=df, ax=ax
-            )
-            sns.stripplot(
-                x="compared configs",
-                y=f"{metric_name} difference (%)",
-                data=df,
-                color=".25",
-                size=2,
-                ax=ax,
-            )
-            fig.savefig(
+            y = f"{metric_name} difference (%)"
+            plot_path = (
                 f"{plot_dir}/{metric_name}-{config_names[1]}_vs_{config_names[0]}_%.png"
             )
         else:
-            sns.boxplot(
-                x="compared configs", y=f"{metric_name} difference", data=df, ax=ax
-            )
-            sns.stripplot(
-                x="compared configs",
-                y=f"{metric_name} difference",
-                data=df,
-                color=".25",
-                size=2,
-                ax=ax,
-            )
-            fig.savefig(
+            y = f"{metric_name} difference"
+            plot_path = (
                 f"{plot_dir}/{metric_name}-{config_names[1]}_vs_{config_names[0]}.png"
             )
-        plt.close(fig)
+        plot_jobs.append(
+            (
+                plot_box_and_strip,
+                {
+                    "df": df[[LABEL_COLUMN, metric_name]].rename(
+                        columns={metric_name: y}
+                    ),
+                    "x": LABEL_COLUMN,
+                    "y": y,
+                    "plot_path": plot_path,
+                    "xlabel": "compared configs",
+                },
+            )
+        )
+    run_plot_jobs(plot_jobs, num_workers)